@@ -1,9 +1,11 @@
-import ccxt
 import pandas as pd
 import numpy as np
 import sys
 import os
 
+from data_sources import fetch_ohlcv
+from fill_model import apply_fill_model
+
 # --- Indicator Functions ---
 def calculate_rsi(series, period=14):
     delta = series.diff()
@@ -94,11 +96,46 @@ def get_signal_for_row(row, prev_row):
     
     return signal, score
 
-def run_backtest(timeframe, limit=500):
-    exchange = ccxt.binance()
-    bars = exchange.fetch_ohlcv('BTC/USDT', timeframe=timeframe, limit=limit)
-    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+# --- Stop Loss Fill ---
+def stop_fill_price(position, entry_price, entry_atr, bar_open, bar_high, bar_low, atr_mult=2.0):
+    """Fill price if the bar breaches the 2x ATR stop, else None.
+
+    The stop is assumed hit if the bar's low (long) or high (short) touches it,
+    and fills at the stop unless the bar opened beyond it (gap), in which case
+    it fills at the open. Shared with stop_watcher so live fills match backtests.
+    """
+    if position == "LONG":
+        stop_price = entry_price - (atr_mult * entry_atr)
+        if bar_low <= stop_price:
+            # In real life slippage exists, but strictly:
+            return bar_open if bar_open < stop_price else stop_price  # Gap down
+    elif position == "SHORT":
+        stop_price = entry_price + (atr_mult * entry_atr)
+        if bar_high >= stop_price:
+            return bar_open if bar_open > stop_price else stop_price  # Gap up
+    return None
+
+def run_backtest(timeframe, limit=500, mode='legacy', stop_mode='close', fill_model=None, funding=None,
+                 since=None, store=None):
+    """Backtest BTC/USDT on `timeframe`.
+
+    since (e.g. '2021-01-01') backtests everything from that date instead of
+    the last `limit` bars, from the on-disk cache kept by history_loader and
+    memory-mapped through candle_store; store (a candle_store series
+    directory) maps an already built series without touching the network.
+
+    mode='legacy' keeps the original immediate-entry simulation below;
+    mode='live' replays the live scripts' state machine (strategy_core).
+    fill_model (name or dict, see fill_model.FILL_MODELS) nets fees,
+    slippage and funding out of each trade's pnl.
+    """
+    if since is not None or store is not None:
+        from candle_store import build_store, load_frame
+        df = load_frame(store if store is not None else build_store('BTC/USDT', timeframe, since))
+    else:
+        bars = fetch_ohlcv('BTC/USDT', timeframe, limit=limit)
+        df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     
     # Calculate Indicators
     df['RSI'] = calculate_rsi(df['close'])
@@ -108,12 +145,20 @@ def run_backtest(timeframe, limit=500):
     df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = calculate_bollinger_bands(df['close'])
     df['Stoch_K'], df['Stoch_D'] = calculate_stochastic(df)
     df['ATR'] = calculate_atr(df)
-    
+
+    if mode == 'live':
+        import strategy_core  # Imports this module, so only load it when needed
+        history, trades, _events = strategy_core.replay(df, stop_mode=stop_mode)
+        if fill_model is not None:
+            trades = apply_fill_model(trades, df, fill_model, funding)
+        return history, trades, df
+
     # Simulation State
     state = {
         "position": None, # LONG, SHORT, None
         "entry_price": 0.0,
         "entry_atr": 0.0,
+        "entry_time": None,
         "balance": 1000.0,
         "trades": []
     }
@@ -135,23 +180,9 @@ def run_backtest(timeframe, limit=500):
         
         if state["position"] is not None:
             # Check Stop Loss
-            sl_hit = False
-            atr_mult = 2.0
-            
-            if state["position"] == "LONG":
-                stop_price = state["entry_price"] - (atr_mult * state["entry_atr"])
-                if row['low'] <= stop_price: # Assuming hit if low touches it
-                    sl_hit = True
-                    exit_price = stop_price # Execute at SL
-                    # In real life slippage exists, but strictly:
-                    if row['open'] < stop_price: exit_price = row['open'] # Gap down
-            
-            elif state["position"] == "SHORT":
-                stop_price = state["entry_price"] + (atr_mult * state["entry_atr"])
-                if row['high'] >= stop_price:
-                    sl_hit = True
-                    exit_price = stop_price
-                    if row['open'] > stop_price: exit_price = row['open'] # Gap up
+            exit_price = stop_fill_price(state["position"], state["entry_price"], state["entry_atr"],
+                                         row['open'], row['high'], row['low'])
+            sl_hit = exit_price is not None
             
             if sl_hit:
                 if state["position"] == "LONG":
@@ -163,6 +194,7 @@ def run_backtest(timeframe, limit=500):
                 state["trades"].append({
                     "type": state["position"],
                     "entry": state["entry_price"],
+                    "entry_time": state["entry_time"],
                     "exit": exit_price,
                     "pnl": pnl,
                     "reason": "STOP_LOSS",
@@ -198,6 +230,7 @@ def run_backtest(timeframe, limit=500):
                      state["trades"].append({
                         "type": state["position"],
                         "entry": state["entry_price"],
+                        "entry_time": state["entry_time"],
                         "exit": exit_price,
                         "pnl": pnl,
                         "reason": "SIGNAL_FLIP",
@@ -221,6 +254,7 @@ def run_backtest(timeframe, limit=500):
                      state["trades"].append({
                         "type": state["position"],
                         "entry": state["entry_price"],
+                        "entry_time": state["entry_time"],
                         "exit": exit_price,
                         "pnl": pnl,
                         "reason": "NEUTRAL",
@@ -235,6 +269,7 @@ def run_backtest(timeframe, limit=500):
                 state["position"] = signal
                 state["entry_price"] = row['close']
                 state["entry_atr"] = row['ATR']
+                state["entry_time"] = row['timestamp']
                 action = f"ENTER_{signal}"
         
         history.append({
@@ -246,82 +281,115 @@ def run_backtest(timeframe, limit=500):
             "pnl": pnl
         })
 
-    return history, state["trades"], df
+    trades = state["trades"]
+    if fill_model is not None:
+        trades = apply_fill_model(trades, df, fill_model, funding)
+    return history, trades, df
+
+def _backtest_store(timeframe, store, mode, stop_mode, fill_model):
+    """Worker entry point: returns history and trades only, the frame stays in the worker"""
+    hist, trades, _df = run_backtest(timeframe, mode=mode, stop_mode=stop_mode, fill_model=fill_model, store=store)
+    return hist, trades
 
 # --- Main Execution ---
-print("Running Backtests...")
+def main():
+    # Usage: backtest_strategy.py [--live] [--intrabar-stops] [--fills none|binance_spot|hyperliquid]
+    #                             [--since YYYY-MM-DD [--workers N]]
+    mode = 'live' if '--live' in sys.argv else 'legacy'
+    stop_mode = 'intrabar' if '--intrabar-stops' in sys.argv else 'close'
+    fill_model = sys.argv[sys.argv.index('--fills') + 1] if '--fills' in sys.argv else None
+    since = sys.argv[sys.argv.index('--since') + 1] if '--since' in sys.argv else None
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 1
+    print(f"Running Backtests ({mode} rules, {fill_model or 'no'} costs)...")
 
-timeframes = ['1h', '2h', '4h']
-results = {}
+    timeframes = ['1h', '2h', '4h']
+    results = {}
 
-for tf in timeframes:
-    try:
-        hist, trades, df = run_backtest(tf)
-        
-        # Calculate Stats
-        total_trades = len(trades)
-        wins = len([t for t in trades if t['pnl'] > 0])
-        losses = len([t for t in trades if t['pnl'] <= 0])
-        win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
-        total_pnl = sum([t['pnl'] for t in trades]) * 100 # Percent
-        
-        results[tf] = {
-            "total_trades": total_trades,
-            "win_rate": win_rate,
-            "total_pnl": total_pnl,
-            "history": hist,
-            "trades": trades
-        }
-        print(f"[{tf}] Trades: {total_trades}, Win Rate: {win_rate:.1f}%, PnL: {total_pnl:.1f}%")
-        
-        # Save CSV for 4h (requested by user logic)
-        if tf == '4h':
-            # Generate the CSV content expected by user
-            csv_path = '/home/ironman/.openclaw/workspace/btc_strategy_history.csv'
-            with open(csv_path, 'w') as f:
-                f.write("Date,BTC Price,Signal,Action,Profit (USDT)\n")
-                for h in hist:
-                    profit_str = f"{h['pnl']*100:.2f}" if h['pnl'] != 0 else ""
-                    f.write(f"{h['timestamp']},{h['price']:.2f},{h['signal']},{h['action']},{profit_str}\n")
-                    
-    except Exception as e:
-        print(f"Failed for {tf}: {e}")
-
-# --- Analysis for User Questions ---
-print("\n--- ANALYSIS ---")
-
-# 1. Signals in last 24h (from 4h timeframe)
-r4h = results.get('4h')
-if r4h:
-    hist = r4h['history']
-    # Filter last 24h
-    now = hist[-1]['timestamp']
-    start_24h = now - pd.Timedelta(hours=24)
-    last_24h_recs = [h for h in hist if h['timestamp'] >= start_24h]
-    
-    signals_24h = [h for h in last_24h_recs if "ENTER" in h['action'] or "EXIT" in h['action']]
-    print(f"1. Signals/Actions in last 24h (4h TF): {len(signals_24h)}")
-    for s in signals_24h:
-        print(f"   - {s['timestamp']} : {s['action']}")
-
-    # 2. Stop Losses Triggered (Total in history)
-    sl_trades = [t for t in r4h['trades'] if t['reason'] == "STOP_LOSS"]
-    sl_last_24h = [t for t in sl_trades if t['time'] >= start_24h]
-    print(f"2. Stop Losses triggered (Total): {len(sl_trades)}")
-    print(f"   Stop Losses in last 24h: {len(sl_last_24h)}")
-
-    # 4. Win Rate
-    print(f"4. Win Rate (4h TF): {r4h['win_rate']:.2f}% ({len([t for t in r4h['trades'] if t['pnl']>0])}/{r4h['total_trades']})")
-
-# 3. Optimal Interval
-print("\n3. Interval Comparison:")
-best_tf = None
-best_pnl = -99999
-
-for tf, res in results.items():
-    print(f"   {tf}: PnL {res['total_pnl']:.1f}%, Win Rate {res['win_rate']:.1f}% ({res['total_trades']} trades)")
-    if res['total_pnl'] > best_pnl:
-        best_pnl = res['total_pnl']
-        best_tf = tf
-
-print(f"   -> Best performing interval: {best_tf}")
+    # Deep-history runs: download once here, then workers map the stores instead of receiving DataFrames
+    pool, futures = None, {}
+    if since is not None and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from candle_store import build_store
+        pool = ProcessPoolExecutor(max_workers=workers)
+        for tf in timeframes:
+            futures[tf] = pool.submit(_backtest_store, tf, build_store('BTC/USDT', tf, since), mode, stop_mode, fill_model)
+
+    for tf in timeframes:
+        try:
+            if tf in futures:
+                hist, trades = futures[tf].result()
+            else:
+                hist, trades, df = run_backtest(tf, mode=mode, stop_mode=stop_mode, fill_model=fill_model, since=since)
+
+            # Calculate Stats
+            total_trades = len(trades)
+            wins = len([t for t in trades if t['pnl'] > 0])
+            losses = len([t for t in trades if t['pnl'] <= 0])
+            win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
+            total_pnl = sum([t['pnl'] for t in trades]) * 100 # Percent
+
+            results[tf] = {
+                "total_trades": total_trades,
+                "win_rate": win_rate,
+                "total_pnl": total_pnl,
+                "history": hist,
+                "trades": trades
+            }
+            print(f"[{tf}] Trades: {total_trades}, Win Rate: {win_rate:.1f}%, PnL: {total_pnl:.1f}%")
+
+            # Save CSV for 4h (requested by user logic)
+            if tf == '4h':
+                # Generate the CSV content expected by user
+                csv_path = '/home/ironman/.openclaw/workspace/btc_strategy_history.csv'
+                with open(csv_path, 'w') as f:
+                    f.write("Date,BTC Price,Signal,Action,Profit (USDT)\n")
+                    for h in hist:
+                        profit_str = f"{h['pnl']*100:.2f}" if h['pnl'] != 0 else ""
+                        f.write(f"{h['timestamp']},{h['price']:.2f},{h['signal']},{h['action']},{profit_str}\n")
+
+        except Exception as e:
+            print(f"Failed for {tf}: {e}")
+    if pool is not None:
+        pool.shutdown()
+
+    # --- Analysis for User Questions ---
+    print("\n--- ANALYSIS ---")
+
+    # 1. Signals in last 24h (from 4h timeframe)
+    r4h = results.get('4h')
+    if r4h:
+        hist = r4h['history']
+        # Filter last 24h
+        now = hist[-1]['timestamp']
+        start_24h = now - pd.Timedelta(hours=24)
+        last_24h_recs = [h for h in hist if h['timestamp'] >= start_24h]
+
+        signals_24h = [h for h in last_24h_recs if "ENTER" in h['action'] or "EXIT" in h['action']]
+        print(f"1. Signals/Actions in last 24h (4h TF): {len(signals_24h)}")
+        for s in signals_24h:
+            print(f"   - {s['timestamp']} : {s['action']}")
+
+        # 2. Stop Losses Triggered (Total in history)
+        sl_trades = [t for t in r4h['trades'] if t['reason'] == "STOP_LOSS"]
+        sl_last_24h = [t for t in sl_trades if t['time'] >= start_24h]
+        print(f"2. Stop Losses triggered (Total): {len(sl_trades)}")
+        print(f"   Stop Losses in last 24h: {len(sl_last_24h)}")
+
+        # 4. Win Rate
+        print(f"4. Win Rate (4h TF): {r4h['win_rate']:.2f}% ({len([t for t in r4h['trades'] if t['pnl']>0])}/{r4h['total_trades']})")
+
+    # 3. Optimal Interval
+    print("\n3. Interval Comparison:")
+    best_tf = None
+    best_pnl = -99999
+
+    for tf, res in results.items():
+        print(f"   {tf}: PnL {res['total_pnl']:.1f}%, Win Rate {res['win_rate']:.1f}% ({res['total_trades']} trades)")
+        if res['total_pnl'] > best_pnl:
+            best_pnl = res['total_pnl']
+            best_tf = tf
+
+    print(f"   -> Best performing interval: {best_tf}")
+
+if __name__ == "__main__":
+    main()
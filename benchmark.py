@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for the indicator, strategy, backtest and chart hot paths.
+
+Every case runs on a seeded synthetic OHLCV series at each size in SIZES
+(500 bars is a live run, 10k a long backtest, 1M a multi-year 1m history);
+pure-Python cases that would take minutes at 1M bars are capped by their
+max_bars. Nothing touches the network: OPENCLAW_DATA_OFFLINE is forced on,
+backtests read the series from a temporary candle_store directory and the
+chart is rendered to a temp file that is removed again.
+
+Each run prints median/min wall time per case and appends the medians to
+METRICS_DIR/benchmark_history.jsonl. --save-baseline stores them as
+benchmark_baseline.json; later runs show the ratio against it and flag cases
+slower than REGRESSION_RATIO (--check exits 1 when any case regressed).
+Timings only compare on the same machine, so the baseline records the host.
+
+Usage:
+  benchmark.py [--quick] [-k name] [--runs N] [--save-baseline] [--check]
+"""
+import functools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+os.environ['OPENCLAW_DATA_OFFLINE'] = '1'  # Before any module reads it
+
+import numpy as np
+import pandas as pd
+
+from timing import METRICS_DIR
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+CHART_SCRIPTS = os.path.join(REPO_ROOT, 'skills', 'crypto-price', 'scripts')
+BASELINE_FILE = os.path.join(METRICS_DIR, 'benchmark_baseline.json')
+HISTORY_FILE = os.path.join(METRICS_DIR, 'benchmark_history.jsonl')
+SIZES = (500, 10_000, 1_000_000)
+QUICK_SIZES = (500, 10_000)
+BAR_MS = 3_600_000
+RUNS = 5
+MAX_RUNS = 1000
+MIN_CASE_SEC = 0.5
+CASE_BUDGET_SEC = 5.0  # Stop repeating a case once it has used this much time
+REGRESSION_RATIO = 1.25
+ANALYZE_MODULES = ('btc_strategy_simple', 'btc_strategy', 'btc_strategy_full', 'eth_strategy_full',
+                   'sol_strategy_full', 'xrp_strategy_full')
+
+# --- Synthetic Data ---
+def synthetic_bars(count, seed=7, bar_ms=BAR_MS):
+    """(count, 6) float array of [t, o, h, l, c, v]: seeded log-normal walk with ranging wicks"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.004, count)))
+    open_price = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_price, close) * (1 + np.abs(rng.normal(0, 0.002, count)))
+    low = np.minimum(open_price, close) * (1 - np.abs(rng.normal(0, 0.002, count)))
+    volume = np.abs(rng.normal(1000, 300, count))
+    t = 1_600_000_000_000 + np.arange(count, dtype=np.float64) * bar_ms
+    return np.column_stack([t, open_price, high, low, close, volume])
+
+def synthetic_frame(bars):
+    """The fetch_ohlcv DataFrame layout the strategy scripts build"""
+    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+    return df
+
+class Data:
+    """One size of synthetic input in every shape the cases need, built once"""
+    def __init__(self, count, workdir):
+        self.count = count
+        self.bars = synthetic_bars(count)
+        self.frame = synthetic_frame(self.bars)
+        self.rows = [tuple(row) for row in self.bars.tolist()]
+        self.high, self.low, self.close = self.bars[:, 2], self.bars[:, 3], self.bars[:, 4]
+        self.workdir = workdir
+        self._store = None
+
+    def store(self):
+        """candle_store series of this size, so run_backtest(store=...) never fetches"""
+        if self._store is None:
+            from candle_store import write_store
+            self._store = write_store(self.frame, 'BENCH/USDT', '1h', root=os.path.join(self.workdir, str(self.count)))
+        return self._store
+
+    def price_points(self):
+        """[ts, price] ticks, five per bar, like a CoinGecko market_chart response"""
+        step = BAR_MS // 5
+        ts = (self.bars[:, 0][:, None] + np.arange(5) * step).ravel()
+        prices = np.interp(np.arange(len(ts)) / 5.0, np.arange(self.count), self.close)
+        return [[t, p] for t, p in zip(ts.tolist(), prices.tolist())]
+
+# --- Cases ---
+# (name, max_bars, make) where make(data) returns the zero-argument callable to time
+def _indicator_cases():
+    import indicators
+    return [
+        ('indicators.ema', None, lambda d: lambda: indicators.ema(d.close, 200)),
+        ('indicators.rsi', None, lambda d: lambda: indicators.rsi(d.close)),
+        ('indicators.macd', None, lambda d: lambda: indicators.macd(d.close)),
+        ('indicators.bollinger_bands', None, lambda d: lambda: indicators.bollinger_bands(d.close)),
+        ('indicators.stochastic', None, lambda d: lambda: indicators.stochastic(d.high, d.low, d.close)),
+        ('indicators.atr', None, lambda d: lambda: indicators.atr(d.high, d.low, d.close)),
+        ('indicators.all_indicators', None, lambda d: lambda: indicators.all_indicators(d.high, d.low, d.close)),
+    ]
+
+def _pandas_indicator_cases():
+    import backtest_strategy as bt
+    return [
+        ('calculate_rsi', None, lambda d: lambda: bt.calculate_rsi(d.frame['close'])),
+        ('calculate_ema', None, lambda d: lambda: bt.calculate_ema(d.frame['close'], 200)),
+        ('calculate_macd', None, lambda d: lambda: bt.calculate_macd(d.frame['close'])),
+        ('calculate_bollinger_bands', None, lambda d: lambda: bt.calculate_bollinger_bands(d.frame['close'])),
+        ('calculate_stochastic', None, lambda d: lambda: bt.calculate_stochastic(d.frame)),
+        ('calculate_atr', None, lambda d: lambda: bt.calculate_atr(d.frame)),
+    ]
+
+def _strategy_cases():
+    import strategy_core
+    cases = [
+        ('strategy_core.compute_indicators', None, lambda d: lambda: strategy_core.compute_indicators(d.frame.copy())),
+        ('strategy_core.score_bars', None,
+         lambda d: functools.partial(strategy_core.score_bars, strategy_core.compute_indicators(d.frame.copy()))),
+    ]
+    for module_name in ANALYZE_MODULES:
+        try:
+            module = __import__(module_name)
+        except (ImportError, SyntaxError) as e:  # pandas_ta missing, *_full need Python 3.12
+            print(f"skip {module_name}.analyze_strategy: {type(e).__name__}: {e}")
+            continue
+        # analyze_strategy adds indicator columns in place, so each call gets a fresh copy
+        cases.append((f"{module_name}.analyze_strategy", None,
+                      lambda d, fn=module.analyze_strategy: lambda: fn(d.frame.copy())))
+    return cases
+
+def _backtest_cases():
+    import backtest_strategy as bt
+    import strategy_core
+    return [
+        ('run_backtest.legacy', 10_000, lambda d: lambda: bt.run_backtest('1h', store=d.store())),
+        ('run_backtest.live', None, lambda d: lambda: bt.run_backtest('1h', mode='live', store=d.store())),
+        ('strategy_core.replay', None,
+         lambda d: functools.partial(strategy_core.replay, strategy_core.compute_indicators(d.frame.copy()))),
+    ]
+
+def _chart_cases():
+    sys.path.insert(0, CHART_SCRIPTS)
+    import get_price_chart as chart
+    warnings.filterwarnings('ignore', message='This figure includes Axes')  # tight_layout on the volume panel
+
+    def render(rows, use_gradient):
+        def run():
+            path = chart._build_chart('BENCH', rows, 'usd', 'bench', use_gradient)
+            if path and os.path.exists(path):
+                os.remove(path)
+        return run
+
+    def candles(d):
+        points = d.price_points()
+        hours = d.count * BAR_MS // 3_600_000
+        return lambda: chart._build_candles_from_prices(list(points), hours, 60)
+
+    return [
+        ('get_price_chart._find_fractals', 10_000, lambda d: lambda: chart._find_fractals(d.rows)),
+        ('get_price_chart._build_candles_from_prices', None, candles),
+        ('get_price_chart._build_chart', 10_000, lambda d: render(d.rows, False)),
+        ('get_price_chart._build_chart.gradient', 10_000, lambda d: render(d.rows, True)),
+    ]
+
+CASE_GROUPS = (_indicator_cases, _pandas_indicator_cases, _strategy_cases, _backtest_cases, _chart_cases)
+
+def load_cases(name_filter=None):
+    cases = []
+    for group in CASE_GROUPS:
+        try:
+            cases += group()
+        except ImportError as e:
+            print(f"skip {group.__name__.strip('_')}: {e}")
+    return [c for c in cases if not name_filter or name_filter in c[0]]
+
+# --- Runner ---
+def time_case(fn, runs=RUNS, budget=CASE_BUDGET_SEC):
+    """Wall seconds per call after one warm-up (a warm-up over budget/runs counts as a run).
+
+    Sub-millisecond cases repeat until they have run for MIN_CASE_SEC, so their
+    median is not just timer noise; slow ones stop early once over budget.
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    timings = [first] if first > budget / runs else []
+    spent = first
+    while len(timings) < MAX_RUNS and (not timings or spent < budget) and (len(timings) < runs or spent < MIN_CASE_SEC):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+    return timings
+
+def run_suite(sizes, cases, runs=RUNS):
+    """Yield ('name[bars]', {'median': s, 'min': s, 'runs': n}) as each case finishes"""
+    workdir = tempfile.mkdtemp(prefix='openclaw_bench_')
+    try:
+        for count in sizes:
+            data = Data(count, workdir)
+            for name, max_bars, make in cases:
+                if max_bars is not None and count > max_bars:
+                    continue
+                timings = time_case(make(data), runs)
+                yield f"{name}[{count}]", {'median': statistics.median(timings), 'min': min(timings), 'runs': len(timings)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# --- Baseline ---
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_baseline(results, path=BASELINE_FILE):
+    """Store the medians; cases not run this time (-k, --quick) keep their previous baseline"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    previous = load_baseline(path) or {}
+    merged = previous.get('results', {}) if previous.get('host') == platform.node() else {}
+    merged.update({key: round(r['median'], 6) for key, r in results.items()})
+    payload = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'results': merged,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return path
+
+def append_history(results, path=HISTORY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps({
+            'ts': datetime.now().isoformat(timespec='seconds'), 'host': platform.node(),
+            'python': platform.python_version(),
+            'results': {key: round(r['median'], 6) for key, r in results.items()},
+        }) + '\n')
+
+def _fmt_ms(seconds):
+    return f"{seconds * 1000:.2f}" if seconds < 10 else f"{seconds * 1000:.0f}"
+
+def main():
+    args = sys.argv[1:]
+    sizes = QUICK_SIZES if '--quick' in args else SIZES
+    name_filter = args[args.index('-k') + 1] if '-k' in args else None
+    runs = int(args[args.index('--runs') + 1]) if '--runs' in args else RUNS
+
+    baseline = load_baseline()
+    reference = (baseline or {}).get('results', {})
+    if baseline and baseline.get('host') != platform.node():
+        print(f"Baseline was recorded on {baseline.get('host')}; ratios are not comparable across machines")
+
+    cases = load_cases(name_filter)
+    print(f"{'case':<52} {'median ms':>11} {'min ms':>11} {'runs':>5} {'base ms':>11} {'ratio':>7}")
+    results, regressions = {}, []
+    for key, r in run_suite(sizes, cases, runs):
+        results[key] = r
+        base = reference.get(key)
+        ratio = r['median'] / base if base else None
+        flag = ''
+        if ratio is not None and ratio > REGRESSION_RATIO:
+            flag = '  SLOWER'
+            regressions.append(key)
+        elif ratio is not None and ratio < 1 / REGRESSION_RATIO:
+            flag = '  faster'
+        print(f"{key:<52} {_fmt_ms(r['median']):>11} {_fmt_ms(r['min']):>11} {r['runs']:>5} "
+              f"{_fmt_ms(base) if base else '-':>11} {f'{ratio:.2f}' if ratio else '-':>7}{flag}", flush=True)
+
+    append_history(results)
+    if '--save-baseline' in args:
+        print(f"Baseline saved: {save_baseline(results)}")
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {REGRESSION_RATIO:.2f}x the baseline: {', '.join(regressions)}")
+        if '--check' in args:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,13 @@
-import ccxt
 import pandas as pd
 import pandas_ta as ta
 import time
 
+from data_sources import fetch_ohlcv
+
 def fetch_data(symbol='BTC/USDT', timeframe='1h', limit=500):
     try:
-        # Use Binance (no API key needed for public data)
-        exchange = ccxt.binance()
-        bars = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        # Binance public data through the shared data layer (no API key needed)
+        bars = fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
         df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         return df
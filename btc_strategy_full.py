@@ -1,6 +1,6 @@
 # --- News and Sentiment Analysis Functions ---
 def get_crypto_news():
-    """Fetch recent Bitcoin/crypto news using web search"""
+    """Fetch recent Bitcoin/crypto news using web search; returns (articles, search status)"""
     try:
         # Import web search wrapper
         sys.path.append('/home/ironman/.openclaw/workspace')
@@ -13,9 +13,8 @@ def get_crypto_news():
             freshness="pd"
         )
         
-        # Store sentiment data status for reporting
-        global sentiment_data_status
-        sentiment_data_status = search_result.get('status', 'unknown')
+        # Sentiment data status for reporting, cached with the news pass
+        status = search_result.get('status', 'unknown')
         
         if search_result and search_result.get('results'):
             news_articles = []
@@ -31,18 +30,15 @@ def get_crypto_news():
                         })
                 except:
                     continue
-            return news_articles
+            return news_articles, status
         else:
-            return []
+            return [], status
     except Exception as e:
         print(f'Error fetching news: {e}')
-        return []
+        return [], 'error'
 
 #!/usr/bin/env python3
-# Global variable for sentiment data status
-sentiment_data_status = 'unknown'
 
-import ccxt
 import pandas as pd
 import numpy as np
 import sys
@@ -55,9 +51,18 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
+from signal_journal import append_record, make_record
+from signal_bus import publish
+import state_store
+from data_sources import fetch_ohlcv
+from strategy_core import step
+from sentiment_pipeline import get_shared_sentiment, score_adjustment
+import timing
+from timing import span, timed
 
 CSV_FILE = '/home/ironman/.openclaw/workspace/btc_strategy_history.csv'
 STATE_FILE = '/home/ironman/.openclaw/workspace/btc_strategy_state.json'
+JOURNAL_FILE = '/home/ironman/.openclaw/workspace/btc_signal_journal.bin'
 
 # --- News and Sentiment Analysis Functions ---
 
@@ -124,21 +129,8 @@ def integrate_sentiment_analysis(technical_result, sentiment_data):
     original_score = technical_result['score']
     reasons = technical_result['reasons']
     
-    # Adjust score based on sentiment
-    sentiment_adjustment = 0
-    if sentiment == 'BULLISH':
-        if strength == 'STRONG':
-            sentiment_adjustment = 1
-        elif strength == 'MODERATE':
-            sentiment_adjustment = 0.5
-    elif sentiment == 'BEARISH':
-        if strength == 'STRONG':
-            sentiment_adjustment = -1
-        elif strength == 'MODERATE':
-            sentiment_adjustment = -0.5
-    
-    # Apply sentiment adjustment
-    new_score = original_score + sentiment_adjustment
+    # Adjust score based on sentiment (same points every asset script applies)
+    new_score = original_score + score_adjustment(sentiment_data)
     
     # Add sentiment to reasons
     if sentiment != 'NEUTRAL':
@@ -212,6 +204,7 @@ def calculate_atr(df, period=14):
     return atr
 
 # --- Strategy Logic ---
+@timed()
 def analyze_strategy(df):
     df['RSI'] = calculate_rsi(df['close'])
     df['EMA_50'] = calculate_ema(df['close'], 50)
@@ -316,43 +309,18 @@ def analyze_strategy(df):
 
 # --- State Management (JSON) ---
 def load_state():
-    import json
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, 'r') as f:
-            return json.load(f)
-    return {
-        "signal": "NEUTRAL",
-        "entry_price": 0.0,
-        "entry_atr": 0.0,
-        "pending_signal": None
-    }
+    return state_store.load_state(STATE_FILE)
 
-def save_state(state):
-    import json
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
-
-# --- Stop Loss Check ---
-def check_stop_loss(current_price, state):
-    if state["signal"] not in ["LONG", "SHORT"] or state["entry_price"] == 0:
-        return False, "", 0.0
-    
-    atr_multiplier = 2.0
-    entry_price = state["entry_price"]
-    entry_atr = state["entry_atr"]
-    
-    if state["signal"] == "LONG":
-        stop_price = entry_price - (atr_multiplier * entry_atr)
-        if current_price <= stop_price:
-            return True, f"STOP LOSS (Long): {current_price:.2f} <= {stop_price:.2f}", stop_price
-    elif state["signal"] == "SHORT":
-        stop_price = entry_price + (atr_multiplier * entry_atr)
-        if current_price >= stop_price:
-            return True, f"STOP LOSS (Short): {current_price:.2f} >= {stop_price:.2f}", stop_price
-            
-    return False, "", 0.0
+def save_state(state, reason=""):
+    state_store.save_state(STATE_FILE, state, reason)
 
 # --- CSV Management ---
+def _csv_num(value):
+    if value is None or value == "":
+        return ""
+    return value if isinstance(value, str) else f"{value:.2f}"
+
+@timed()
 def log_to_csv(date, price, signal, action, entry_price, exit_price, profit, reasons, indicators):
     file_exists = os.path.isfile(CSV_FILE)
     
@@ -366,23 +334,23 @@ def log_to_csv(date, price, signal, action, entry_price, exit_price, profit, rea
             writer.writeheader()
         
         # Calculate stop loss level for display
-        stop_level = ""
+        stop_level = None
         if action.startswith("ENTER"):
             atr_mult = 2.0
             if "LONG" in action:
-                stop_level = f"{price - (atr_mult * indicators['ATR']):.2f}"
+                stop_level = price - (atr_mult * indicators['ATR'])
             elif "SHORT" in action:
-                stop_level = f"{price + (atr_mult * indicators['ATR']):.2f}"
+                stop_level = price + (atr_mult * indicators['ATR'])
             
         writer.writerow({
             'Date': date,
             'BTC Price': f"{price:.2f}",
             'Signal': signal,
             'Action': action,
-            'Entry Price': entry_price,
-            'Exit Price': exit_price,
-            'Profit (USDT)': profit,
-            'Stop Loss Level': stop_level,
+            'Entry Price': _csv_num(entry_price),
+            'Exit Price': _csv_num(exit_price),
+            'Profit (USDT)': _csv_num(profit),
+            'Stop Loss Level': _csv_num(stop_level),
             'Reasons': "; ".join(reasons),
             'RSI': f"{indicators['RSI']:.2f}",
             'MACD': f"{indicators['MACD']:.2f}",
@@ -391,6 +359,12 @@ def log_to_csv(date, price, signal, action, entry_price, exit_price, profit, rea
             'BB_Upper': f"{indicators['BB_Upper']:.2f}"
         })
 
+    # Full-precision typed record; the CSV above is the human-readable view
+    append_record(JOURNAL_FILE, make_record(
+        price, signal, action, entry_price, exit_price, profit, stop_level, reasons, indicators
+    ))
+
+@timed()
 def generate_price_chart(df, symbol="BTC/USDT"):
     """Generate and save a candlestick chart"""
     try:
@@ -494,6 +468,7 @@ subprocess.run([
         print(f"Error sending report: {e}")
         return False
 
+@timed()
 def send_report_via_telegram(report_text, chart_path=None):
     """Send report via OpenClaw CLI message tool"""
     try:
@@ -522,12 +497,12 @@ def send_report_via_telegram(report_text, chart_path=None):
         print(f"Error sending report: {e}")
         return False
 
-def main():
+def run_strategy():
     try:
-        exchange = ccxt.binance()
-        bars = exchange.fetch_ohlcv('BTC/USDT', timeframe='4h', limit=500)
-        df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        with span('fetch'):
+            bars = fetch_ohlcv('BTC/USDT', '4h', limit=500)
+            df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         
         # Get technical analysis result
         result = analyze_strategy(df)
@@ -537,20 +512,15 @@ def main():
             print(f"Status: {result['reasons'][0]}")
             return
         
-        # Get sentiment analysis
+        # Get sentiment analysis (shared, time-decayed news pass across assets)
         print("🔍 Fetching market sentiment analysis...")
-        news_articles = get_crypto_news()
+        with span('sentiment'):
+            sentiment_data = get_shared_sentiment('BTC', timed('news_fetch')(get_crypto_news))
         
-        if news_articles:
-            print(f"📰 Found {len(news_articles)} news articles for analysis")
-            sentiment_data = analyze_sentiment_with_oracle(news_articles, result['price'])
-            
-            if sentiment_data:
-                print("🧠 Oracle sentiment analysis completed")
-                # Integrate sentiment with technical analysis
-                result = integrate_sentiment_analysis(result, sentiment_data)
-            else:
-                print("⚠️ Sentiment analysis failed, using technical analysis only")
+        if sentiment_data:
+            print(f"📰 Sentiment from {sentiment_data['articles_count']} cached news articles (score {sentiment_data['score']:+.2f})")
+            # Integrate sentiment with technical analysis
+            result = integrate_sentiment_analysis(result, sentiment_data)
         else:
             print("⚠️ No news articles found, using technical analysis only")
         
@@ -558,114 +528,38 @@ def main():
         current_price = result['price']
         current_signal = result['signal']
         
-        # Check stop loss first
-        stop_hit, stop_msg, stop_price = check_stop_loss(current_price, state)
-        
-        action = "HOLD"
+        # Same state machine the backtest replay runs (stop -> confirm pending -> signal change)
+        with span('check_stop_loss'):
+            state, action, events, changed = step(state, current_signal, current_price, result['indicators']['ATR'])
         profit_usdt = ""
-        changed = False
         
-        if stop_hit:
-            # Stop loss triggered - force exit
-            old_signal = state["signal"]
-            profit_pct = 0.0
-            
-            if old_signal == "LONG":
-                profit_pct = (current_price - state["entry_price"]) / state["entry_price"]
-            elif old_signal == "SHORT":
-                profit_pct = (state["entry_price"] - current_price) / state["entry_price"]
-            
-            profit_usdt = f"{100 * profit_pct:.2f}"
-            action = f"EXIT_{old_signal} (STOP)"
-            result['reasons'].append(stop_msg)
-            
+        for event in events:
+            if event['reason']:
+                result['reasons'].append(event['reason'])
+            profit = None
+            if event['profit_pct'] is not None:
+                profit = 100 * event['profit_pct']
+                profit_usdt = f"{profit:.2f}"
             log_to_csv(
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 current_price,
-                "NEUTRAL",
-                action,
-                f"{state['entry_price']:.2f}",
-                f"{current_price:.2f}",
-                profit_usdt,
+                event['signal'],
+                event['action'],
+                event['entry_price'],
+                event['exit_price'],
+                profit,
                 result['reasons'],
                 result['indicators']
             )
-            
-            state = {"signal": "NEUTRAL", "entry_price": 0.0, "entry_atr": 0.0, "pending_signal": None}
-            save_state(state)
-            changed = True
-            
-        elif state.get("pending_signal"):
-            # Confirm pending entry
-            pending = state["pending_signal"]
-            state = {
-                "signal": pending,
-                "entry_price": current_price,
-                "entry_atr": result['indicators']['ATR'],
-                "pending_signal": None
-            }
-            save_state(state)
-            
-            action = f"ENTER_{pending}"
-            log_to_csv(
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                current_price,
-                pending,
-                action,
-                f"{current_price:.2f}",
-                "",
-                "",
-                result['reasons'],
-                result['indicators']
-            )
-            changed = True
-            
-        elif current_signal != state["signal"]:
-            # Signal changed
-            old_signal = state["signal"]
-            
-            # Exit old position if exists
-            if old_signal in ["LONG", "SHORT"]:
-                profit_pct = 0.0
-                if old_signal == "LONG":
-                    profit_pct = (current_price - state["entry_price"]) / state["entry_price"]
-                elif old_signal == "SHORT":
-                    profit_pct = (state["entry_price"] - current_price) / state["entry_price"]
-                
-                profit_usdt = f"{100 * profit_pct:.2f}"
-                action = f"EXIT_{old_signal}"
-                
-                log_to_csv(
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    current_price,
-                    current_signal,
-                    action,
-                    f"{state['entry_price']:.2f}",
-                    f"{current_price:.2f}",
-                    profit_usdt,
-                    result['reasons'],
-                    result['indicators']
-                )
-            
-            # Set new signal as pending
-            if current_signal in ["LONG", "SHORT"]:
-                state = {
-                    "signal": "NEUTRAL",
-                    "entry_price": 0.0,
-                    "entry_atr": 0.0,
-                    "pending_signal": current_signal
-                }
-                action = f"SIGNAL_{current_signal} (PENDING)"
-            else:
-                state = {
-                    "signal": "NEUTRAL",
-                    "entry_price": 0.0,
-                    "entry_atr": 0.0,
-                    "pending_signal": None
-                }
-            
-            save_state(state)
-            changed = True
+        
+        if changed:
+            save_state(state, action)
+        
+        # Share the latest result with market_director
+        try:
+            publish('BTC', result)
+        except Exception as e:
+            print(f"Signal bus publish failed: {e}")
         
         # Generate enhanced technical analysis insights
         def generate_analysis_insights(result, df):
@@ -746,7 +640,8 @@ def main():
         if result.get('sentiment_data'):
             sentiment = result['sentiment_data']
             print(f"\n📈 Market Sentiment Analysis:")
-            print(f"  Status: {sentiment_data_status.upper()} ({'Online data' if sentiment_data_status == 'online' else 'Mock data - not influencing results'})")
+            status = sentiment.get('status', 'unknown')
+            print(f"  Status: {status.upper()} ({'Online data' if status == 'online' else 'Mock data - not influencing results'})")
             print(f"  Overall: {sentiment.get('sentiment', 'NEUTRAL')} ({sentiment.get('strength', 'MODERATE')})")
             print(f"  Impact: {sentiment.get('impact', 'MEDIUM')}")
             if sentiment.get('factors'):
@@ -779,7 +674,7 @@ def main():
                 current_price,
                 current_signal,
                 "REPORT",
-                f"{state['entry_price']:.2f}" if state['entry_price'] > 0 else "",
+                state['entry_price'] if state['entry_price'] > 0 else "",
                 "",
                 "",
                 result['reasons'],
@@ -814,10 +709,11 @@ Score: {result['score']}/5
     # Add sentiment analysis to report
             if result.get('sentiment_data'):
                 sentiment = result['sentiment_data']
+                status = sentiment.get('status', 'unknown')
                 report_text += f"""
 
 📈 Market Sentiment Analysis:
-  Status: {sentiment_data_status.upper()} ({'Online data' if sentiment_data_status == 'online' else 'Mock data - not influencing results'})
+  Status: {status.upper()} ({'Online data' if status == 'online' else 'Mock data - not influencing results'})
   Overall: {sentiment.get('sentiment', 'NEUTRAL')} ({sentiment.get('strength', 'MODERATE')})
   Impact: {sentiment.get('impact', 'MEDIUM')}
   Key factors: {', '.join(sentiment.get('factors', [])[:3])}
@@ -844,5 +740,14 @@ EMA 200: ${result['indicators']['EMA_200']:.2f}"""
         traceback.print_exc()
         sys.exit(1)
 
+def main():
+    # One run at a time: overlapping cron/manual/retry runs would race on the position state
+    try:
+        with state_store.strategy_lock(STATE_FILE), timing.run('btc'):
+            run_strategy()
+            state_store.compact_journal(STATE_FILE)
+    except state_store.StateLocked as e:
+        print(f"Skipping run: {e}")
+
 if __name__ == "__main__":
     main()
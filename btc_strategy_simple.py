@@ -1,5 +1,6 @@
-import ccxt
 import pandas as pd
+
+from data_sources import fetch_ohlcv
 # Manual indicators since pandas_ta failed to install
 def calculate_rsi(series, period=14):
     delta = series.diff()
@@ -84,8 +85,7 @@ def analyze_strategy(df):
 
 def main():
     print("Fetching BTC/USDT data from Binance...")
-    exchange = ccxt.binance()
-    bars = exchange.fetch_ohlcv('BTC/USDT', timeframe='1h', limit=500)
+    bars = fetch_ohlcv('BTC/USDT', timeframe='1h', limit=500)
     df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     
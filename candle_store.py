@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Memory-mapped candle store shared by backtest worker processes.
+
+A series is saved as one fixed-dtype .npy file per column (timestamp as
+datetime64[ns], prices and volume as float64). Workers open it with
+np.load(mmap_mode='r') and wrap the maps in a DataFrame without copying, so
+every process reads the same page-cache pages: nothing is pickled to the
+workers, memory stays flat as the worker count grows and opening a store is
+instant.
+
+Each build goes into a new version directory and the `current` symlink is
+swapped atomically, so readers that already mapped the previous version keep
+a consistent set of columns while a refresh is written.
+
+Layout: STORE_DIR/<BASE>_<QUOTE>_<timeframe>/current -> v<rows>_<last_ms>/<column>.npy
+"""
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = '/home/ironman/.openclaw/workspace/candles'
+COLUMNS = {
+    'timestamp': 'datetime64[ns]',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+}
+
+def store_dir(symbol, timeframe, root=STORE_DIR):
+    return os.path.join(root, f"{symbol.replace('/', '_')}_{timeframe}")
+
+# --- Write ---
+def write_store(df, symbol, timeframe, root=STORE_DIR):
+    """Persist an OHLCV DataFrame as per-column .npy files; returns the series directory"""
+    series = store_dir(symbol, timeframe, root)
+    os.makedirs(series, exist_ok=True)
+    last_ms = int(df['timestamp'].iloc[-1].value // 1_000_000) if len(df) else 0
+    version = f"v{len(df)}_{last_ms}"
+    version_path = os.path.join(series, version)
+    if not os.path.isdir(version_path):
+        tmp_path = f"{version_path}.tmp{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        for column, dtype in COLUMNS.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), df[column].to_numpy(dtype=dtype))
+        try:
+            os.rename(tmp_path, version_path)
+        except OSError:  # Another process wrote the same version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    link = os.path.join(series, 'current')
+    previous = os.path.realpath(link) if os.path.islink(link) else None
+    tmp_link = f"{link}.tmp{os.getpid()}"
+    os.symlink(version, tmp_link)
+    os.replace(tmp_link, link)
+    if previous and os.path.basename(previous) != version:
+        shutil.rmtree(previous, ignore_errors=True)  # Open maps keep their pages until unmapped
+    return series
+
+def build_store(symbol, timeframe, since, until=None, root=STORE_DIR):
+    """Download (or resume) deep history with history_loader and store it"""
+    from history_loader import load_history
+    return write_store(load_history(symbol, timeframe, since, until), symbol, timeframe, root)
+
+# --- Read ---
+def open_store(series):
+    """{column: read-only memmap} for the current version of a series directory.
+
+    `current` is resolved once so every column comes from the same version; if
+    a rebuild removes that version before all columns are mapped, resolve again.
+    """
+    for attempt in range(3):
+        version_path = os.path.realpath(os.path.join(series, 'current'))
+        try:
+            return {column: np.load(os.path.join(version_path, f"{column}.npy"), mmap_mode='r') for column in COLUMNS}
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+
+def load_frame(series):
+    """DataFrame whose OHLCV columns are the memmaps themselves (no copy)"""
+    return pd.DataFrame(open_store(series), copy=False)
+
+# --- Worker Pool ---
+def map_series(fn, series, jobs, workers=None):
+    """[fn(df, job) for job in jobs] across processes; each worker maps `series` once"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(series,)) as pool:
+        return list(pool.map(_run_job, [fn] * len(jobs), jobs))
+
+_worker_frame = None
+
+def _init_worker(series):
+    global _worker_frame
+    _worker_frame = load_frame(series)
+
+def _run_job(fn, job):
+    # Indicator columns the job adds stay private to its own copy of the frame
+    return fn(_worker_frame.copy(deep=False), job)
+
+if __name__ == "__main__":
+    # Usage: candle_store.py <SYMBOL> <timeframe> <since>   e.g. BTC/USDT 1h 2020-01-01
+    if len(sys.argv) < 4:
+        print("Usage: candle_store.py <SYMBOL> <timeframe> <since>")
+        sys.exit(1)
+    series = build_store(sys.argv[1], sys.argv[2], sys.argv[3])
+    df = load_frame(series)
+    print(f"{series}: {len(df)} bars, {sum(a.nbytes for a in open_store(series).values()) / 1e6:.1f} MB mapped")
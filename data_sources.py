@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""One async market-data layer for Binance (ccxt), CoinGecko and Hyperliquid.
+
+Every request from the strategy scripts, the engine, the stop watcher, the
+history loader and the crypto-price skill goes through a DataHub:
+
+  - one adapter per source (SOURCES), each with an offline stand-in that
+    answers from a deterministic synthetic market (OPENCLAW_DATA_OFFLINE=1 or
+    DataHub(offline=True)), so every script runs without network,
+  - one pooled aiohttp session shared by the HTTP adapters and handed to the
+    ccxt async client, so connections are reused across sources and calls,
+  - a TTL response cache, in memory and in small files that other processes
+    on the host can read,
+  - the same backoff everywhere: 429/5xx, timeouts and dropped connections
+    are retried with capped exponential delay plus jitter, honouring
+    Retry-After,
+  - a latency histogram per source, merged into METRICS_FILE
+    (`python3 data_sources.py` prints them).
+
+Binance request weight is still accounted in fetch_scheduler (the ccxt
+adapter wraps FetchScheduler); Hyperliquid weight is paced by a token bucket
+in the adapter. Synchronous scripts use the blocking wrappers at the bottom,
+which run on one background event loop so the pool stays warm for the life
+of the process.
+"""
+import asyncio
+import atexit
+import bisect
+import fcntl
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else '/home/ironman/.openclaw/workspace'
+CACHE_DIR = os.path.join(SHM_DIR, 'openclaw_data_cache')
+METRICS_FILE = os.path.join(SHM_DIR, 'openclaw_data_metrics.json')
+METRICS_FLUSH_SEC = 60
+OFFLINE = os.environ.get('OPENCLAW_DATA_OFFLINE') == '1'
+COINGECKO_URL = os.environ.get('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+HYPERLIQUID_INFO_URL = os.environ.get('HYPERLIQUID_INFO_URL', 'https://api.hyperliquid.xyz/info')  # e.g. hl_feed.py mock
+USER_AGENT = 'openclaw-data/1.0'
+POOL_SIZE = 32               # Open connections across all hosts
+POOL_PER_HOST = 8
+REQUEST_TIMEOUT_SEC = 15
+MAX_RETRIES = 3
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_CAP_SEC = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504, 524}
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HL_WEIGHT_PER_MINUTE = 1200  # Hyperliquid REST limit per IP
+HL_BUDGET_SHARE = 0.8
+MAX_CONCURRENT = 8
+
+class SourceError(RuntimeError):
+    """A request that failed for good: not retryable, or still failing after MAX_RETRIES"""
+    def __init__(self, source, message, status=None):
+        super().__init__(f"{source}: {message}")
+        self.source = source
+        self.status = status
+
+class _Retry(Exception):
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds before retry number `attempt` (0-based): Retry-After when the server sent one, else jittered exponential"""
+    if retry_after is not None:
+        return min(BACKOFF_CAP_SEC, retry_after)
+    ceiling = min(BACKOFF_CAP_SEC, BACKOFF_BASE_SEC * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+def _retry_after(headers):
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def _timeframe_ms(timeframe):
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    return int(timeframe[:-1]) * units[timeframe[-1]] * 1000
+
+def candle_weight(bars):
+    """Hyperliquid candleSnapshot costs 20 plus 1 per 60 candles returned"""
+    return 20 + bars // 60
+
+# --- Latency Histograms ---
+class LatencyHistogram:
+    """Request latencies in fixed millisecond buckets (the last bucket is everything slower)"""
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total_ms = 0.0
+        self.errors = 0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, ms, error=False):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.total_ms += ms
+        self.errors += bool(error)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf when it is past the last bucket)"""
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            running += n
+            if n and running >= target:
+                return bound
+        return math.nan
+
+    def merge(self, other):
+        if other.buckets != self.buckets:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total_ms += other.total_ms
+        self.errors += other.errors
+
+    def to_dict(self):
+        return {'buckets_ms': list(self.buckets), 'counts': self.counts, 'total_ms': self.total_ms, 'errors': self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data['buckets_ms'])
+        histogram.counts = list(data['counts'])
+        histogram.total_ms = data['total_ms']
+        histogram.errors = data['errors']
+        return histogram
+
+def flush_metrics(latency, path=METRICS_FILE):
+    """Add this process's histograms to the host-wide file, then reset them"""
+    if not any(h.count for h in latency.values()):
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        with os.fdopen(os.dup(fd), 'r+') as f:
+            try:
+                stored = json.load(f)
+            except ValueError:
+                stored = {}
+            for source, histogram in latency.items():
+                total = LatencyHistogram.from_dict(stored[source]) if source in stored else LatencyHistogram(histogram.buckets)
+                total.merge(histogram)
+                stored[source] = total.to_dict()
+            f.seek(0)
+            f.truncate()
+            json.dump(stored, f)
+    finally:
+        os.close(fd)
+    latency.clear()
+
+def read_metrics(path=METRICS_FILE):
+    try:
+        with open(path, 'r') as f:
+            return {source: LatencyHistogram.from_dict(data) for source, data in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+# --- Shared Cache ---
+class ResponseCache:
+    """TTL cache for decoded responses: memory first, then one JSON file per key that other processes also read"""
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.memory = {}
+
+    @staticmethod
+    def key(source, request):
+        return hashlib.sha1(json.dumps([source, request], sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key, ttl):
+        now = time.time()
+        hit = self.memory.get(key)
+        if hit is not None and now - hit[0] <= ttl:
+            return hit[1]
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            stored_at = os.path.getmtime(path)
+            if now - stored_at > ttl:
+                return None
+            with open(path, 'r') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.memory[key] = (stored_at, value)
+        return value
+
+    def put(self, key, value):
+        self.memory[key] = (time.time(), value)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.json"))
+        except (OSError, TypeError, ValueError):
+            pass  # The memory copy still serves this process
+
+# --- Hub ---
+class DataHub:
+    """Connection pool, cache, retry policy and metrics shared by every source adapter"""
+    def __init__(self, offline=OFFLINE, cache=None):
+        self.offline = offline
+        self.cache = cache or ResponseCache()
+        self.latency = {}
+        self.session = None
+        self.sources = {}
+        self.flushed_at = time.time()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self.offline or self.session is not None:
+            return
+        import aiohttp
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_PER_HOST, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SEC),
+            headers={'User-Agent': USER_AGENT},
+        )
+
+    async def close(self):
+        for source in self.sources.values():
+            await source.close()
+        self.sources.clear()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.flush()
+
+    def flush(self):
+        """Offline hubs keep their histograms in memory; only real traffic reaches METRICS_FILE"""
+        self.flushed_at = time.time()
+        if not self.offline:
+            flush_metrics(self.latency)
+
+    def source(self, name):
+        """Adapter for `name` ('binance' or any ccxt id, 'coingecko', 'hyperliquid'), created on first use"""
+        if name not in self.sources:
+            online, offline = SOURCES.get(name, SOURCES['ccxt'])
+            self.sources[name] = (offline if self.offline else online)(self, name)
+        return self.sources[name]
+
+    @property
+    def binance(self):
+        return self.source('binance')
+
+    @property
+    def coingecko(self):
+        return self.source('coingecko')
+
+    @property
+    def hyperliquid(self):
+        return self.source('hyperliquid')
+
+    async def cached(self, source, request, ttl, fetch):
+        """await fetch(), served from the shared cache when an answer younger than ttl exists"""
+        if not ttl:
+            return await fetch()
+        key = ResponseCache.key(source, request)
+        value = self.cache.get(key, ttl)
+        if value is None:
+            value = await fetch()
+            self.cache.put(key, value)
+        return value
+
+    async def attempt(self, source, call):
+        """await call() under the uniform retry policy; every attempt is timed into the source's histogram"""
+        histogram = self.latency.setdefault(source, LatencyHistogram())
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                result = await call()
+            except _Retry as e:
+                histogram.observe((time.perf_counter() - start) * 1000, error=True)
+                if attempt == MAX_RETRIES:
+                    raise SourceError(source, str(e), e.status) from e
+                await asyncio.sleep(backoff_delay(attempt, e.retry_after))
+                continue
+            except Exception:
+                histogram.observe((time.perf_counter() - start) * 1000, error=True)
+                raise
+            histogram.observe((time.perf_counter() - start) * 1000)
+            if time.time() - self.flushed_at > METRICS_FLUSH_SEC:
+                self.flush()
+            return result
+
+    async def http_json(self, source, method, url, params=None, body=None, timeout=None):
+        """Decoded JSON from one pooled HTTP request, retried like every other source"""
+        import aiohttp
+        if self.session is None:
+            raise SourceError(source, f"offline, no route for {url}")
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+
+        async def call():
+            try:
+                async with self.session.request(method, url, params=params, json=body, timeout=request_timeout) as resp:
+                    if resp.status in RETRY_STATUS:
+                        raise _Retry(f"HTTP {resp.status}", resp.status, _retry_after(resp.headers))
+                    if resp.status >= 400:
+                        raise SourceError(source, f"HTTP {resp.status} for {url}", resp.status)
+                    try:
+                        return await resp.json(content_type=None)
+                    except ValueError as e:
+                        raise SourceError(source, 'invalid JSON') from e
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                raise _Retry(str(e) or type(e).__name__) from e
+        return await self.attempt(source, call)
+
+    async def request_json(self, url, params=None, body=None, ttl=0, timeout=None):
+        """Route a raw URL to its adapter, so callers that hold full URLs still share policy, cache and metrics"""
+        parts = urllib.parse.urlsplit(url)
+        if url.startswith(COINGECKO_URL) or parts.netloc == 'api.coingecko.com':
+            query = dict(urllib.parse.parse_qsl(parts.query))
+            query.update(params or {})
+            return await self.coingecko.get(parts.path.split('/api/v3', 1)[-1], query, ttl, timeout)
+        if url == HYPERLIQUID_INFO_URL or parts.netloc == 'api.hyperliquid.xyz':
+            return await self.hyperliquid.info(body, ttl=ttl)
+        source = 'binance' if parts.netloc.endswith('binance.com') else parts.netloc
+        fetch = lambda: self.http_json(source, 'POST' if body is not None else 'GET', url, params, body, timeout)
+        return await self.cached(source, [url, params, body], ttl, fetch)
+
+# --- Source Adapters ---
+class DataSource:
+    """One market-data provider; requests go through hub.attempt / hub.http_json"""
+    def __init__(self, hub, name):
+        self.hub = hub
+        self.name = name
+
+    async def close(self):
+        pass
+
+class CcxtSource(DataSource):
+    """ccxt async exchange on the hub's connection pool, paid from fetch_scheduler's shared weight bucket"""
+    def __init__(self, hub, name):
+        super().__init__(hub, name)
+        self.scheduler = None
+        self.lock = asyncio.Lock()
+
+    async def _client(self):
+        async with self.lock:
+            if self.scheduler is None:
+                from fetch_scheduler import FetchScheduler
+                scheduler = FetchScheduler(self.name, session=self.hub.session)
+                try:
+                    await self._call(scheduler.__aenter__)  # load_markets
+                except Exception:
+                    if scheduler.exchange is not None:
+                        await scheduler.exchange.close()
+                    raise
+                self.scheduler = scheduler
+        return self.scheduler
+
+    async def _call(self, fn):
+        from ccxt.base.errors import DDoSProtection, NetworkError, RateLimitExceeded
+
+        async def call():
+            try:
+                return await fn()
+            except (DDoSProtection, RateLimitExceeded):
+                raise  # FetchScheduler.send already backed off in the shared bucket; no second, local retry
+            except NetworkError as e:  # Timeouts and dropped connections
+                raise _Retry(str(e)) from e
+        return await self.hub.attempt(self.name, call)
+
+    async def close(self):
+        if self.scheduler is not None:
+            await self.scheduler.__aexit__(None, None, None)
+            self.scheduler = None
+
+    async def ohlcv(self, symbol, timeframe='1h', since=None, limit=500, ttl=0):
+        scheduler = await self._client()
+        fetch = lambda: self._call(lambda: scheduler.fetch_ohlcv(symbol, timeframe, since, limit))
+        return await self.hub.cached(self.name, ['ohlcv', symbol, timeframe, since, limit], ttl, fetch)
+
+    async def ohlcv_range(self, symbol, timeframe, since, until=None):
+        scheduler = await self._client()
+        return await self._call(lambda: scheduler.fetch_range(symbol, timeframe, since, until))
+
+    async def many(self, symbols, timeframe='1h', limit=500, since=None, max_concurrent=MAX_CONCURRENT, ttl=0):
+        """{symbol: bars}; failures are reported and left out"""
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def one(symbol):
+            async with semaphore:
+                try:
+                    return symbol, await self.ohlcv(symbol, timeframe, since, limit, ttl)
+                except Exception as e:
+                    print(f"{symbol}: fetch failed ({e})")
+                    return symbol, []
+        results = await asyncio.gather(*[one(s) for s in symbols])
+        return {symbol: bars for symbol, bars in results if bars}
+
+    async def markets(self):
+        return (await self._client()).exchange.markets
+
+    async def tickers(self, symbols=None, ttl=0):
+        """{symbol: ccxt ticker}; 24h tickers cost 2 weight for up to 20 symbols, 40 up to 100, 80 for all"""
+        scheduler = await self._client()
+        count = len(symbols) if symbols else math.inf
+        weight = 2 if count <= 20 else 40 if count <= 100 else 80
+
+        fetch = lambda: self._call(lambda: scheduler.send(weight, lambda: scheduler.exchange.fetch_tickers(symbols)))
+        return await self.hub.cached(self.name, ['tickers', sorted(symbols or [])], ttl, fetch)
+
+class CoinGeckoSource(DataSource):
+    base_url = COINGECKO_URL
+
+    async def get(self, path, params=None, ttl=0, timeout=None):
+        params = {k: str(v) for k, v in (params or {}).items()}
+        fetch = lambda: self.hub.http_json(self.name, 'GET', self.base_url + path, params, timeout=timeout)
+        return await self.hub.cached(self.name, [path, params], ttl, fetch)
+
+    async def simple_price(self, ids, currency='usd', ttl=0):
+        return await self.get('/simple/price', {'ids': ','.join(ids), 'vs_currencies': currency}, ttl)
+
+    async def ohlc(self, coin_id, currency='usd', days=1, ttl=0):
+        return await self.get(f"/coins/{coin_id}/ohlc", {'vs_currency': currency, 'days': days}, ttl)
+
+    async def market_chart(self, coin_id, currency='usd', days=1, ttl=0):
+        return await self.get(f"/coins/{coin_id}/market_chart", {'vs_currency': currency, 'days': days}, ttl)
+
+    async def search(self, query, ttl=0):
+        return await self.get('/search', {'query': query}, ttl)
+
+class _Pacer:
+    """In-process token bucket: a request books its weight and sleeps off any deficit (as in fetch_scheduler)"""
+    def __init__(self, capacity=HL_WEIGHT_PER_MINUTE * HL_BUDGET_SHARE):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.tokens = capacity
+        self.last = time.monotonic()
+
+    async def pay(self, weight):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate) - weight
+        self.last = now
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+class HyperliquidSource(DataSource):
+    url = HYPERLIQUID_INFO_URL
+
+    def __init__(self, hub, name):
+        super().__init__(hub, name)
+        self.pacer = _Pacer()
+
+    async def info(self, body, weight=20, ttl=0):
+        async def fetch():
+            await self.pacer.pay(weight)
+            return await self.hub.http_json(self.name, 'POST', self.url, body=body)
+        return await self.hub.cached(self.name, body, ttl, fetch)
+
+    async def meta_and_ctxs(self, ttl=0):
+        """(universe, asset ctxs) from one metaAndAssetCtxs call"""
+        meta, ctxs = await self.info({'type': 'metaAndAssetCtxs'}, ttl=ttl)
+        return meta.get('universe', []), ctxs
+
+    async def candles(self, coin, interval, start_ms, end_ms, ttl=0):
+        """ccxt-style [t, o, h, l, c, v] perp bars in [start_ms, end_ms]"""
+        req = {'coin': coin, 'interval': interval, 'startTime': start_ms, 'endTime': end_ms}
+        weight = candle_weight((end_ms - start_ms) // _timeframe_ms(interval))
+        rows = await self.info({'type': 'candleSnapshot', 'req': req}, weight, ttl)
+        return [[int(r['t']), float(r['o']), float(r['h']), float(r['l']), float(r['c']), float(r.get('v', 0))] for r in rows]
+
+# --- Offline Stand-ins ---
+OFFLINE_ASSETS = ['BTC', 'ETH', 'SOL', 'XRP', 'BNB', 'DOGE', 'ADA', 'AVAX', 'LINK', 'HYPE']
+
+def synthetic_price(key, t_ms):
+    """Deterministic price of `key` at t_ms: smooth cycles around a per-key level, identical across calls and windows"""
+    seed = zlib.crc32(key.upper().encode())
+    level = 10 ** (seed % 4500 / 1000)
+    phase = seed % 628 / 100
+    t = t_ms / 3_600_000  # hours
+    return level * math.exp(0.08 * math.sin(t / 70 + phase) + 0.03 * math.sin(t / 5 + 2 * phase) + 0.01 * math.sin(t * 1.7 + phase))
+
+def synthetic_ohlcv(key, timeframe, start_ms, end_ms):
+    """[t, o, h, l, c, v] bars with open times in [start_ms, end_ms], aligned to the timeframe"""
+    step = _timeframe_ms(timeframe)
+    bars = []
+    for t in range(-(-start_ms // step) * step, end_ms + 1, step):
+        rng = random.Random(f"{key}:{t}")
+        open_price, close = synthetic_price(key, t), synthetic_price(key, t + step)
+        high = max(open_price, close) * (1 + rng.uniform(0, 0.003))
+        low = min(open_price, close) * (1 - rng.uniform(0, 0.003))
+        bars.append([t, open_price, high, low, close, rng.uniform(50, 150) * step / 60_000])
+    return bars
+
+class OfflineCcxtSource(CcxtSource):
+    """Synthetic exchange: every symbol quoted in USDT/USD trades on the deterministic synthetic market"""
+    async def ohlcv(self, symbol, timeframe='1h', since=None, limit=500, ttl=0):
+        async def call():
+            step = _timeframe_ms(timeframe)
+            now = int(time.time() * 1000)
+            start = since if since is not None else (now // step - limit + 1) * step
+            return synthetic_ohlcv(symbol.split('/')[0], timeframe, start, min(now, start + (limit - 1) * step))
+        return await self.hub.attempt(self.name, call)
+
+    async def ohlcv_range(self, symbol, timeframe, since, until=None):
+        until = until if until is not None else int(time.time() * 1000)
+        return synthetic_ohlcv(symbol.split('/')[0], timeframe, since, until - 1)
+
+    async def markets(self):
+        return {f"{asset}/USDT": {'symbol': f"{asset}/USDT", 'active': True} for asset in OFFLINE_ASSETS}
+
+    async def tickers(self, symbols=None, ttl=0):
+        now = int(time.time() * 1000)
+        symbols = symbols or list(await self.markets())
+        return {s: {'symbol': s, 'last': synthetic_price(s.split('/')[0], now), 'timestamp': now,
+                    'quoteVolume': float(zlib.crc32(s.encode()) % 10 ** 9)} for s in symbols}
+
+    async def close(self):
+        pass
+
+class OfflineCoinGeckoSource(CoinGeckoSource):
+    """Answers the CoinGecko endpoints the scripts use; coin ids double as synthetic price keys"""
+    async def get(self, path, params=None, ttl=0, timeout=None):
+        params = params or {}
+        return await self.hub.attempt(self.name, lambda: self._answer(path, params))
+
+    async def _answer(self, path, params):
+        now = int(time.time() * 1000)
+        days = float(params.get('days', 1))
+        parts = path.strip('/').split('/')
+        if path == '/simple/price':
+            currencies = params.get('vs_currencies', 'usd').split(',')
+            return {i: {c: synthetic_price(i, now) for c in currencies} for i in params.get('ids', '').split(',') if i}
+        if path == '/search':
+            query = params.get('query', '')
+            return {'coins': [{'id': query.lower(), 'symbol': query.upper(), 'name': query.title(), 'market_cap_rank': 1}]}
+        if path == '/news':
+            return {'data': [{'title': f"{a} rally extends as volume rises", 'url': '', 'description': f"{a} traders see a bullish gain",
+                              'published_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())} for a in OFFLINE_ASSETS[:5]]}
+        if parts[0] == 'coins' and len(parts) == 3 and parts[2] == 'ohlc':
+            timeframe = '30m' if days <= 2 else '4h' if days <= 30 else '4d'
+            bars = synthetic_ohlcv(parts[1], timeframe, now - int(days * 86_400_000), now)
+            return [bar[:5] for bar in bars]
+        if parts[0] == 'coins' and len(parts) == 3 and parts[2] == 'market_chart':
+            timeframe = '5m' if days <= 1 else '1h' if days <= 90 else '1d'
+            bars = synthetic_ohlcv(parts[1], timeframe, now - int(days * 86_400_000), now)
+            return {'prices': [[b[0], b[1]] for b in bars], 'total_volumes': [[b[0], b[5]] for b in bars],
+                    'market_caps': [[b[0], b[1] * 1e7] for b in bars]}
+        raise SourceError(self.name, f"no offline answer for {path}", 404)
+
+class OfflineHyperliquidSource(HyperliquidSource):
+    """Answers metaAndAssetCtxs, candleSnapshot and allMids from the synthetic market, unpaced"""
+    async def info(self, body, weight=20, ttl=0):
+        return await self.hub.attempt(self.name, lambda: self._answer(body or {}))
+
+    async def _answer(self, body):
+        now = int(time.time() * 1000)
+        if body.get('type') == 'metaAndAssetCtxs':
+            return [{'universe': [{'name': coin, 'szDecimals': 2} for coin in OFFLINE_ASSETS]},
+                    [{'markPx': str(synthetic_price(coin, now)), 'midPx': str(synthetic_price(coin, now)),
+                      'prevDayPx': str(synthetic_price(coin, now - 86_400_000)),
+                      'dayNtlVlm': str(float(zlib.crc32(coin.encode()) % 10 ** 9))} for coin in OFFLINE_ASSETS]]
+        if body.get('type') == 'allMids':
+            return {coin: str(synthetic_price(coin, now)) for coin in OFFLINE_ASSETS}
+        if body.get('type') == 'candleSnapshot':
+            req = body['req']
+            bars = synthetic_ohlcv(req['coin'], req['interval'], req['startTime'], min(req['endTime'], now))
+            return [{'t': t, 'T': t + _timeframe_ms(req['interval']) - 1, 's': req['coin'], 'i': req['interval'],
+                     'o': str(o), 'h': str(h), 'l': str(l), 'c': str(c), 'v': str(v), 'n': 1} for t, o, h, l, c, v in bars]
+        return []
+
+# Name -> (adapter, offline stand-in); any other name is treated as a ccxt exchange id
+SOURCES = {
+    'ccxt': (CcxtSource, OfflineCcxtSource),
+    'binance': (CcxtSource, OfflineCcxtSource),
+    'coingecko': (CoinGeckoSource, OfflineCoinGeckoSource),
+    'hyperliquid': (HyperliquidSource, OfflineHyperliquidSource),
+}
+
+def register_source(name, adapter, offline_adapter):
+    SOURCES[name] = (adapter, offline_adapter)
+
+# --- Blocking Access ---
+_LOCK = threading.Lock()
+_SHARED = None  # (pid, loop, hub)
+
+def shared_hub():
+    """(loop, hub) for this process: one hub on a daemon event-loop thread, started on first use"""
+    global _SHARED
+    with _LOCK:
+        if _SHARED is None or _SHARED[0] != os.getpid():  # Forked workers start their own
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='data-sources', daemon=True).start()
+            hub = DataHub()
+            asyncio.run_coroutine_threadsafe(hub.open(), loop).result()
+            if _SHARED is None:
+                atexit.register(_close_shared)
+            _SHARED = (os.getpid(), loop, hub)
+    return _SHARED[1], _SHARED[2]
+
+def _close_shared():
+    if _SHARED is not None and _SHARED[0] == os.getpid():
+        try:
+            asyncio.run_coroutine_threadsafe(_SHARED[2].close(), _SHARED[1]).result(timeout=10)
+        except Exception:
+            pass
+
+def call(fn):
+    """Run fn(hub) -> coroutine on the shared hub and block for its result (safe from any thread)"""
+    loop, hub = shared_hub()
+    return asyncio.run_coroutine_threadsafe(fn(hub), loop).result()
+
+def fetch_ohlcv(symbol, timeframe='1h', since=None, limit=500, exchange_id='binance', ttl=0):
+    return call(lambda hub: hub.source(exchange_id).ohlcv(symbol, timeframe, since, limit, ttl))
+
+def fetch_range(symbol, timeframe, since, until=None, exchange_id='binance'):
+    return call(lambda hub: hub.source(exchange_id).ohlcv_range(symbol, timeframe, since, until))
+
+def fetch_many(symbols, timeframe='1h', limit=500, exchange_id='binance', max_concurrent=MAX_CONCURRENT, since=None):
+    return call(lambda hub: hub.source(exchange_id).many(symbols, timeframe, limit, since, max_concurrent))
+
+def fetch_tickers(symbols=None, exchange_id='binance', ttl=0):
+    return call(lambda hub: hub.source(exchange_id).tickers(symbols, ttl))
+
+def fetch_json(url, params=None, ttl=0, timeout=None):
+    return call(lambda hub: hub.request_json(url, params, None, ttl, timeout))
+
+def post_json(url, body, ttl=0, timeout=None):
+    return call(lambda hub: hub.request_json(url, None, body, ttl, timeout))
+
+if __name__ == "__main__":
+    if OFFLINE:
+        print("OPENCLAW_DATA_OFFLINE=1: scripts answer from the synthetic market")
+    metrics = read_metrics()
+    if not metrics:
+        print(f"No requests recorded yet ({METRICS_FILE})")
+    for source, h in sorted(metrics.items()):
+        mean = h.total_ms / h.count if h.count else 0.0
+        print(f"{source:<24} {h.count:>7} req  {h.errors:>5} err  mean {mean:7.1f}ms  "
+              f"p50 <={h.quantile(0.5):g}ms  p95 <={h.quantile(0.95):g}ms  p99 <={h.quantile(0.99):g}ms")
@@ -1,9 +1,10 @@
-import ccxt
 import pandas as pd
 import numpy as np
 import sys
 import os
 
+from data_sources import fetch_ohlcv
+
 # --- Indicator Functions ---
 def calculate_rsi(series, period=14):
     delta = series.diff()
@@ -95,8 +96,7 @@ def get_signal_for_row(row, prev_row):
     return signal, score
 
 def run_backtest(timeframe, limit=500):
-    exchange = ccxt.binance()
-    bars = exchange.fetch_ohlcv('ETH/USDT', timeframe=timeframe, limit=limit)
+    bars = fetch_ohlcv('ETH/USDT', timeframe=timeframe, limit=limit)
     df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     
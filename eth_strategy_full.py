@@ -1,20 +1,28 @@
 #!/usr/bin/env python3
-import ccxt
 import pandas as pd
 import numpy as np
 import sys
 import os
 import csv
 from datetime import datetime
-import json
 import subprocess
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib
 matplotlib.use('Agg')
+from signal_journal import append_record, make_record
+from signal_bus import publish
+import state_store
+from data_sources import fetch_ohlcv
+from strategy_core import CONFLUENCE_BASE_BARS, apply_confluence, step
+from sentiment_pipeline import get_shared_sentiment, score_adjustment
+from timeout_resistant_btc import TimeoutResistantAnalyzer
+import timing
+from timing import span, timed
 
 CSV_FILE = '/home/ironman/.openclaw/workspace/eth_strategy_history.csv'
 STATE_FILE = '/home/ironman/.openclaw/workspace/eth_strategy_state.json'
+JOURNAL_FILE = '/home/ironman/.openclaw/workspace/eth_signal_journal.bin'
 
 # --- Indicator Functions ---
 def calculate_rsi(series, period=14):
@@ -64,6 +72,7 @@ def calculate_atr(df, period=14):
     atr = true_range.rolling(window=period).mean()
     return atr
 
+@timed()
 def generate_price_chart(df, symbol="ETH/USDT"):
     """Generate and save a candlestick chart"""
     try:
@@ -108,7 +117,9 @@ def generate_price_chart(df, symbol="ETH/USDT"):
         return None
 
 # --- Strategy Logic ---
-def analyze_strategy(df):
+@timed()
+def analyze_strategy(df, mode='single'):
+    """Score the last bar; mode='confluence' also scores 4h and 1d resampled from df"""
     df['RSI'] = calculate_rsi(df['close'])
     df['EMA_50'] = calculate_ema(df['close'], 50)
     df['EMA_200'] = calculate_ema(df['close'], 200)
@@ -192,7 +203,7 @@ def analyze_strategy(df):
     if stoch_cross_up: reasons.append("Stoch Cross UP")
     if stoch_cross_down: reasons.append("Stoch Cross DOWN")
 
-    return {
+    result = {
         "price": last['close'],
         "signal": signal,
         "confidence": confidence,
@@ -209,46 +220,24 @@ def analyze_strategy(df):
         },
         "valid": True
     }
+    if mode == 'confluence':
+        result = apply_confluence(result, df)
+    return result
 
 # --- State Management (JSON) ---
 def load_state():
-    import json
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, 'r') as f:
-            return json.load(f)
-    return {
-        "signal": "NEUTRAL",
-        "entry_price": 0.0,
-        "entry_atr": 0.0,
-        "pending_signal": None
-    }
-
-def save_state(state):
-    import json
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+    return state_store.load_state(STATE_FILE)
 
-# --- Stop Loss Check ---
-def check_stop_loss(current_price, state):
-    if state["signal"] not in ["LONG", "SHORT"] or state["entry_price"] == 0:
-        return False, "", 0.0
-    
-    atr_multiplier = 2.0
-    entry_price = state["entry_price"]
-    entry_atr = state["entry_atr"]
-    
-    if state["signal"] == "LONG":
-        stop_price = entry_price - (atr_multiplier * entry_atr)
-        if current_price <= stop_price:
-            return True, f"STOP LOSS (Long): {current_price:.2f} <= {stop_price:.2f}", stop_price
-    elif state["signal"] == "SHORT":
-        stop_price = entry_price + (atr_multiplier * entry_atr)
-        if current_price >= stop_price:
-            return True, f"STOP LOSS (Short): {current_price:.2f} >= {stop_price:.2f}", stop_price
-            
-    return False, "", 0.0
+def save_state(state, reason=""):
+    state_store.save_state(STATE_FILE, state, reason)
 
 # --- CSV Management ---
+def _csv_num(value):
+    if value is None or value == "":
+        return ""
+    return value if isinstance(value, str) else f"{value:.2f}"
+
+@timed()
 def log_to_csv(date, price, signal, action, entry_price, exit_price, profit, reasons, indicators):
     file_exists = os.path.isfile(CSV_FILE)
     
@@ -262,23 +251,23 @@ def log_to_csv(date, price, signal, action, entry_price, exit_price, profit, rea
             writer.writeheader()
         
         # Calculate stop loss level for display
-        stop_level = ""
+        stop_level = None
         if action.startswith("ENTER"):
             atr_mult = 2.0
             if "LONG" in action:
-                stop_level = f"{price - (atr_mult * indicators['ATR']):.2f}"
+                stop_level = price - (atr_mult * indicators['ATR'])
             elif "SHORT" in action:
-                stop_level = f"{price + (atr_mult * indicators['ATR']):.2f}"
+                stop_level = price + (atr_mult * indicators['ATR'])
             
         writer.writerow({
             'Date': date,
             'ETH Price': f"{price:.2f}",
             'Signal': signal,
             'Action': action,
-            'Entry Price': entry_price,
-            'Exit Price': exit_price,
-            'Profit (USDT)': profit,
-            'Stop Loss Level': stop_level,
+            'Entry Price': _csv_num(entry_price),
+            'Exit Price': _csv_num(exit_price),
+            'Profit (USDT)': _csv_num(profit),
+            'Stop Loss Level': _csv_num(stop_level),
             'Reasons': "; ".join(reasons),
             'RSI': f"{indicators['RSI']:.2f}",
             'MACD': f"{indicators['MACD']:.2f}",
@@ -287,6 +276,12 @@ def log_to_csv(date, price, signal, action, entry_price, exit_price, profit, rea
             'BB_Upper': f"{indicators['BB_Upper']:.2f}"
         })
 
+    # Full-precision typed record; the CSV above is the human-readable view
+    append_record(JOURNAL_FILE, make_record(
+        price, signal, action, entry_price, exit_price, profit, stop_level, reasons, indicators
+    ))
+
+@timed()
 def send_report_via_telegram(report_text, chart_path=None):
     """Send report via OpenClaw CLI message tool"""
     try:
@@ -315,132 +310,83 @@ def send_report_via_telegram(report_text, chart_path=None):
         print(f"Error sending report: {e}")
         return False
 
-def main():
+def run_strategy():
     try:
-        exchange = ccxt.binance()
-        bars = exchange.fetch_ohlcv('ETH/USDT', timeframe='1h', limit=500)
-        df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        # --confluence scores 1h, 4h and 1d from the same 1h series; enough of it for the 1d frame to warm up
+        mode = 'confluence' if '--confluence' in sys.argv else 'single'
+        with span('fetch'):
+            bars = fetch_ohlcv('ETH/USDT', '1h', limit=CONFLUENCE_BASE_BARS if mode == 'confluence' else 500)
+            df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         
-        result = analyze_strategy(df)
+        result = analyze_strategy(df, mode)
         
         if not result.get('valid', True):
             print(f"ETH/USDT Strategy Report (1H)")
             print(f"Status: {result['reasons'][0]}")
             return
         
+        # Shared, time-decayed news pass (one fetch per TTL across the asset scripts)
+        with span('sentiment'):
+            sentiment_data = get_shared_sentiment('ETH', timed('news_fetch')(lambda: TimeoutResistantAnalyzer().get_crypto_news_fast(5)))
+        
+        if sentiment_data:
+            print(f"📰 Sentiment from {sentiment_data['articles_count']} cached news articles (score {sentiment_data['score']:+.2f}, {sentiment_data['status']})")
+            result['sentiment_data'] = sentiment_data
+            if sentiment_data['sentiment'] != 'NEUTRAL':
+                result['reasons'].append(f"Market sentiment: {sentiment_data['sentiment']} ({sentiment_data['strength']})")
+            # The confluence vote has its own scale and threshold, so news only moves the single-timeframe score
+            if mode == 'single':
+                score = result['score'] + score_adjustment(sentiment_data)
+                result['score'] = int(round(score))
+                if score >= 3:
+                    result['signal'] = "LONG"
+                    result['confidence'] = "HIGH" if score >= 4 else "MEDIUM"
+                elif score <= -3:
+                    result['signal'] = "SHORT"
+                    result['confidence'] = "HIGH" if score <= -4 else "MEDIUM"
+                else:
+                    result['signal'] = "NEUTRAL"
+                    result['confidence'] = "LOW"
+        else:
+            print("⚠️ No news articles found, using technical analysis only")
+        
         state = load_state()
         current_price = result['price']
         current_signal = result['signal']
         
-        # Check stop loss first
-        stop_hit, stop_msg, stop_price = check_stop_loss(current_price, state)
-        
-        action = "HOLD"
+        # Same state machine the backtest replay runs (stop -> confirm pending -> signal change)
+        with span('check_stop_loss'):
+            state, action, events, changed = step(state, current_signal, current_price, result['indicators']['ATR'])
         profit_usdt = ""
-        changed = False
         
-        if stop_hit:
-            # Stop loss triggered - force exit
-            old_signal = state["signal"]
-            profit_pct = 0.0
-            
-            if old_signal == "LONG":
-                profit_pct = (current_price - state["entry_price"]) / state["entry_price"]
-            elif old_signal == "SHORT":
-                profit_pct = (state["entry_price"] - current_price) / state["entry_price"]
-            
-            profit_usdt = f"{100 * profit_pct:.2f}"
-            action = f"EXIT_{old_signal} (STOP)"
-            result['reasons'].append(stop_msg)
-            
+        for event in events:
+            if event['reason']:
+                result['reasons'].append(event['reason'])
+            profit = None
+            if event['profit_pct'] is not None:
+                profit = 100 * event['profit_pct']
+                profit_usdt = f"{profit:.2f}"
             log_to_csv(
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 current_price,
-                "NEUTRAL",
-                action,
-                f"{state['entry_price']:.2f}",
-                f"{current_price:.2f}",
-                profit_usdt,
+                event['signal'],
+                event['action'],
+                event['entry_price'],
+                event['exit_price'],
+                profit,
                 result['reasons'],
                 result['indicators']
             )
-            
-            state = {"signal": "NEUTRAL", "entry_price": 0.0, "entry_atr": 0.0, "pending_signal": None}
-            save_state(state)
-            changed = True
-            
-        elif state.get("pending_signal"):
-            # Confirm pending entry
-            pending = state["pending_signal"]
-            state = {
-                "signal": pending,
-                "entry_price": current_price,
-                "entry_atr": result['indicators']['ATR'],
-                "pending_signal": None
-            }
-            save_state(state)
-            
-            action = f"ENTER_{pending}"
-            log_to_csv(
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                current_price,
-                pending,
-                action,
-                f"{current_price:.2f}",
-                "",
-                "",
-                result['reasons'],
-                result['indicators']
-            )
-            changed = True
-            
-        elif current_signal != state["signal"]:
-            # Signal changed
-            old_signal = state["signal"]
-            
-            # Exit old position if exists
-            if old_signal in ["LONG", "SHORT"]:
-                profit_pct = 0.0
-                if old_signal == "LONG":
-                    profit_pct = (current_price - state["entry_price"]) / state["entry_price"]
-                elif old_signal == "SHORT":
-                    profit_pct = (state["entry_price"] - current_price) / state["entry_price"]
-                
-                profit_usdt = f"{100 * profit_pct:.2f}"
-                action = f"EXIT_{old_signal}"
-                
-                log_to_csv(
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    current_price,
-                    current_signal,
-                    action,
-                    f"{state['entry_price']:.2f}",
-                    f"{current_price:.2f}",
-                    profit_usdt,
-                    result['reasons'],
-                    result['indicators']
-                )
-            
-            # Set new signal as pending
-            if current_signal in ["LONG", "SHORT"]:
-                state = {
-                    "signal": "NEUTRAL",
-                    "entry_price": 0.0,
-                    "entry_atr": 0.0,
-                    "pending_signal": current_signal
-                }
-                action = f"SIGNAL_{current_signal} (PENDING)"
-            else:
-                state = {
-                    "signal": "NEUTRAL",
-                    "entry_price": 0.0,
-                    "entry_atr": 0.0,
-                    "pending_signal": None
-                }
-            
-            save_state(state)
-            changed = True
+        
+        if changed:
+            save_state(state, action)
+        
+        # Share the latest result with market_director
+        try:
+            publish('ETH', result)
+        except Exception as e:
+            print(f"Signal bus publish failed: {e}")
         
         # Generate enhanced technical analysis insights
         def generate_analysis_insights(result, df):
@@ -579,5 +525,14 @@ EMA 200: ${result['indicators']['EMA_200']:.2f}"""
         traceback.print_exc()
         sys.exit(1)
 
+def main():
+    # One run at a time: overlapping cron/manual/retry runs would race on the position state
+    try:
+        with state_store.strategy_lock(STATE_FILE), timing.run('eth'):
+            run_strategy()
+            state_store.compact_journal(STATE_FILE)
+    except state_store.StateLocked as e:
+        print(f"Skipping run: {e}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Shared, rate-limit-aware OHLCV fetcher for every script on this host.
+
+All processes draw Binance request weight from one token bucket kept in a
+small file (in /dev/shm when available). Taking weight is a reservation made
+under an flock: the bucket refills at the budgeted rate, a request that finds
+too few tokens still books its weight and is told how long to sleep, so
+concurrent callers queue up fairly instead of bursting into a 429. After
+every response the bucket is corrected with the exchange's own count
+(X-MBX-USED-WEIGHT-1M), which also covers anything that bypassed the bucket.
+
+Fetches run on ccxt's async client, concurrently up to MAX_CONCURRENT, and
+ranges longer than one page are split into since/limit pages fetched in
+parallel. fetch_ohlcv() and fetch_many() are blocking wrappers for the
+synchronous scripts.
+"""
+import asyncio
+import fcntl
+import os
+import struct
+import sys
+import time
+
+BUCKET_FILE = '/dev/shm/openclaw_binance_weight' if os.path.isdir('/dev/shm') else '/home/ironman/.openclaw/workspace/binance_weight.bin'
+WEIGHT_PER_MINUTE = 6000     # Binance spot REQUEST_WEIGHT limit per IP
+BUDGET_SHARE = 0.8           # Leave headroom for requests we do not see
+CAPACITY = WEIGHT_PER_MINUTE * BUDGET_SHARE
+REFILL_PER_SEC = CAPACITY / 60.0
+MARKETS_WEIGHT = 20          # exchangeInfo, fetched once per client by load_markets
+MAX_PAGE = 1000              # Most klines per request
+MAX_CONCURRENT = 8
+MAX_RETRIES = 3
+BUCKET_STRUCT = struct.Struct('<dd')  # tokens, last refill timestamp
+
+def ohlcv_weight(limit):
+    """Request weight of one klines call"""
+    if limit <= 100:
+        return 1
+    if limit <= 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+# --- Token Bucket ---
+def _update_bucket(path, fn):
+    """Run fn(tokens) -> (tokens, result) on the refilled bucket under an exclusive lock"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        raw = os.pread(fd, BUCKET_STRUCT.size, 0)
+        now = time.time()
+        if len(raw) == BUCKET_STRUCT.size:
+            tokens, last = BUCKET_STRUCT.unpack(raw)
+            tokens = min(CAPACITY, tokens + (now - last) * REFILL_PER_SEC)
+        else:
+            tokens = CAPACITY
+        tokens, result = fn(tokens)
+        os.pwrite(fd, BUCKET_STRUCT.pack(tokens, now), 0)
+        return result
+    finally:
+        os.close(fd)
+
+def acquire(weight, path=BUCKET_FILE):
+    """Book `weight` tokens; returns the seconds to wait before sending"""
+    def take(tokens):
+        tokens -= weight
+        return tokens, max(0.0, -tokens / REFILL_PER_SEC)
+    return _update_bucket(path, take)
+
+def sync_used_weight(used, path=BUCKET_FILE):
+    """Lower the bucket to what the exchange reports as still available"""
+    return _update_bucket(path, lambda tokens: (min(tokens, CAPACITY - used), None))
+
+def block_for(seconds, path=BUCKET_FILE):
+    """Empty the bucket so that nothing is sent for `seconds` (a 429/418 ban window)"""
+    return _update_bucket(path, lambda tokens: (min(tokens, -seconds * REFILL_PER_SEC), None))
+
+def remaining(path=BUCKET_FILE):
+    return _update_bucket(path, lambda tokens: (tokens, tokens))
+
+# --- Async Scheduler ---
+class FetchScheduler:
+    """Async ccxt client whose every request is paid for from the shared bucket"""
+    def __init__(self, exchange_id='binance', max_concurrent=MAX_CONCURRENT, bucket_file=BUCKET_FILE, session=None):
+        self.exchange_id = exchange_id
+        self.bucket_file = bucket_file
+        self.session = session  # Optional shared aiohttp session (data_sources pool); ccxt leaves it open on close
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.exchange = None
+
+    async def __aenter__(self):
+        import ccxt.async_support as ccxt_async
+        # The bucket replaces ccxt's per-instance throttle, which cannot see other processes
+        if self.exchange is None:  # Kept across retried enters
+            config = {'enableRateLimit': False}
+            if self.session is not None:
+                config['session'] = self.session
+            self.exchange = getattr(ccxt_async, self.exchange_id)(config)
+        await self.send(MARKETS_WEIGHT, self.exchange.load_markets)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.exchange.close()
+
+    async def _pay(self, weight):
+        wait = acquire(weight, self.bucket_file)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _sync_headers(self):
+        headers = self.exchange.last_response_headers or {}
+        for key, value in headers.items():
+            if key.lower() == 'x-mbx-used-weight-1m':
+                sync_used_weight(float(value), self.bucket_file)
+                return
+
+    def _retry_after(self):
+        """Seconds from the last response's Retry-After header, else one full weight window"""
+        headers = self.exchange.last_response_headers or {}
+        for key, value in headers.items():
+            if key.lower() == 'retry-after':
+                try:
+                    return max(float(value), 1.0)
+                except (TypeError, ValueError):
+                    break
+        return 60.0
+
+    async def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=500):
+        """One request when limit fits a page, otherwise a parallel paginated range"""
+        if limit > MAX_PAGE:
+            tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+            start = since if since is not None else self.exchange.milliseconds() - limit * tf_ms
+            bars = await self.fetch_range(symbol, timeframe, start, start + limit * tf_ms)
+            return bars[:limit] if since is not None else bars[-limit:]
+
+        return await self.send(ohlcv_weight(limit), lambda: self.exchange.fetch_ohlcv(
+            symbol, timeframe=timeframe, since=since, limit=limit))
+
+    async def send(self, weight, request):
+        """Pay `weight`, then await request(); owns every 429/418 retry for this client.
+
+        A rate-limit error empties the shared bucket for the Retry-After window
+        (a full minute without one), so every process backs off together.
+        """
+        from ccxt.base.errors import DDoSProtection, RateLimitExceeded
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.semaphore:
+                await self._pay(weight)
+                try:
+                    result = await request()
+                except (DDoSProtection, RateLimitExceeded):  # 418 ban / 429 (and -1003); siblings in ccxt
+                    if attempt == MAX_RETRIES:
+                        raise
+                    block_for(self._retry_after(), self.bucket_file)
+                    continue
+                self._sync_headers()
+                return result
+
+    async def fetch_range(self, symbol, timeframe, since, until=None):
+        """All bars in [since, until) as since/limit pages fetched concurrently"""
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        until = until if until is not None else self.exchange.milliseconds()
+        page_ms = MAX_PAGE * tf_ms
+        pages = await asyncio.gather(*[
+            self.fetch_ohlcv(symbol, timeframe, start, MAX_PAGE) for start in range(since, until, page_ms)
+        ])
+        merged = {bar[0]: bar for page in pages for bar in page if since <= bar[0] < until}
+        return [merged[ts] for ts in sorted(merged)]
+
+    async def fetch_many(self, symbols, timeframe='1h', limit=500, since=None):
+        """{symbol: bars} for all symbols; failures are reported and left out"""
+        async def one(symbol):
+            try:
+                return symbol, await self.fetch_ohlcv(symbol, timeframe, since, limit)
+            except Exception as e:
+                print(f"{symbol}: fetch failed ({e})")
+                return symbol, []
+        results = await asyncio.gather(*[one(s) for s in symbols])
+        return {symbol: bars for symbol, bars in results if bars}
+
+# --- Blocking Wrappers ---
+def fetch_ohlcv(symbol, timeframe='1h', since=None, limit=500, exchange_id='binance'):
+    async def run():
+        async with FetchScheduler(exchange_id) as scheduler:
+            return await scheduler.fetch_ohlcv(symbol, timeframe, since, limit)
+    return asyncio.run(run())
+
+def fetch_range(symbol, timeframe, since, until=None, exchange_id='binance'):
+    async def run():
+        async with FetchScheduler(exchange_id) as scheduler:
+            return await scheduler.fetch_range(symbol, timeframe, since, until)
+    return asyncio.run(run())
+
+def fetch_many(symbols, timeframe='1h', limit=500, exchange_id='binance', max_concurrent=MAX_CONCURRENT, since=None):
+    async def run():
+        async with FetchScheduler(exchange_id, max_concurrent) as scheduler:
+            return await scheduler.fetch_many(symbols, timeframe, limit, since)
+    return asyncio.run(run())
+
+# --- Self Check ---
+def _check_rate_limit_backoff():
+    """A 429 (RateLimitExceeded) must block the shared bucket and be retried"""
+    import tempfile
+    from unittest import mock
+    from ccxt.base.errors import RateLimitExceeded
+
+    class Exchange:
+        last_response_headers = {}
+        calls = 0
+
+        async def fetch_ohlcv(self, symbol, timeframe, since, limit):
+            self.calls += 1
+            if self.calls == 1:
+                self.last_response_headers = {'Retry-After': '2'}
+                raise RateLimitExceeded('binance 429 Too Many Requests')
+            self.last_response_headers = {}
+            return [[0, 1, 1, 1, 1, 1]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = FetchScheduler(bucket_file=os.path.join(tmp, 'bucket'))
+        scheduler.exchange = Exchange()
+        with mock.patch(f"{__name__}.block_for") as blocked, mock.patch.object(scheduler, '_pay', mock.AsyncMock()):
+            bars = asyncio.run(scheduler.fetch_ohlcv('BTC/USDT', '1m', limit=1))
+    assert bars == [[0, 1, 1, 1, 1, 1]] and scheduler.exchange.calls == 2, "429 was not retried"
+    assert blocked.call_count == 1 and blocked.call_args[0][0] == 2.0, "429 did not block the shared bucket"
+    print("rate-limit backoff: ok")
+
+if __name__ == "__main__":
+    # Usage: fetch_scheduler.py [check]
+    if sys.argv[1:] == ['check']:
+        _check_rate_limit_backoff()
+    else:
+        print(f"Shared weight budget: {remaining():.0f}/{CAPACITY:.0f} tokens available ({BUCKET_FILE})")
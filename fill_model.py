@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Execution cost model for the backtester: fees, slippage and funding.
+
+Backtest trades are filled at the bar price with no costs. apply_fill_model()
+turns their gross returns into net returns for a given fill model:
+
+- fees: taker or maker rate on both legs (the exit leg scales with exit notional)
+- slippage: fixed bps plus a fraction of the bar's ATR, always against the
+  trade; maker legs get no slippage
+- funding: perpetual funding settled hourly (Hyperliquid), longs pay positive
+  rates and shorts receive them; a constant rate or an hourly rate series
+
+All costs are computed as array operations over the whole trade set, so a
+sweep over thousands of trades costs a handful of NumPy calls.
+"""
+import numpy as np
+import pandas as pd
+
+FILL_MODELS = {
+    'none': {
+        'taker_fee': 0.0, 'maker_fee': 0.0, 'entry_liquidity': 'taker', 'exit_liquidity': 'taker',
+        'slippage_bps': 0.0, 'slippage_atr': 0.0, 'funding_rate_hourly': 0.0,
+    },
+    'binance_spot': {
+        'taker_fee': 0.001, 'maker_fee': 0.001, 'entry_liquidity': 'taker', 'exit_liquidity': 'taker',
+        'slippage_bps': 1.0, 'slippage_atr': 0.05, 'funding_rate_hourly': 0.0,
+    },
+    'hyperliquid': {
+        'taker_fee': 0.00045, 'maker_fee': 0.00015, 'entry_liquidity': 'taker', 'exit_liquidity': 'taker',
+        'slippage_bps': 1.0, 'slippage_atr': 0.05,
+        'funding_rate_hourly': 0.0000125,  # 0.01% per 8h baseline, settled every hour
+    },
+}
+HOUR_NS = 3600 * 10**9
+
+def get_fill_model(model):
+    """Resolve a model name or dict (dict keys override the 'none' defaults)"""
+    if isinstance(model, str):
+        if model not in FILL_MODELS:
+            raise ValueError(f"Unknown fill model '{model}' (choose from {', '.join(FILL_MODELS)})")
+        return dict(FILL_MODELS[model])
+    return {**FILL_MODELS['none'], **model}
+
+# --- Cost Components ---
+def _fee(model, leg):
+    return model['maker_fee'] if model[f'{leg}_liquidity'] == 'maker' else model['taker_fee']
+
+def _slippage(model, leg, price, atr):
+    """Adverse price move per fill (absolute price units)"""
+    if model[f'{leg}_liquidity'] == 'maker':
+        return np.zeros_like(price)
+    return price * model['slippage_bps'] / 10_000 + model['slippage_atr'] * np.nan_to_num(atr)
+
+def _to_ns(times):
+    return np.asarray(pd.to_datetime(times).values.astype('datetime64[ns]').astype(np.int64))
+
+def _hour_index(times_ns):
+    return times_ns // HOUR_NS
+
+def funding_cost(side, entry_ns, exit_ns, funding):
+    """Funding paid as a fraction of notional for each trade.
+
+    funding is a constant hourly rate or a pd.Series of hourly rates indexed by
+    settlement time; a trade pays every settlement in (entry, exit].
+    """
+    if isinstance(funding, pd.Series):
+        settle_ns = _to_ns(funding.index)
+        cum = np.concatenate([[0.0], np.cumsum(funding.to_numpy(dtype=float))])
+        paid = cum[np.searchsorted(settle_ns, exit_ns, side='right')] - cum[np.searchsorted(settle_ns, entry_ns, side='right')]
+    else:
+        paid = float(funding) * (_hour_index(exit_ns) - _hour_index(entry_ns))
+    return side * paid
+
+def net_returns(side, entry, exit, entry_atr, exit_atr, entry_ns, exit_ns, model, funding=None):
+    """Vectorized net return per trade; side is +1 (long) / -1 (short).
+
+    Returns a dict of arrays: pnl (net), gross, fees, slippage, funding.
+    """
+    model = get_fill_model(model)
+    entry_fill = entry + side * _slippage(model, 'entry', entry, entry_atr)
+    exit_fill = exit - side * _slippage(model, 'exit', exit, exit_atr)
+    gross = side * (exit - entry) / entry
+    slipped = side * (exit_fill - entry_fill) / entry_fill
+    fees = _fee(model, 'entry') + _fee(model, 'exit') * exit_fill / entry_fill
+    funding_paid = funding_cost(side, entry_ns, exit_ns,
+                                model['funding_rate_hourly'] if funding is None else funding)
+    return {
+        'pnl': slipped - fees - funding_paid,
+        'gross': gross,
+        'fees': fees,
+        'slippage': gross - slipped,
+        'funding': funding_paid,
+    }
+
+# --- Backtest Integration ---
+def apply_fill_model(trades, df, model, funding=None):
+    """Return trades with net 'pnl' plus 'gross_pnl'/'fees'/'slippage'/'funding'.
+
+    trades use the run_backtest layout (type, entry, entry_time, exit, time);
+    ATR at the entry and exit bars is looked up in df by timestamp.
+    """
+    if not trades:
+        return trades
+    bar_ns = _to_ns(df['timestamp'])
+    atr = df['ATR'].to_numpy(dtype=float)
+    side = np.array([1.0 if t['type'] == 'LONG' else -1.0 for t in trades])
+    entry = np.array([t['entry'] for t in trades], dtype=float)
+    exit = np.array([t['exit'] for t in trades], dtype=float)
+    entry_ns = _to_ns([t['entry_time'] for t in trades])
+    exit_ns = _to_ns([t['time'] for t in trades])
+    entry_atr = atr[np.clip(np.searchsorted(bar_ns, entry_ns), 0, len(atr) - 1)]
+    exit_atr = atr[np.clip(np.searchsorted(bar_ns, exit_ns), 0, len(atr) - 1)]
+
+    costs = net_returns(side, entry, exit, entry_atr, exit_atr, entry_ns, exit_ns, model, funding)
+    columns = pd.DataFrame({
+        'pnl': costs['pnl'], 'gross_pnl': costs['gross'], 'fees': costs['fees'],
+        'slippage': costs['slippage'], 'funding': costs['funding'],
+    }).to_dict('records')
+    return [{**t, **c} for t, c in zip(trades, columns)]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Deep OHLCV history for backtests, downloaded once and kept on disk.
+
+History is split into fixed pages of MAX_PAGE bars aligned to the epoch, so
+every request for a symbol/timeframe maps onto the same page files no matter
+which range was asked for. Missing pages are fetched in parallel through
+data_sources (inside fetch_scheduler's shared request-weight budget) and each page is
+written atomically as soon as it arrives, so an interrupted download resumes
+with only the missing pages. The page that contains the present is never
+stored, since it is still growing.
+
+Layout: HISTORY_DIR/<BASE>_<QUOTE>_<timeframe>/<page_start_ms>.npy, each an
+(n, 6) float64 array of timestamp, open, high, low, close, volume.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_sources import DataHub
+from fetch_scheduler import MAX_PAGE
+
+HISTORY_DIR = '/home/ironman/.openclaw/workspace/history'
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def _timeframe_ms(timeframe):
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    return int(timeframe[:-1]) * units[timeframe[-1]] * 1000
+
+def series_dir(symbol, timeframe, root=HISTORY_DIR):
+    return os.path.join(root, f"{symbol.replace('/', '_')}_{timeframe}")
+
+def page_starts(since_ms, until_ms, timeframe):
+    """Epoch-aligned page start times covering [since_ms, until_ms)"""
+    page_ms = MAX_PAGE * _timeframe_ms(timeframe)
+    first = (since_ms // page_ms) * page_ms
+    return list(range(first, until_ms, page_ms))
+
+def _page_path(directory, start):
+    return os.path.join(directory, f"{start}.npy")
+
+def _save_page(directory, start, bars):
+    tmp_path = _page_path(directory, start) + '.tmp.npy'
+    np.save(tmp_path, np.asarray(bars, dtype=np.float64).reshape(-1, 6))
+    os.replace(tmp_path, _page_path(directory, start))
+
+# --- Download ---
+async def _download(symbol, timeframe, starts, directory, exchange_id):
+    page_ms = MAX_PAGE * _timeframe_ms(timeframe)
+    now_ms = int(time.time() * 1000)
+    done = 0
+
+    async with DataHub() as hub:
+        source = hub.source(exchange_id)
+
+        async def fetch_page(start):
+            nonlocal done
+            bars = await source.ohlcv(symbol, timeframe, start, MAX_PAGE)
+            bars = [b for b in bars if start <= b[0] < start + page_ms]
+            if start + page_ms <= now_ms:  # Closed page: final, keep it
+                _save_page(directory, start, bars)
+            done += 1
+            print(f"\r{symbol} {timeframe}: {done}/{len(starts)} pages", end="", flush=True)
+            return start, bars
+        pages = await asyncio.gather(*[fetch_page(s) for s in starts])
+    if starts:
+        print()
+    return dict(pages)
+
+def download(symbol, timeframe, since_ms, until_ms=None, root=HISTORY_DIR, exchange_id='binance'):
+    """Fetch every page of [since_ms, until_ms) not already on disk.
+
+    Returns {page_start: bars} for the pages that were fetched this call
+    (including the open page, which is not persisted).
+    """
+    until_ms = until_ms if until_ms is not None else int(time.time() * 1000)
+    directory = series_dir(symbol, timeframe, root)
+    os.makedirs(directory, exist_ok=True)
+    missing = [s for s in page_starts(since_ms, until_ms, timeframe) if not os.path.exists(_page_path(directory, s))]
+    if not missing:
+        return {}
+    return asyncio.run(_download(symbol, timeframe, missing, directory, exchange_id))
+
+# --- Load ---
+def load_history(symbol, timeframe, since, until=None, root=HISTORY_DIR, exchange_id='binance'):
+    """DataFrame of all bars in [since, until); downloads whatever is missing first.
+
+    since/until accept anything pd.Timestamp understands ('2021-01-01', ms ints
+    are not accepted to avoid unit mix-ups).
+    """
+    since_ms = int(pd.Timestamp(since).timestamp() * 1000)
+    until_ms = int(pd.Timestamp(until).timestamp() * 1000) if until is not None else int(time.time() * 1000)
+    fresh = download(symbol, timeframe, since_ms, until_ms, root, exchange_id)
+
+    directory = series_dir(symbol, timeframe, root)
+    arrays = []
+    for start in page_starts(since_ms, until_ms, timeframe):
+        if start in fresh:
+            arrays.append(np.asarray(fresh[start], dtype=np.float64).reshape(-1, 6))
+        elif os.path.exists(_page_path(directory, start)):
+            arrays.append(np.load(_page_path(directory, start)))
+    data = np.concatenate(arrays) if arrays else np.empty((0, 6))
+    data = data[(data[:, 0] >= since_ms) & (data[:, 0] < until_ms)]
+
+    df = pd.DataFrame(data, columns=COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+    return df
+
+if __name__ == "__main__":
+    # Usage: history_loader.py <SYMBOL> <timeframe> <since> [until]   e.g. BTC/USDT 1h 2020-01-01
+    if len(sys.argv) < 4:
+        print("Usage: history_loader.py <SYMBOL> <timeframe> <since> [until]")
+        sys.exit(1)
+    df = load_history(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+    if len(df):
+        print(f"{len(df)} bars from {df['timestamp'].iloc[0]} to {df['timestamp'].iloc[-1]}")
+    else:
+        print("No bars in range")
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Streaming Hyperliquid candle feed.
+
+One long-running process subscribes to `candle` (per coin and interval) and
+`allMids` over the Hyperliquid WebSocket, keeps a rolling buffer of up to
+BUFFER_BARS candles per coin/interval (seeded once from candleSnapshot and
+re-seeded after a reconnect to close the gap), and writes the buffers that
+changed to small JSON snapshot files in FEED_DIR (tmpfs when available)
+about once a second. Readers in other processes -- get_price_chart.py and the
+strategy runners -- read those files instead of posting a full candleSnapshot
+for every chart or signal check, and fall back to HTTP when the feed is down
+(heartbeat older than STALE_SEC) or does not cover the requested window.
+
+`mock` serves the same WebSocket and /info endpoints locally, either from a
+synthetic random walk or by replaying a file recorded with `run --record`,
+so the whole path can be exercised offline.
+
+Usage:
+  hl_feed.py run BTC ETH HYPE [--intervals 1m,15m,1h] [--record FILE] [--url WS_URL --info-url INFO_URL]
+  hl_feed.py mock [--port 8765] [--replay FILE] [--speed 10]
+  hl_feed.py show COIN [interval]
+"""
+import asyncio
+import bisect
+import json
+import os
+import random
+import sys
+import time
+
+WS_URL = 'wss://api.hyperliquid.xyz/ws'
+INFO_URL = 'https://api.hyperliquid.xyz/info'
+FEED_DIR = '/dev/shm/openclaw_hl_feed' if os.path.isdir('/dev/shm') else '/home/ironman/.openclaw/workspace/hl_feed'
+DEFAULT_INTERVALS = ['1m', '5m', '15m', '1h', '4h']
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '8h': 28_800_000, '1d': 86_400_000,
+}
+BUFFER_BARS = 5000      # candleSnapshot returns at most this many bars
+SNAPSHOT_SEC = 1.0
+PING_SEC = 30           # Server drops connections idle for 60s
+STALE_SEC = 15
+MAX_BACKOFF_SEC = 60
+
+# --- Buffers ---
+def _parse_candle(data):
+    """HL candle dict -> [t, o, h, l, c, v]"""
+    return [int(data['t']), float(data['o']), float(data['h']), float(data['l']), float(data['c']), float(data.get('v', 0))]
+
+class CandleBuffer:
+    """Rolling candles for one coin/interval, oldest first; updates to the open candle replace it"""
+    def __init__(self, maxlen=BUFFER_BARS):
+        self.rows = []
+        self.maxlen = maxlen
+        self.dirty = False
+
+    def update(self, row):
+        t = row[0]
+        if not self.rows or t > self.rows[-1][0]:
+            self.rows.append(row)
+            if len(self.rows) > self.maxlen:
+                del self.rows[:len(self.rows) - self.maxlen]
+        else:
+            i = bisect.bisect_left(self.rows, t, key=lambda r: r[0])
+            if i < len(self.rows) and self.rows[i][0] == t:
+                self.rows[i] = row
+            else:
+                self.rows.insert(i, row)
+        self.dirty = True
+
+    def since(self, start_ms):
+        return self.rows[bisect.bisect_left(self.rows, start_ms, key=lambda r: r[0]):]
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def snapshot_path(coin, interval, feed_dir=FEED_DIR):
+    return os.path.join(feed_dir, f"{coin.upper()}_{interval}.json")
+
+# --- Feed ---
+class CandleFeed:
+    def __init__(self, coins, intervals=DEFAULT_INTERVALS, ws_url=WS_URL, info_url=INFO_URL,
+                 feed_dir=FEED_DIR, record=None):
+        self.coins = [c.upper() for c in coins]
+        self.intervals = list(intervals)
+        self.ws_url = ws_url
+        self.info_url = info_url
+        self.feed_dir = feed_dir
+        self.record = record
+        self.buffers = {(coin, interval): CandleBuffer() for coin in self.coins for interval in self.intervals}
+        self.mids = {}
+        self.connected = False
+
+    def on_message(self, msg):
+        channel = msg.get('channel')
+        if channel == 'candle':
+            data = msg['data']
+            buffer = self.buffers.get((str(data.get('s', '')).upper(), data.get('i')))
+            if buffer is not None:
+                buffer.update(_parse_candle(data))
+        elif channel == 'allMids':
+            self.mids.update(msg['data'].get('mids', {}))
+
+    async def seed(self, session, concurrency=4):
+        """Fill every buffer from candleSnapshot: the full window on start, only the gap after a reconnect"""
+        semaphore = asyncio.Semaphore(concurrency)
+        now_ms = int(time.time() * 1000)
+
+        async def one(coin, interval):
+            buffer = self.buffers[(coin, interval)]
+            start_ms = buffer.rows[-1][0] if buffer.rows else now_ms - BUFFER_BARS * INTERVAL_MS[interval]
+            req = {'coin': coin, 'interval': interval, 'startTime': start_ms, 'endTime': now_ms}
+            async with semaphore:
+                try:
+                    async with session.post(self.info_url, json={'type': 'candleSnapshot', 'req': req}) as resp:
+                        rows = await resp.json(content_type=None)
+                except Exception as e:
+                    print(f"{coin} {interval}: seed failed ({e})")
+                    return
+            if not isinstance(rows, list):  # Error payloads come back as a dict
+                print(f"{coin} {interval}: seed failed ({rows})")
+                return
+            for data in rows:
+                try:
+                    buffer.update(_parse_candle(data))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        await asyncio.gather(*[one(coin, interval) for coin, interval in self.buffers])
+
+    def write_snapshots(self):
+        os.makedirs(self.feed_dir, exist_ok=True)
+        now_ms = int(time.time() * 1000)
+        for (coin, interval), buffer in self.buffers.items():
+            if buffer.dirty:
+                _write_json(snapshot_path(coin, interval, self.feed_dir),
+                            {'coin': coin, 'interval': interval, 'updated': now_ms, 'candles': buffer.rows})
+                buffer.dirty = False
+        _write_json(os.path.join(self.feed_dir, 'mids.json'), {'updated': now_ms, 'mids': self.mids})
+        _write_json(os.path.join(self.feed_dir, 'feed.json'), {
+            'updated': now_ms, 'pid': os.getpid(), 'connected': self.connected,
+            'coins': self.coins, 'intervals': self.intervals,
+        })
+
+    async def _snapshot_loop(self):
+        while True:
+            self.write_snapshots()
+            await asyncio.sleep(SNAPSHOT_SEC)
+
+    async def _listen(self, ws, record_file):
+        from aiohttp import WSMsgType
+        subscriptions = [{'type': 'allMids'}] + [
+            {'type': 'candle', 'coin': coin, 'interval': interval} for coin, interval in self.buffers
+        ]
+        for sub in subscriptions:
+            await ws.send_json({'method': 'subscribe', 'subscription': sub})
+        self.connected = True
+        while True:
+            try:
+                message = await ws.receive(timeout=PING_SEC)
+            except asyncio.TimeoutError:
+                await ws.send_json({'method': 'ping'})
+                continue
+            if message.type != WSMsgType.TEXT:
+                return  # Closed or errored: reconnect
+            msg = json.loads(message.data)
+            if record_file is not None:
+                record_file.write(json.dumps({'ts': int(time.time() * 1000), 'msg': msg}) + '\n')
+            self.on_message(msg)
+
+    async def run(self, duration=None):
+        """Stream until cancelled (or for `duration` seconds), reconnecting with backoff"""
+        import aiohttp
+        record_file = open(self.record, 'a') if self.record else None
+        snapshots = asyncio.create_task(self._snapshot_loop())
+        deadline = time.time() + duration if duration else None
+        backoff = 1
+        try:
+            async with aiohttp.ClientSession() as session:
+                while deadline is None or time.time() < deadline:
+                    try:
+                        await self.seed(session)
+                        async with session.ws_connect(self.ws_url, heartbeat=None) as ws:
+                            backoff = 1
+                            listen = self._listen(ws, record_file)
+                            if deadline is None:
+                                await listen
+                            else:
+                                try:
+                                    await asyncio.wait_for(listen, max(0.0, deadline - time.time()))
+                                except asyncio.TimeoutError:
+                                    if time.time() < deadline:
+                                        raise  # A socket timeout, not the end of the run
+                    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                        # aiohttp's connect/read timeouts are both ClientError and TimeoutError
+                        print(f"feed: connection lost ({e or type(e).__name__}), retrying in {backoff}s")
+                    self.connected = False
+                    if deadline is not None and time.time() >= deadline:
+                        break
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, MAX_BACKOFF_SEC)
+        finally:
+            self.connected = False
+            snapshots.cancel()
+            self.write_snapshots()
+            if record_file is not None:
+                record_file.close()
+
+# --- Readers ---
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def feed_alive(feed_dir=FEED_DIR, max_age_sec=STALE_SEC):
+    heartbeat = _read_json(os.path.join(feed_dir, 'feed.json'))
+    return bool(heartbeat and heartbeat.get('connected') and time.time() * 1000 - heartbeat['updated'] <= max_age_sec * 1000)
+
+def read_candles(coin, interval, since_ms=None, feed_dir=FEED_DIR):
+    """[[t, o, h, l, c, v], ...] from the live feed, or None when it is down or does not cover since_ms"""
+    if not feed_alive(feed_dir):
+        return None
+    snapshot = _read_json(snapshot_path(coin, interval, feed_dir))
+    if not snapshot or not snapshot['candles']:
+        return None
+    rows = snapshot['candles']
+    if since_ms is None:
+        return rows
+    if rows[0][0] > since_ms:
+        return None
+    return rows[bisect.bisect_left(rows, since_ms, key=lambda r: r[0]):]
+
+def read_mids(feed_dir=FEED_DIR):
+    if not feed_alive(feed_dir):
+        return None
+    mids = _read_json(os.path.join(feed_dir, 'mids.json'))
+    return {coin: float(px) for coin, px in mids['mids'].items()} if mids else None
+
+def feed_ohlcv(coin, interval='1h', limit=500, feed_dir=FEED_DIR):
+    """ccxt-style bars (last `limit`) from the live feed, or None"""
+    rows = read_candles(coin, interval, feed_dir=feed_dir)
+    if rows is None or len(rows) < limit:
+        return None
+    return rows[-limit:]
+
+# --- Mock / Replay Server ---
+MOCK_COINS = ['BTC', 'ETH', 'SOL', 'HYPE']
+
+class MockMarket:
+    """Random-walk prices answering candleSnapshot and pushing candle/allMids updates"""
+    def __init__(self, seed=7, tick_sec=0.2):
+        self.rng = random.Random(seed)
+        self.tick_sec = tick_sec
+        self.prices = {}
+
+    def price(self, coin):
+        return self.prices.setdefault(coin, 10 ** self.rng.uniform(0, 4.5))
+
+    def step(self, coin):
+        self.prices[coin] = self.price(coin) * (1 + self.rng.gauss(0, 0.001))
+        return self.prices[coin]
+
+    def snapshot(self, coin, interval, start_ms, end_ms):
+        step_ms = INTERVAL_MS[interval]
+        price = self.price(coin)
+        rows = []
+        for t in range(start_ms // step_ms * step_ms, end_ms, step_ms):
+            close = price * (1 + self.rng.gauss(0, 0.003))
+            rows.append({'t': t, 'T': t + step_ms - 1, 's': coin, 'i': interval, 'o': str(price), 'c': str(close),
+                         'h': str(max(price, close) * 1.001), 'l': str(min(price, close) * 0.999), 'v': '10', 'n': 1})
+            price = close
+        self.prices[coin] = price
+        return rows
+
+    def candle(self, coin, interval, bars):
+        """Update the open candle for (coin, interval) with a new tick"""
+        step_ms = INTERVAL_MS[interval]
+        t = int(time.time() * 1000) // step_ms * step_ms
+        price = self.prices[coin]
+        bar = bars.get((coin, interval))
+        if bar is None or bar['t'] != t:
+            bar = {'t': t, 'T': t + step_ms - 1, 's': coin, 'i': interval, 'o': price, 'h': price, 'l': price, 'v': 0.0, 'n': 0}
+            bars[(coin, interval)] = bar
+        bar.update(c=price, h=max(bar['h'], price), l=min(bar['l'], price), v=bar['v'] + 1, n=bar['n'] + 1)
+        return {k: (str(v) if k in 'ohlcv' else v) for k, v in bar.items()}
+
+def make_mock_app(replay=None, speed=1.0, market=None):
+    from aiohttp import WSMsgType, web
+    market = market or MockMarket()
+
+    async def info(request):
+        body = await request.json()
+        if body.get('type') == 'metaAndAssetCtxs':
+            coins = sorted(set(market.prices) | set(MOCK_COINS))
+            return web.json_response([
+                {'universe': [{'name': coin, 'szDecimals': 2} for coin in coins]},
+                [{'markPx': str(market.price(coin)), 'midPx': str(market.price(coin)),
+                  'dayNtlVlm': str(market.rng.uniform(1e5, 1e9))} for coin in coins],
+            ])
+        if body.get('type') != 'candleSnapshot' or replay:
+            return web.json_response([])
+        req = body['req']
+        return web.json_response(market.snapshot(req['coin'].upper(), req['interval'], req['startTime'], req['endTime']))
+
+    async def replay_messages(ws):
+        previous = None
+        with open(replay, 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                if previous is not None and speed > 0:
+                    await asyncio.sleep(max(0.0, (entry['ts'] - previous) / 1000.0 / speed))
+                previous = entry['ts']
+                await ws.send_json(entry['msg'])
+
+    async def stream_market(ws, subscriptions):
+        bars = {}
+        while not ws.closed:
+            coins = {sub['coin'] for sub in subscriptions if sub['type'] == 'candle'}
+            for coin in coins:
+                market.step(coin)
+            for sub in list(subscriptions):
+                if sub['type'] == 'candle':
+                    await ws.send_json({'channel': 'candle', 'data': market.candle(sub['coin'], sub['interval'], bars)})
+                elif sub['type'] == 'allMids':
+                    await ws.send_json({'channel': 'allMids', 'data': {'mids': {c: str(p) for c, p in market.prices.items()}}})
+            await asyncio.sleep(market.tick_sec)
+
+    async def websocket(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscriptions = []
+        pusher = None
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+            msg = json.loads(message.data)
+            if msg.get('method') == 'ping':
+                await ws.send_json({'channel': 'pong'})
+            elif msg.get('method') == 'subscribe':
+                sub = dict(msg['subscription'])
+                if 'coin' in sub:
+                    sub['coin'] = sub['coin'].upper()
+                    market.price(sub['coin'])
+                subscriptions.append(sub)
+                await ws.send_json({'channel': 'subscriptionResponse', 'data': msg})
+                if pusher is None:
+                    pusher = asyncio.create_task(replay_messages(ws) if replay else stream_market(ws, subscriptions))
+        if pusher is not None:
+            pusher.cancel()
+        return ws
+
+    app = web.Application()
+    app.router.add_post('/info', info)
+    app.router.add_get('/ws', websocket)
+    return app
+
+def serve_mock(port=8765, replay=None, speed=1.0):
+    from aiohttp import web
+    print(f"mock feed on ws://127.0.0.1:{port}/ws (info: http://127.0.0.1:{port}/info)")
+    web.run_app(make_mock_app(replay, speed), host='127.0.0.1', port=port, print=None)
+
+def _flag(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+def _positional(args):
+    """Arguments that are neither --flags nor their values"""
+    values = {i + 1 for i, arg in enumerate(args) if arg.startswith('--')}
+    return [arg for i, arg in enumerate(args) if i not in values and not arg.startswith('--')]
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'run':
+        coins = _positional(sys.argv[2:])
+        intervals = _flag('--intervals', ','.join(DEFAULT_INTERVALS)).split(',')
+        feed = CandleFeed(coins, intervals, _flag('--url', WS_URL), _flag('--info-url', INFO_URL), record=_flag('--record'))
+        print(f"feed: {len(coins)} coins x {len(intervals)} intervals -> {FEED_DIR}")
+        try:
+            asyncio.run(feed.run())
+        except KeyboardInterrupt:
+            pass
+    elif command == 'mock':
+        serve_mock(int(_flag('--port', 8765)), _flag('--replay'), float(_flag('--speed', 1.0)))
+    elif command == 'show' and len(sys.argv) > 2:
+        interval = sys.argv[3] if len(sys.argv) > 3 else '1m'
+        rows = read_candles(sys.argv[2], interval)
+        if rows is None:
+            print("feed is not running or has no data for that coin/interval")
+            return
+        mids = read_mids() or {}
+        print(f"{sys.argv[2].upper()} {interval}: {len(rows)} bars, last close {rows[-1][4]}, mid {mids.get(sys.argv[2].upper())}")
+    else:
+        print(__doc__.split('Usage:')[1])
+
+if __name__ == "__main__":
+    main()
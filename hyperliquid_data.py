@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Hyperliquid perp candles for the strategy engine.
+
+Signals for positions traded through the hyperliquid-trading skill should be
+computed on Hyperliquid's own perp candles, not Binance spot. This adapter
+returns the same ccxt-style [t, o, h, l, c, v] bars as fetch_scheduler, so
+strategy_engine scores them with exactly the strategy_core / analyze_strategy
+rules used for Binance:
+
+  - one metaAndAssetCtxs call resolves the perp universe (and 24h volume for
+    top-N selection),
+  - candles come from the live hl_feed.py buffers when the feed is running,
+    otherwise from concurrent candleSnapshot requests through the
+    data_sources Hyperliquid adapter, paced within the per-IP weight limit.
+"""
+import asyncio
+import time
+
+from data_sources import call
+
+MAX_CONCURRENT = 8
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '8h': 28_800_000, '1d': 86_400_000,
+}
+
+# --- Universe ---
+def fetch_meta():
+    """(universe, asset ctxs) from one metaAndAssetCtxs call"""
+    return call(lambda hub: hub.hyperliquid.meta_and_ctxs())
+
+def top_perps(n, exclude=()):
+    """Top n listed perps by 24h notional volume"""
+    universe, ctxs = fetch_meta()
+    ranked = []
+    for entry, ctx in zip(universe, ctxs):
+        if entry.get('isDelisted') or entry['name'] in exclude:
+            continue
+        ranked.append((float(ctx.get('dayNtlVlm') or 0.0), entry['name']))
+    ranked.sort(reverse=True)
+    return [name for _vol, name in ranked[:n]]
+
+# --- Candles ---
+async def _fetch_all(hub, coins, interval, limit, max_concurrent):
+    semaphore = asyncio.Semaphore(max_concurrent)
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - limit * INTERVAL_MS[interval]
+
+    async def one(coin):
+        async with semaphore:
+            try:
+                return coin, await hub.hyperliquid.candles(coin, interval, start_ms, end_ms)
+            except Exception as e:
+                print(f"{coin}: candleSnapshot failed ({e})")
+                return coin, []
+
+    results = await asyncio.gather(*[one(coin) for coin in coins])
+    return {coin: bars[-limit:] for coin, bars in results if bars}
+
+def fetch_candles(coins, interval='1h', limit=500, max_concurrent=MAX_CONCURRENT, use_feed=True):
+    """{coin: bars} for all coins; live feed buffers first, one concurrent snapshot sweep for the rest"""
+    candles = {}
+    if use_feed:
+        from hl_feed import feed_ohlcv
+        for coin in coins:
+            bars = feed_ohlcv(coin, interval, limit)
+            if bars is not None:
+                candles[coin] = bars
+    missing = [coin for coin in coins if coin not in candles]
+    if missing:
+        candles.update(call(lambda hub: _fetch_all(hub, missing, interval, limit, max_concurrent)))
+    return candles
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""NumPy indicator kernels for (n_symbols, n_bars) matrices.
+
+Every kernel takes a float array with time along axis 1 (a 1-D series works
+too and comes back 1-D) and matches the pandas versions in the strategy
+scripts: same formulas, NaN during warm-up, NaN while a rolling window
+contains missing bars. Rows may start at different times (late listings):
+leading NaNs stay NaN and each row warms up from its own first bar.
+
+Rolling means and standard deviations use running sums (O(n) regardless of
+the window), rolling min/max use per-block prefix/suffix scans, and EMAs are solved
+as a blocked linear recurrence (one matrix product per level of
+EMA_BLOCK-bar blocks), so no kernel loops over bars in Python.
+"""
+import numpy as np
+
+EMA_BLOCK = 64
+
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return (x[None, :], True) if x.ndim == 1 else (x, False)
+
+def _restore(out, was_1d):
+    return out[0] if was_1d else out
+
+def _first_valid(x):
+    """Index of the first finite value per row (n_bars for all-NaN rows)"""
+    finite = np.isfinite(x)
+    return np.where(finite.any(axis=1), finite.argmax(axis=1), x.shape[1])
+
+def _shift(x, n=1):
+    out = np.full_like(x, np.nan)
+    out[:, n:] = x[:, :-n]
+    return out
+
+# --- Rolling Windows ---
+def _rolling_sums(x, window, power=1):
+    """Window sums of (x - row reference)**power and the count of finite values"""
+    finite = np.isfinite(x)
+    ref = np.take_along_axis(np.where(finite, x, 0.0), np.minimum(_first_valid(x), x.shape[1] - 1)[:, None], axis=1)
+    centered = np.where(finite, x - ref, 0.0)
+    zeros = np.zeros((x.shape[0], 1))
+    cs = np.concatenate([zeros, np.cumsum(centered, axis=1)], axis=1)
+    cs2 = np.concatenate([zeros, np.cumsum(centered ** 2, axis=1)], axis=1) if power == 2 else None
+    cn = np.concatenate([zeros, np.cumsum(finite, axis=1)], axis=1)
+    s1 = cs[:, window:] - cs[:, :-window]
+    s2 = cs2[:, window:] - cs2[:, :-window] if cs2 is not None else None
+    count = cn[:, window:] - cn[:, :-window]
+    return ref, s1, s2, count
+
+def rolling_mean(x, window):
+    x, was_1d = _as_2d(x)
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= window:
+        ref, s1, _s2, count = _rolling_sums(x, window)
+        out[:, window - 1:] = np.where(count == window, ref + s1 / window, np.nan)
+    return _restore(out, was_1d)
+
+def rolling_std(x, window):
+    """Sample standard deviation (ddof=1), like pandas rolling().std()"""
+    x, was_1d = _as_2d(x)
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= window:
+        _ref, s1, s2, count = _rolling_sums(x, window, power=2)
+        var = np.clip((s2 - s1 ** 2 / window) / (window - 1), 0.0, None)
+        out[:, window - 1:] = np.where(count == window, np.sqrt(var), np.nan)
+    return _restore(out, was_1d)
+
+def _rolling_extreme(x, window, ufunc):
+    """Sliding min/max in O(n): per-block prefix and suffix scans (van Herk / Gil-Werman)"""
+    x, was_1d = _as_2d(x)
+    n_rows, n = x.shape
+    out = np.full_like(x, np.nan)
+    if n >= window:
+        pad = (-n) % window
+        blocks = np.concatenate([x, np.full((n_rows, pad), np.nan)], axis=1).reshape(n_rows, -1, window)
+        prefix = ufunc.accumulate(blocks, axis=2).reshape(n_rows, -1)
+        suffix = ufunc.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(n_rows, -1)
+        out[:, window - 1:] = ufunc(suffix[:, :n - window + 1], prefix[:, window - 1:n])
+    return _restore(out, was_1d)
+
+def rolling_min(x, window):
+    return _rolling_extreme(x, window, np.minimum)
+
+def rolling_max(x, window):
+    return _rolling_extreme(x, window, np.maximum)
+
+def _linear_recurrence(u, d):
+    """y[t] = u[t] + d * y[t-1] along axis 1 (y[-1] = 0), in blocks of EMA_BLOCK.
+
+    Each block is solved with one matrix product assuming a zero carry-in; the
+    block-end carries follow the same recurrence with factor d**EMA_BLOCK and
+    are solved recursively, then added back with decaying weights.
+    """
+    n_rows, n = u.shape
+    b = EMA_BLOCK
+    lag = np.arange(b)[:, None] - np.arange(b)[None, :]
+    weights = np.where(lag >= 0, d ** np.clip(lag, 0, None), 0.0)  # (b, b) lower-triangular
+    if n <= b:
+        return u @ weights[:n, :n].T
+    pad = (-n) % b
+    blocks = np.concatenate([u, np.zeros((n_rows, pad))], axis=1).reshape(n_rows, -1, b)
+    local = blocks @ weights.T
+    carry = _linear_recurrence(local[:, :, -1], d ** b)  # y at the end of every block
+    local[:, 1:, :] += carry[:, :-1, None] * d ** np.arange(1, b + 1)
+    return local.reshape(n_rows, -1)[:, :n]
+
+# --- Indicators ---
+def ema(x, period):
+    """ewm(span=period, adjust=False).mean(); gaps after the first bar hold the last value"""
+    x, was_1d = _as_2d(x)
+    n = x.shape[1]
+    alpha = 2.0 / (period + 1)
+    decay = 1.0 - alpha
+    first = _first_valid(x)
+
+    # Leading NaNs take the first value (EMA of a constant is that constant) and
+    # interior gaps carry the previous bar, so the recurrence never sees NaN
+    idx = np.where(np.isfinite(x), np.arange(n), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(x, np.maximum(idx, np.minimum(first, n - 1)[:, None]), axis=1)
+
+    u = alpha * filled
+    u[:, 0] = filled[:, 0]  # y[0] = x[0]
+    out = _linear_recurrence(u, decay)
+    out[np.arange(n) < first[:, None]] = np.nan
+    return _restore(out, was_1d)
+
+def rsi(close, period=14):
+    """Simple-average RSI, like calculate_rsi"""
+    close, was_1d = _as_2d(close)
+    delta = close - _shift(close)
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / np.where(loss == 0, np.nan, loss)
+    return _restore(100 - (100 / (1 + rs)), was_1d)
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal)
+
+def bollinger_bands(close, period=20, std_dev=2):
+    sma = rolling_mean(close, period)
+    std = rolling_std(close, period)
+    return sma + std * std_dev, sma, sma - std * std_dev
+
+def stochastic(high, low, close, period=14, k_period=3, d_period=3):
+    low_min = rolling_min(low, period)
+    high_max = rolling_max(high, period)
+    denominator = high_max - low_min
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100 * ((np.asarray(close, dtype=np.float64) - low_min) / np.where(denominator == 0, np.nan, denominator))
+    k_smooth = rolling_mean(k, k_period)
+    return k_smooth, rolling_mean(k_smooth, d_period)
+
+def atr(high, low, close, period=14):
+    high, was_1d = _as_2d(high)
+    low, _ = _as_2d(low)
+    close, _ = _as_2d(close)
+    prev_close = _shift(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return _restore(rolling_mean(true_range, period), was_1d)
+
+def all_indicators(high, low, close):
+    """Every indicator the strategy scores, keyed like the DataFrame columns"""
+    out = {'close': np.asarray(close, dtype=np.float64)}
+    out['RSI'] = rsi(close)
+    out['EMA_50'] = ema(close, 50)
+    out['EMA_200'] = ema(close, 200)
+    out['MACD'], out['MACD_Signal'] = macd(close)
+    out['BB_Upper'], out['BB_Middle'], out['BB_Lower'] = bollinger_bands(close)
+    out['Stoch_K'], out['Stoch_D'] = stochastic(high, low, close)
+    out['ATR'] = atr(high, low, close)
+    return out
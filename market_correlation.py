@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Rolling correlation/beta matrices for the market director.
+
+Close series for all assets are kept aligned on common timestamps in a small
+.npz cache. Each run only fetches the bars that closed since the last run and
+updates the rolling sufficient statistics (sum and cross-product of returns)
+by adding the new returns and subtracting the ones that left the window, so
+the director never recomputes from scratch or refetches history.
+"""
+import os
+import time
+
+import numpy as np
+
+STATS_FILE = '/home/ironman/.openclaw/workspace/market_correlation.npz'
+TIMEFRAME = '1h'
+TIMEFRAME_MS = 3600 * 1000
+CORR_WINDOW = 168          # One week of hourly returns
+RESYNC_EVERY = 100         # Full recompute every N incremental updates (float drift)
+
+# --- Data ---
+def _fetch_closes(assets, since_ms=None, limit=CORR_WINDOW + 1):
+    """Fetch closes per asset and align them on timestamps common to all"""
+    from data_sources import fetch_many  # Imported lazily: cached runs never touch the exchange
+    by_symbol = fetch_many([f"{asset}/USDT" for asset in assets], TIMEFRAME, limit, since=since_ms)
+    # Drop the still-forming bar so every cached close is final
+    now_ms = int(time.time() * 1000)
+    per_asset = [{int(b[0]): float(b[4]) for b in by_symbol.get(f"{asset}/USDT", []) if b[0] + TIMEFRAME_MS <= now_ms}
+                 for asset in assets]
+    common = sorted(set.intersection(*(set(d) for d in per_asset))) if per_asset else []
+    ts = np.array(common, dtype=np.int64)
+    closes = np.array([[d[t] for t in common] for d in per_asset], dtype=np.float64).reshape(len(assets), len(common))
+    return ts, closes
+
+def _log_returns(closes):
+    return np.diff(np.log(closes), axis=1)
+
+# --- Rolling Statistics ---
+def _full_stats(returns):
+    return {
+        'returns': returns,
+        'sum': returns.sum(axis=1),
+        'cross': returns @ returns.T,
+        'updates': 0,
+    }
+
+def _roll_stats(stats, new_returns, window=CORR_WINDOW):
+    """Add new return columns and drop the ones that fall out of the window"""
+    combined = np.concatenate([stats['returns'], new_returns], axis=1)
+    n_drop = max(combined.shape[1] - window, 0)
+    dropped = combined[:, :n_drop]
+    stats['sum'] = stats['sum'] + new_returns.sum(axis=1) - dropped.sum(axis=1)
+    stats['cross'] = stats['cross'] + new_returns @ new_returns.T - dropped @ dropped.T
+    stats['returns'] = combined[:, n_drop:]
+    stats['updates'] += 1
+    if stats['updates'] % RESYNC_EVERY == 0:
+        stats.update(_full_stats(stats['returns']), updates=stats['updates'])
+    return stats
+
+def correlation_and_beta(stats):
+    """Correlation matrix and beta of every asset against the first (BTC)"""
+    n = stats['returns'].shape[1]
+    if n < 2:
+        return None, None
+    mean = stats['sum'] / n
+    cov = stats['cross'] / n - np.outer(mean, mean)
+    std = np.sqrt(np.clip(np.diag(cov), 1e-18, None))
+    corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+    beta = cov[:, 0] / cov[0, 0] if cov[0, 0] > 0 else np.ones(len(mean))
+    return corr, beta
+
+# --- Cache ---
+def _load(path, assets):
+    try:
+        data = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    if list(data['assets']) != list(assets):
+        return None
+    return {
+        'ts': data['ts'], 'last_close': data['last_close'], 'returns': data['returns'],
+        'sum': data['sum'], 'cross': data['cross'], 'updates': int(data['updates']),
+        'corr': data['corr'], 'beta': data['beta'],
+    }
+
+def _save(path, assets, stats):
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, assets=np.array(assets), ts=stats['ts'], last_close=stats['last_close'],
+             returns=stats['returns'], sum=stats['sum'], cross=stats['cross'],
+             updates=stats['updates'], corr=stats['corr'], beta=stats['beta'])
+    os.replace(tmp_path, path)
+
+def get_market_stats(assets, path=STATS_FILE):
+    """Return (corr, beta) for `assets`, updating the cache only when a new bar closed"""
+    stats = _load(path, assets)
+    now_ms = int(time.time() * 1000)
+    if stats is not None and int(stats['ts']) + 2 * TIMEFRAME_MS > now_ms:
+        return stats['corr'], stats['beta']  # Nothing new has closed since last run
+
+    if stats is None:
+        ts, closes = _fetch_closes(assets)
+        if closes.shape[1] < 3:
+            return None, None
+        stats = _full_stats(_log_returns(closes))
+    else:
+        ts, closes = _fetch_closes(assets, since_ms=int(stats['ts']) + 1, limit=CORR_WINDOW)
+        if closes.shape[1] == 0:
+            return stats['corr'], stats['beta']
+        closes = np.concatenate([stats['last_close'][:, None], closes], axis=1)
+        stats = _roll_stats(stats, _log_returns(closes))
+
+    stats['ts'] = np.int64(ts[-1])
+    stats['last_close'] = closes[:, -1]
+    stats['corr'], stats['beta'] = correlation_and_beta(stats)
+    _save(path, assets, stats)
+    return stats['corr'], stats['beta']
+
+# --- Signal Weighting ---
+def correlation_weights(corr):
+    """Weight each asset by 1 / (sum of its positive correlations).
+
+    Four perfectly correlated assets count as one independent vote in total,
+    four uncorrelated assets count as four.
+    """
+    return 1.0 / np.clip(corr, 0.0, None).sum(axis=1)
@@ -1,32 +1,89 @@
 #!/usr/bin/env python3
-import pandas as pd
+import csv
 import subprocess
 import os
+import sys
+import time
 from datetime import datetime
 
-# Paths to the individual strategy logs
-LOGS = {
-    'BTC': '/home/ironman/.openclaw/workspace/btc_strategy_history.csv',
-    'ETH': '/home/ironman/.openclaw/workspace/eth_strategy_history.csv',
-    'SOL': '/home/ironman/.openclaw/workspace/sol_strategy_history.csv',
-    'XRP': '/home/ironman/.openclaw/workspace/xrp_strategy_history.csv'
-}
+import numpy as np
+
+from market_correlation import correlation_weights, get_market_stats
+from signal_bus import read_snapshot, wait_for_reports
+from strategy_config import asset_files, load_config
+
+# Paths to the individual strategy logs (assets listed in strategy_config.json)
+LOGS = {asset: asset_files(asset)['csv_file'] for asset in load_config()['director_assets']}
 GROUP_ID = '-1003787617512'
+REPORT_MAX_AGE_SEC = 1800  # Bus entries older than this belong to a previous cycle
+STRONG_SHARE = 0.75        # Share of correlation-weighted votes needed for a STRONG call
+
+def _read_tail_line(f, chunk_size=4096):
+    """Return the last non-empty line of a binary file by seeking backwards from EOF"""
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    buf = b""
+    while pos > 0:
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+        stripped = buf.rstrip(b"\r\n")
+        nl = stripped.rfind(b"\n")
+        if nl != -1:
+            return stripped[nl + 1:]
+    return buf.rstrip(b"\r\n")
 
 def get_last_result(csv_path):
+    """Read only the header and the last record, so cost stays flat as history grows"""
     if not os.path.exists(csv_path):
         return None
     try:
-        df = pd.read_csv(csv_path)
-        if df.empty:
+        with open(csv_path, 'rb') as f:
+            header_line = f.readline()
+            if not header_line:
+                return None
+            last_line = _read_tail_line(f)
+        header = next(csv.reader([header_line.decode('utf-8')]))
+        values = next(csv.reader([last_line.decode('utf-8')]), [])
+        if not values or values == header:  # Header-only file
             return None
-        return df.iloc[-1].to_dict()
+        return dict(zip(header, values))
     except Exception as e:
         print(f"Error reading {csv_path}: {e}")
         return None
 
-def determine_market_sentiment(results):
-    signals = [r['Signal'] for r in results.values() if r]
+def get_bus_results(wait_sec=0):
+    """Latest per-asset results from the signal bus, in the CSV row layout"""
+    if wait_sec > 0:
+        snapshot = wait_for_reports(list(LOGS), REPORT_MAX_AGE_SEC, wait_sec)
+    else:
+        snapshot = read_snapshot()
+    now = time.time()
+    results = {}
+    for asset in LOGS:
+        entry = snapshot.get(asset)
+        if entry and now - entry['timestamp'] <= REPORT_MAX_AGE_SEC:
+            price = entry['price']
+            results[asset] = {
+                'Signal': entry['signal'],
+                f'{asset} Price': f"{price:.2f}" if price >= 1 else f"{price:.4f}",
+                'Score': entry['score'],
+            }
+    return results
+
+def get_correlation():
+    """Cached rolling correlation matrix for the assets in LOGS (None if unavailable)"""
+    try:
+        corr, _beta = get_market_stats(list(LOGS))
+        return corr
+    except Exception as e:
+        print(f"Correlation update failed: {e}")
+        return None
+
+def determine_market_sentiment(results, corr=None):
+    assets = [a for a, r in results.items() if r]
+    signals = [results[a]['Signal'] for a in assets]
     if not signals:
         return "⚠️ No Data", "Waiting for orchestra members to report."
     
@@ -35,20 +92,38 @@ def determine_market_sentiment(results):
     neutrals = signals.count('NEUTRAL')
     total = len(signals)
 
-    if longs >= 3:
-        return "🚀 STRONG BULLISH", f"{longs}/{total} assets are signaling LONG. Strong market momentum."
-    elif shorts >= 3:
-        return "📉 STRONG BEARISH", f"{shorts}/{total} assets are signaling SHORT. High selling pressure."
-    elif longs > shorts:
-        return "⚖️ BULLISH BIAS", "Market leaning bullish. Correlation is building."
-    elif shorts > longs:
-        return "⚖️ BEARISH BIAS", "Market leaning bearish. Correlation is building."
+    # Correlated assets share one vote: three assets moving as one count less than three independent ones
+    weights = np.ones(total)
+    if corr is not None:
+        idx = [list(LOGS).index(a) for a in assets]
+        weights = correlation_weights(corr[np.ix_(idx, idx)])
+    total_w = weights.sum()
+    long_w = sum(w for w, sig in zip(weights, signals) if sig == 'LONG')
+    short_w = sum(w for w, sig in zip(weights, signals) if sig == 'SHORT')
+    votes = f"{long_w:.1f} long vs {short_w:.1f} short of {total_w:.1f} independent votes"
+    if corr is not None and total > 1:
+        avg_corr = (corr[np.ix_(idx, idx)].sum() - total) / (total * (total - 1))
+        votes += f", avg correlation {avg_corr:.2f}"
+
+    if longs >= 3 and long_w >= STRONG_SHARE * total_w:
+        return "🚀 STRONG BULLISH", f"{longs}/{total} assets are signaling LONG ({votes}). Strong market momentum."
+    elif shorts >= 3 and short_w >= STRONG_SHARE * total_w:
+        return "📉 STRONG BEARISH", f"{shorts}/{total} assets are signaling SHORT ({votes}). High selling pressure."
+    elif long_w > short_w:
+        return "⚖️ BULLISH BIAS", f"Market leaning bullish ({votes})."
+    elif short_w > long_w:
+        return "⚖️ BEARISH BIAS", f"Market leaning bearish ({votes})."
     else:
         return "💤 NEUTRAL", "Market is sideways or contradictory. Waiting for clear trend."
 
 def main():
-    results = {asset: get_last_result(path) for asset, path in LOGS.items()}
-    sentiment, insight = determine_market_sentiment(results)
+    # Usage: market_director.py [--wait SECONDS] -- run as soon as every asset has reported
+    wait_sec = float(sys.argv[sys.argv.index('--wait') + 1]) if '--wait' in sys.argv else 0
+    results = get_bus_results(wait_sec)
+    for asset, path in LOGS.items():
+        if asset not in results:
+            results[asset] = get_last_result(path)
+    sentiment, insight = determine_market_sentiment(results, get_correlation())
     
     signal_summary = ""
     for asset, data in results.items():
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Shared news sentiment pipeline.
+
+Articles are scored once, in batches, and their feature vectors are cached on
+disk so later runs (and the other asset scripts) only score what is new. The
+aggregate is a time-decayed average that is updated incrementally: existing
+sums are decayed to the new reference time and the new articles are added.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+ARTICLE_CACHE_FILE = '/home/ironman/.openclaw/workspace/sentiment_articles.json'
+NEWS_TTL_SEC = 900          # One news pass is shared by every asset for 15 minutes
+HALF_LIFE_HOURS = 6.0       # Article weight halves every 6 hours
+MAX_ARTICLE_AGE_HOURS = 48  # Older articles are dropped from the cache
+SEEN_RETENTION_HOURS = 7 * 24  # Ids stay known this long after eviction so a re-listed article never counts twice
+SENTIMENT_THRESHOLD = 0.2   # Same as the 1.5x bullish/bearish ratio used by the oracle
+STRONG_THRESHOLD = 0.5
+
+BULLISH_KEYWORDS = ['bull', 'rise', 'growth', 'positive', 'optimistic', 'rally', 'surge', 'moon', 'bullish', 'green', 'gain']
+BEARISH_KEYWORDS = ['bear', 'fall', 'drop', 'negative', 'pessimistic', 'crash', 'dump', 'bearish', 'red', 'decline', 'loss']
+
+ASSET_KEYWORDS = {
+    'BTC': ['bitcoin', 'btc'],
+    'ETH': ['ethereum', 'eth', 'ether'],
+    'SOL': ['solana', 'sol'],
+    'XRP': ['xrp', 'ripple'],
+}
+
+# --- Feature Extraction ---
+def article_id(article):
+    """Stable id for an article (URL when present, otherwise title)"""
+    key = article.get('url') or article.get('title') or ''
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def parse_published(value, default_ts):
+    """Convert an ISO string or epoch (s/ms) into epoch seconds"""
+    if value in (None, ''):
+        return default_ts
+    if isinstance(value, (int, float)):
+        ts = float(value)
+        return ts / 1000.0 if ts >= 1e12 else ts
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return default_ts
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def _count_keywords(text, keywords):
+    return {k: text.count(k) for k in keywords if k in text}
+
+def extract_features(articles, fetched_at=None):
+    """Score a batch of articles into per-article feature vectors"""
+    fetched_at = fetched_at or time.time()
+    features = {}
+    for article in articles:
+        text = (article.get('title', '') + " " + article.get('content', '')).lower()
+        bullish = _count_keywords(text, BULLISH_KEYWORDS)
+        bearish = _count_keywords(text, BEARISH_KEYWORDS)
+        bull_total = sum(bullish.values())
+        bear_total = sum(bearish.values())
+        hits = bull_total + bear_total
+        words = set(re.findall(r'[a-z0-9]+', text))
+        features[article_id(article)] = {
+            'title': article.get('title', '')[:120],
+            'source': article.get('source', 'web'),
+            'published': parse_published(article.get('published') or article.get('timestamp'), fetched_at),
+            'bullish': bullish,
+            'bearish': bearish,
+            'score': (bull_total - bear_total) / hits if hits else 0.0,
+            'assets': [a for a, asset_words in ASSET_KEYWORDS.items() if any(w in words for w in asset_words)],
+        }
+    return features
+
+# --- Cache ---
+def _empty_cache():
+    return {'last_fetch': 0.0, 'as_of': 0.0, 'status': 'unknown', 'articles': {}, 'seen': {}, 'sums': {}}
+
+def load_cache(path=ARTICLE_CACHE_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return _empty_cache()
+
+def save_cache(cache, path=ARTICLE_CACHE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+# --- Time-Decayed Aggregate ---
+def _decay(age_hours, half_life=HALF_LIFE_HOURS):
+    return 0.5 ** (max(age_hours, 0.0) / half_life)
+
+def update_aggregate(cache, new_features, now=None, half_life=HALF_LIFE_HOURS):
+    """Decay the running sums to `now` and fold in the new articles.
+
+    Sums are kept per asset plus an 'ALL' bucket so every asset can read its
+    own view from the same news pass.
+    """
+    now = now or time.time()
+    as_of = cache.get('as_of') or now
+    factor = _decay((now - as_of) / 3600.0, half_life)
+    sums = cache.setdefault('sums', {})
+    for bucket in sums.values():
+        bucket['num'] *= factor
+        bucket['den'] *= factor
+
+    for feat in new_features.values():
+        weight = _decay((now - feat['published']) / 3600.0, half_life)
+        for key in ['ALL'] + feat['assets']:
+            bucket = sums.setdefault(key, {'num': 0.0, 'den': 0.0})
+            bucket['num'] += weight * feat['score']
+            bucket['den'] += weight
+    cache['as_of'] = now
+    cache['articles'].update(new_features)
+    seen = cache.setdefault('seen', {})
+    for key in new_features:
+        seen[key] = now
+
+    # Expired articles keep contributing ~0 weight to the sums; just forget them.
+    # Their ids stay in `seen`, which outlives them, so a source listing them again is ignored
+    cutoff = now - MAX_ARTICLE_AGE_HOURS * 3600
+    cache['articles'] = {k: v for k, v in cache['articles'].items() if v['published'] >= cutoff}
+    seen_cutoff = now - SEEN_RETENTION_HOURS * 3600
+    cache['seen'] = {k: t for k, t in seen.items() if t >= seen_cutoff}
+    return cache
+
+def summarize(cache, asset='ALL'):
+    """Build a sentiment dict compatible with integrate_sentiment_analysis"""
+    sums = cache.get('sums', {})
+    if asset not in sums:
+        asset = 'ALL'  # No asset-specific coverage yet, fall back to general crypto news
+    bucket = sums.get(asset)
+    if not bucket or bucket['den'] <= 1e-9:
+        return None
+    score = bucket['num'] / bucket['den']
+    if score >= SENTIMENT_THRESHOLD:
+        sentiment = 'BULLISH'
+    elif score <= -SENTIMENT_THRESHOLD:
+        sentiment = 'BEARISH'
+    else:
+        sentiment = 'NEUTRAL'
+    strength = 'STRONG' if abs(score) >= STRONG_THRESHOLD else 'MODERATE'
+
+    articles = [a for a in cache['articles'].values() if asset == 'ALL' or asset in a['assets']]
+    articles.sort(key=lambda a: a['published'], reverse=True)
+    keyword_totals = {}
+    for a in articles:
+        for k, n in list(a['bullish'].items()) + list(a['bearish'].items()):
+            keyword_totals[k] = keyword_totals.get(k, 0) + n
+    factors = sorted(keyword_totals, key=keyword_totals.get, reverse=True)
+
+    return {
+        "sentiment": sentiment,
+        "strength": strength,
+        "score": round(score, 3),
+        "factors": factors[:5],
+        "impact": "HIGH" if strength == 'STRONG' else "MEDIUM",
+        "events": [a['title'][:50] for a in articles[:2]] or ["News analysis"],
+        "articles_count": len(articles),
+        "effective_weight": round(bucket['den'], 3),
+        "status": cache.get('status', 'unknown'),  # Of the news pass behind the sums, also on a cache hit
+    }
+
+def score_adjustment(sentiment_data):
+    """Points a sentiment summary adds to a technical score: +-1 when STRONG, +-0.5 when MODERATE"""
+    if not sentiment_data:
+        return 0
+    step = {'STRONG': 1, 'MODERATE': 0.5}.get(sentiment_data.get('strength'), 0)
+    return {'BULLISH': step, 'BEARISH': -step}.get(sentiment_data.get('sentiment'), 0)
+
+# --- Shared News Pass ---
+def get_shared_sentiment(asset, fetch_news, path=ARTICLE_CACHE_FILE, ttl=NEWS_TTL_SEC):
+    """Return the decayed sentiment for `asset`, fetching news at most once per ttl.
+
+    `fetch_news` is only called when the shared cache is stale; concurrent
+    runs serialize on a lock file so only one of them hits the network. It
+    returns the articles, or (articles, status) to record where they came from.
+    """
+    with open(f"{path}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        cache = load_cache(path)
+        now = time.time()
+        new_features = {}
+        if now - cache.get('last_fetch', 0.0) >= ttl:
+            try:
+                articles = fetch_news() or []
+                status = 'unknown'
+                if isinstance(articles, tuple):
+                    articles, status = articles
+            except Exception as e:
+                print(f"News fetch failed: {e}")
+                articles, status = [], 'error'
+            articles = articles or []
+            known = cache['articles']
+            # Caches written before `seen` existed: everything still cached has been counted
+            seen = cache.setdefault('seen', {k: v['published'] for k, v in known.items()})
+            fresh = [a for a in articles if article_id(a) not in seen and article_id(a) not in known]
+            new_features = extract_features(fresh, now)
+            if new_features or not known:  # A failed or empty pass leaves the cached sums as they were
+                cache['status'] = status
+            cache['last_fetch'] = now
+        update_aggregate(cache, new_features, now)
+        save_cache(cache, path)
+    return summarize(cache, asset)
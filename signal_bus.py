@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""mmap-backed signal bus shared by the asset strategies and market_director.
+
+The bus is a small fixed-size file (in /dev/shm when available) holding one
+slot per asset. Strategies publish their latest result into their slot and the
+director reads a consistent snapshot of all slots without parsing any CSV.
+
+Each slot is guarded by a sequence counter (seqlock): the writer makes it odd
+while writing and even when done, and readers retry if the counter changed or
+was odd while they copied the slot. Writers additionally take an flock so two
+publishers never interleave.
+"""
+import fcntl
+import mmap
+import os
+import struct
+import time
+
+BUS_FILE = '/dev/shm/openclaw_signal_bus' if os.path.isdir('/dev/shm') else '/home/ironman/.openclaw/workspace/signal_bus.bin'
+MAX_SLOTS = 256
+INDICATOR_KEYS = ['RSI', 'MACD', 'ATR', 'BB_Upper', 'BB_Lower', 'EMA_50', 'EMA_200']
+
+# seq, asset, signal, timestamp, price, score, indicators...
+SLOT_STRUCT = struct.Struct('<Q16s8sddd' + 'd' * len(INDICATOR_KEYS))
+SEQ_STRUCT = struct.Struct('<Q')
+BUS_SIZE = SLOT_STRUCT.size * MAX_SLOTS
+
+def _open_bus(path, writable):
+    if writable:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(fd).st_size < BUS_SIZE:
+            os.ftruncate(fd, BUS_SIZE)
+    else:
+        fd = os.open(path, os.O_RDONLY)
+    try:
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        return fd, mmap.mmap(fd, BUS_SIZE, access=access)
+    except Exception:
+        os.close(fd)
+        raise
+
+def _read_slot(buf, idx, retries=100):
+    """Copy one slot consistently using its sequence counter"""
+    offset = idx * SLOT_STRUCT.size
+    for _ in range(retries):
+        seq1 = SEQ_STRUCT.unpack_from(buf, offset)[0]
+        if seq1 & 1:
+            time.sleep(0)
+            continue
+        fields = SLOT_STRUCT.unpack_from(buf, offset)
+        seq2 = SEQ_STRUCT.unpack_from(buf, offset)[0]
+        if seq1 == seq2:
+            return fields
+    return None
+
+def _slot_name(fields):
+    return fields[1].rstrip(b'\0').decode('utf-8', errors='ignore')
+
+# --- Publishing ---
+def publish(asset, result, path=BUS_FILE):
+    """Write a strategy result into the asset's slot"""
+    name = asset.upper().encode('utf-8')[:16]
+    indicators = result.get('indicators', {})
+    fd, buf = _open_bus(path, writable=True)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        idx = None
+        for i in range(MAX_SLOTS):
+            slot_name = buf[i * SLOT_STRUCT.size + 8:i * SLOT_STRUCT.size + 24].rstrip(b'\0')
+            if slot_name == name:
+                idx = i
+                break
+            if idx is None and not slot_name:
+                idx = i
+        if idx is None:
+            raise RuntimeError(f"signal bus full ({MAX_SLOTS} slots)")
+        offset = idx * SLOT_STRUCT.size
+        seq = SEQ_STRUCT.unpack_from(buf, offset)[0]
+        SEQ_STRUCT.pack_into(buf, offset, seq + 1)  # Odd: write in progress
+        SLOT_STRUCT.pack_into(
+            buf, offset, seq + 1, name,
+            str(result.get('signal', 'NEUTRAL')).encode('utf-8')[:8],
+            float(result.get('timestamp') or time.time()),
+            float(result.get('price', 0.0)),
+            float(result.get('score', 0.0)),
+            *[float(indicators.get(k, float('nan'))) for k in INDICATOR_KEYS]
+        )
+        SEQ_STRUCT.pack_into(buf, offset, seq + 2)  # Even: slot consistent
+        buf.flush()
+    finally:
+        buf.close()
+        os.close(fd)
+
+# --- Reading ---
+def read_snapshot(path=BUS_FILE):
+    """Return {asset: {signal, score, price, indicators, timestamp}} for all slots"""
+    try:
+        fd, buf = _open_bus(path, writable=False)
+    except (OSError, ValueError):
+        return {}
+    snapshot = {}
+    try:
+        for i in range(MAX_SLOTS):
+            fields = _read_slot(buf, i)
+            if fields is None:
+                continue
+            name = _slot_name(fields)
+            if not name:
+                break  # Slots are filled in order, first empty slot ends the bus
+            snapshot[name] = {
+                "signal": fields[2].rstrip(b'\0').decode('utf-8', errors='ignore'),
+                "timestamp": fields[3],
+                "price": fields[4],
+                "score": fields[5],
+                "indicators": dict(zip(INDICATOR_KEYS, fields[6:])),
+            }
+    finally:
+        buf.close()
+        os.close(fd)
+    return snapshot
+
+def wait_for_reports(assets, max_age_sec, timeout_sec, poll_sec=1.0, path=BUS_FILE):
+    """Block until every asset has published within max_age_sec (or timeout).
+
+    Returns the last snapshot either way; callers check timestamps to see
+    which assets are still missing.
+    """
+    deadline = time.time() + timeout_sec
+    while True:
+        snapshot = read_snapshot(path)
+        now = time.time()
+        ready = all(a in snapshot and now - snapshot[a]['timestamp'] <= max_age_sec for a in assets)
+        if ready or now >= deadline:
+            return snapshot
+        time.sleep(poll_sec)
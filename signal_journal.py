@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Typed, indexed signal journal.
+
+Each strategy action is appended as one fixed-width binary record (see
+JOURNAL_DTYPE), so values keep full float64 precision and appends are a single
+small write. Records are written in time order, which makes the `ts` column a
+sorted index: range queries are a binary search over a read-only memmap
+instead of a linear scan of a CSV. The *_history.csv files remain available as
+a human-readable export (see export_csv).
+"""
+import csv
+import fcntl
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+WORKSPACE = '/home/ironman/.openclaw/workspace'
+
+JOURNAL_DTYPE = np.dtype([
+    ('ts', '<i8'),            # Epoch milliseconds (UTC)
+    ('price', '<f8'),
+    ('signal', 'S8'),
+    ('action', 'S24'),
+    ('entry_price', '<f8'),   # NaN when not applicable
+    ('exit_price', '<f8'),
+    ('profit', '<f8'),
+    ('stop_level', '<f8'),
+    ('rsi', '<f8'),
+    ('macd', '<f8'),
+    ('atr', '<f8'),
+    ('bb_lower', '<f8'),
+    ('bb_upper', '<f8'),
+    ('reasons', 'S256'),      # UTF-8, truncated to fit
+])
+
+FLOAT_FIELDS = ['price', 'entry_price', 'exit_price', 'profit', 'stop_level',
+                'rsi', 'macd', 'atr', 'bb_lower', 'bb_upper']
+INDICATOR_FIELDS = {'RSI': 'rsi', 'MACD': 'macd', 'ATR': 'atr', 'BB_Lower': 'bb_lower', 'BB_Upper': 'bb_upper'}
+
+def journal_path(asset):
+    return f"{WORKSPACE}/{asset.lower()}_signal_journal.bin"
+
+def _to_float(value):
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_bytes(value, size):
+    return str(value or "").encode('utf-8')[:size]
+
+# --- Writing ---
+def make_record(price, signal, action, entry_price=None, exit_price=None, profit=None,
+                stop_level=None, reasons=None, indicators=None, ts=None):
+    rec = np.zeros(1, dtype=JOURNAL_DTYPE)
+    rec['ts'] = int(ts if ts is not None else time.time() * 1000)
+    rec['price'] = _to_float(price)
+    rec['signal'] = _to_bytes(signal, 8)
+    rec['action'] = _to_bytes(action, 24)
+    rec['entry_price'] = _to_float(entry_price)
+    rec['exit_price'] = _to_float(exit_price)
+    rec['profit'] = _to_float(profit)
+    rec['stop_level'] = _to_float(stop_level)
+    for key, field in INDICATOR_FIELDS.items():
+        rec[field] = _to_float((indicators or {}).get(key))
+    rec['reasons'] = _to_bytes("; ".join(reasons or []), 256)
+    return rec
+
+def append_record(path, record):
+    """Append one record under an exclusive lock.
+
+    A writer that died mid-write leaves a torn tail; it is cut back to a whole
+    number of records first, otherwise every later record would be misaligned.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        size = os.fstat(fd).st_size
+        torn = size % JOURNAL_DTYPE.itemsize
+        if torn:
+            os.ftruncate(fd, size - torn)
+        os.write(fd, record.tobytes())
+    finally:
+        os.close(fd)  # Releases the lock
+
+# --- Reading ---
+def open_journal(path):
+    """Read-only memmap of all complete records (empty array if none)"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return np.zeros(0, dtype=JOURNAL_DTYPE)
+    count = size // JOURNAL_DTYPE.itemsize  # Ignore a torn trailing record
+    if count == 0:
+        return np.zeros(0, dtype=JOURNAL_DTYPE)
+    return np.memmap(path, dtype=JOURNAL_DTYPE, mode='r', shape=(count,))
+
+def query_range(path, start_ms=None, end_ms=None):
+    """Records with start_ms <= ts < end_ms, located by binary search on ts"""
+    journal = open_journal(path)
+    ts = journal['ts']
+    lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side='left'))
+    hi = len(journal) if end_ms is None else int(np.searchsorted(ts, end_ms, side='left'))
+    return journal[lo:hi]
+
+def query_last(path, hours):
+    """Records from the last `hours` hours (e.g. last 24h of actions)"""
+    return query_range(path, start_ms=int((time.time() - hours * 3600) * 1000))
+
+def last_record(path):
+    journal = open_journal(path)
+    return journal[-1] if len(journal) else None
+
+def record_to_dict(rec):
+    row = {'ts': int(rec['ts'])}
+    for field in FLOAT_FIELDS:
+        row[field] = float(rec[field])
+    for field in ('signal', 'action', 'reasons'):
+        row[field] = rec[field].decode('utf-8', errors='ignore')
+    return row
+
+# --- CSV Export View ---
+def _fmt(value, decimals=2):
+    return "" if np.isnan(value) else f"{value:.{decimals}f}"
+
+def export_csv(path, csv_path, price_label, decimals=2):
+    """Write the journal as the legacy *_history.csv layout for humans"""
+    fieldnames = ['Date', price_label, 'Signal', 'Action', 'Entry Price',
+                  'Exit Price', 'Profit (USDT)', 'Stop Loss Level', 'Reasons',
+                  'RSI', 'MACD', 'ATR', 'BB_Lower', 'BB_Upper']
+    journal = open_journal(path)
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for rec in journal:
+            row = record_to_dict(rec)
+            writer.writerow({
+                'Date': datetime.fromtimestamp(row['ts'] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
+                price_label: _fmt(row['price'], decimals),
+                'Signal': row['signal'],
+                'Action': row['action'],
+                'Entry Price': _fmt(row['entry_price'], decimals),
+                'Exit Price': _fmt(row['exit_price'], decimals),
+                'Profit (USDT)': _fmt(row['profit']),
+                'Stop Loss Level': _fmt(row['stop_level'], decimals),
+                'Reasons': row['reasons'],
+                'RSI': _fmt(row['rsi']),
+                'MACD': _fmt(row['macd']),
+                'ATR': _fmt(row['atr']),
+                'BB_Lower': _fmt(row['bb_lower'], decimals),
+                'BB_Upper': _fmt(row['bb_upper'], decimals),
+            })
+    return len(journal)
+
+if __name__ == "__main__":
+    # Usage: signal_journal.py <asset> [hours] | signal_journal.py <asset> --export-csv <csv_path>
+    if len(sys.argv) < 2:
+        print("Usage: signal_journal.py <asset> [hours] | <asset> --export-csv <csv_path>")
+        sys.exit(1)
+    asset = sys.argv[1].upper()
+    path = journal_path(asset)
+    if len(sys.argv) >= 4 and sys.argv[2] == '--export-csv':
+        n = export_csv(path, sys.argv[3], f"{asset} Price")
+        print(f"Exported {n} records to {sys.argv[3]}")
+    else:
+        hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+        for rec in query_last(path, hours):
+            row = record_to_dict(rec)
+            when = datetime.fromtimestamp(row['ts'] / 1000).strftime("%Y-%m-%d %H:%M")
+            print(f"{when} {row['action']:<24} {row['signal']:<8} {row['price']:.4f}")
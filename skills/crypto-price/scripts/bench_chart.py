@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Time _build_chart on synthetic candles (default: 7d of 5m candles with volume).
+
+Usage: bench_chart.py [candles] [runs]
+"""
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import get_price_chart
+
+
+def synthetic_candles(count, candle_minutes=5, seed=7):
+    rng = random.Random(seed)
+    start_ms = int(time.time() * 1000) - count * candle_minutes * 60_000
+    price = 100.0
+    rows = []
+    for i in range(count):
+        open_price = price
+        close_price = open_price * math.exp(rng.gauss(0, 0.004))
+        high_price = max(open_price, close_price) * (1 + abs(rng.gauss(0, 0.002)))
+        low_price = min(open_price, close_price) * (1 - abs(rng.gauss(0, 0.002)))
+        volume = abs(rng.gauss(1000, 300))
+        rows.append((start_ms + i * candle_minutes * 60_000, open_price, high_price, low_price, close_price, volume))
+        price = close_price
+    return rows
+
+
+def bench(rows, use_gradient, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        path = get_price_chart._build_chart("BENCH", rows, "usd", "7d", use_gradient)
+        timings.append(time.perf_counter() - start)
+        if path and os.path.exists(path):
+            os.remove(path)
+    return timings
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2016
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rows = synthetic_candles(count)
+    bench(rows[:50], False, 1)  # Warm up imports and font registration
+    for use_gradient in (False, True):
+        timings = bench(rows, use_gradient, runs)
+        mode = "gradient" if use_gradient else "default"
+        print(f"{mode:<8} {count} candles: median {statistics.median(timings):.3f}s  min {min(timings):.3f}s ({runs} runs)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Optional long-lived chart worker for get_price_chart.py.
+
+`chart_worker.py serve` listens on a local Unix socket with matplotlib, the
+Tomorrow font and the chart style already loaded, and serves requests on
+threads: data fetching runs concurrently and rendering is serialized by the
+chart lock in get_price_chart. Each request is one JSON line
+{"argv": [...]} and the reply is one JSON line with exactly the payload
+get_price_chart.py prints.
+
+get_price_chart.py forwards to the worker whenever the socket answers (set
+CRYPTO_CHART_WORKER=0 to bypass it) and falls back to running in-process
+otherwise, so the wrapper skills need no changes.
+
+Usage:
+  python3 chart_worker.py serve            # start the worker
+  python3 chart_worker.py BTC 12h          # thin client (same output as get_price_chart.py)
+"""
+import json
+import os
+import socket
+import socketserver
+import sys
+
+SOCKET_PATH = os.environ.get("CRYPTO_CHART_SOCKET", "/tmp/crypto_price_chart.sock")
+REQUEST_TIMEOUT_SEC = 120
+
+
+def request(argv, socket_path=SOCKET_PATH, timeout=REQUEST_TIMEOUT_SEC):
+    """Payload from the running worker, or None when no worker is listening"""
+    return _exchange({"argv": list(argv)}, socket_path, timeout)
+
+
+def ping(socket_path=SOCKET_PATH):
+    return _exchange({"ping": True}, socket_path, timeout=2) is not None
+
+
+def _exchange(message, socket_path, timeout):
+    if not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None  # Stale socket file: no worker behind it
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    except socket.timeout:
+        return {"error": "chart worker timed out", "details": f"no reply within {timeout}s"}
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    if not line:
+        return None  # Worker went away mid-request; the caller runs locally
+    return json.loads(line)
+
+
+class _ChartHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        import get_price_chart
+        line = self.rfile.readline()
+        try:
+            message = json.loads(line)
+            if message.get("ping"):
+                result = {"ok": True, "pid": os.getpid()}
+            else:
+                result = get_price_chart.run([str(arg) for arg in message.get("argv", [])])
+        except Exception as exc:
+            result = {"error": "chart worker failed", "details": str(exc)}
+        self.wfile.write((json.dumps(result, ensure_ascii=True) + "\n").encode("utf-8"))
+
+
+class ChartServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _warm_up():
+    """Pay matplotlib import, font registration and first-figure costs before serving"""
+    import get_price_chart
+    plt = get_price_chart._load_matplotlib()[0]
+    fig, ax = plt.subplots(figsize=(8, 8), facecolor="#121212")
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def serve(socket_path=SOCKET_PATH):
+    if os.path.exists(socket_path):
+        if ping(socket_path):
+            print(f"chart worker already running on {socket_path}")
+            return 1
+        os.unlink(socket_path)
+    _warm_up()
+    server = ChartServer(socket_path, _ChartHandler)
+    os.chmod(socket_path, 0o600)
+    print(f"chart worker listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    return 0
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        return serve()
+    result = request(sys.argv[1:])
+    if result is None:
+        import get_price_chart
+        result = get_price_chart.run(sys.argv[1:])
+    print(json.dumps(result, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
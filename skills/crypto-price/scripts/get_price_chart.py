@@ -1,37 +1,50 @@
 #!/usr/bin/env python3
+import hashlib
 import json
 import math
 import re
 import os
 import sys
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 DEFAULT_HOURS = 24
 CANDLE_MINUTES = 15
 CACHE_TTL_SEC = 300
+BATCH_WORKERS = 8
 COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price?ids={id}&vs_currencies={currency}"
 COINGECKO_OHLC_URL = "https://api.coingecko.com/api/v3/coins/{id}/ohlc?vs_currency={currency}&days=1"
 COINGECKO_SEARCH_URL = "https://api.coingecko.com/api/v3/search?query={query}"
 COINGECKO_MARKET_CHART_URL = "https://api.coingecko.com/api/v3/coins/{id}/market_chart?vs_currency={currency}&days=1"
 COINGECKO_MARKET_CHART_DAYS_URL = "https://api.coingecko.com/api/v3/coins/{id}/market_chart?vs_currency={currency}&days={days}"
 HYPERLIQUID_INFO_URL = "https://api.hyperliquid.xyz/info"
+HL_FEED_DIR = os.environ.get("HL_FEED_DIR", "/dev/shm/openclaw_hl_feed")  # Written by hl_feed.py when it runs
+HL_FEED_STALE_SEC = 15
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
 
 TOKEN_ID_MAP = {
     "HYPE": "hyperliquid",
     "HYPERLIQUID": "hyperliquid",
 }
 
+_CHART_LOCK = threading.Lock()  # pyplot state is global; the chart worker renders one figure at a time
+_PLOT_MODULES = None
+_HL_LOCK = threading.Lock()
+_HL_UNIVERSE = None  # (loaded_at, universe, ctxs, index)
+_DATA_SOURCES = None  # data_sources module, or False when unavailable
+_DATA_SOURCES_LOCK = threading.Lock()
 
-def _json_error(message, details=None):
+
+def _error_payload(message, details=None):
     payload = {"error": message}
     if details:
         payload["details"] = details
-    print(json.dumps(payload))
-    return 0
+    return payload
 
 
 def _cache_path(prefix, token_id):
@@ -55,80 +68,62 @@ def _read_cache(path, max_age_sec):
 
 
 def _write_cache(path, payload):
+    # Write-then-rename so concurrent requests in the chart worker never read a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with open(path, "w", encoding="utf-8") as handle:
+        with open(tmp_path, "w", encoding="utf-8") as handle:
             json.dump(payload, handle)
+        os.replace(tmp_path, path)
     except OSError:
         return
 
 
+def _data_sources():
+    """The workspace data layer (pooled connections, shared backoff, latency metrics) when it sits
+    above this skill and aiohttp is installed; None falls back to plain urllib"""
+    global _DATA_SOURCES
+    if _DATA_SOURCES is None:
+        with _DATA_SOURCES_LOCK:  # Batch and chart-worker threads must all wait for the first import
+            if _DATA_SOURCES is None:
+                _DATA_SOURCES = _import_data_sources()
+    return _DATA_SOURCES or None
+
+
+def _import_data_sources():
+    if os.environ.get("CRYPTO_DATA_SOURCES", "1") == "0":
+        return False
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
+    try:
+        import aiohttp  # noqa: F401
+        import data_sources
+    except ImportError:
+        return False
+    return data_sources
+
+
 def _fetch_json(url):
-    req = urllib.request.Request(
+    data_sources = _data_sources()
+    if data_sources is not None:
+        return data_sources.fetch_json(url)
+    return _urlopen_json(urllib.request.Request(
         url,
         headers={"User-Agent": "clawdbot-crypto-price/1.0"},
-    )
-    retry_codes = {429, 502, 503, 504}
-    last_error = None
-    for attempt in range(3):
-        try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                raw = resp.read().decode("utf-8")
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError as exc:
-                raise RuntimeError("invalid JSON") from exc
-        except urllib.error.HTTPError as exc:
-            last_error = exc
-            if exc.code in retry_codes and attempt < 2:
-                time.sleep(2 * (attempt + 1))
-                continue
-            raise RuntimeError(str(exc)) from exc
-        except urllib.error.URLError as exc:
-            last_error = exc
-            if attempt < 2:
-                time.sleep(2 * (attempt + 1))
-                continue
-            raise RuntimeError(str(exc)) from exc
-    raise RuntimeError(str(last_error))
+    ))
 
 
 def _post_json(url, payload):
-    req = urllib.request.Request(
+    data_sources = _data_sources()
+    if data_sources is not None:
+        return data_sources.post_json(url, payload)
+    return _urlopen_json(urllib.request.Request(
         url,
         data=json.dumps(payload).encode("utf-8"),
         headers={"Content-Type": "application/json", "User-Agent": "clawdbot-crypto-price/1.0"},
-    )
-    retry_codes = {429, 502, 503, 504}
-    last_error = None
-    for attempt in range(3):
-        try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                raw = resp.read().decode("utf-8")
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError as exc:
-                raise RuntimeError("invalid JSON") from exc
-        except urllib.error.HTTPError as exc:
-            last_error = exc
-            if exc.code in retry_codes and attempt < 2:
-                time.sleep(2 * (attempt + 1))
-                continue
-            raise RuntimeError(str(exc)) from exc
-        except urllib.error.URLError as exc:
-            last_error = exc
-            if attempt < 2:
-                time.sleep(2 * (attempt + 1))
-                continue
-            raise RuntimeError(str(exc)) from exc
-    raise RuntimeError(str(last_error))
+    ))
 
 
-def _post_json(url, payload):
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json", "User-Agent": "clawdbot-crypto-price/1.0"},
-    )
+def _urlopen_json(req):
     retry_codes = {429, 502, 503, 504}
     last_error = None
     for attempt in range(3):
@@ -164,6 +159,24 @@ def _get_price(token_id, currency):
     return data
 
 
+def _get_prices(token_ids, currency):
+    """simple/price for many ids in one comma-joined request; also fills the per-id caches"""
+    token_ids = sorted(set(token_ids))
+    if not token_ids:
+        return {}
+    key = hashlib.sha1(",".join(token_ids).encode("utf-8")).hexdigest()[:16]
+    cache_path = _cache_path(f"prices_{currency}", key)
+    cached = _read_cache(cache_path, CACHE_TTL_SEC)
+    if cached is not None:
+        return cached
+    ids = urllib.parse.quote(",".join(token_ids), safe=",")
+    data = _fetch_json(COINGECKO_PRICE_URL.format(id=ids, currency=currency))
+    _write_cache(cache_path, data)
+    for token_id, entry in data.items():
+        _write_cache(_cache_path(f"price_{currency}", token_id), {token_id: entry})
+    return data
+
+
 def _get_ohlc(token_id, currency):
     cache_path = _cache_path(f"ohlc_{currency}", token_id)
     cached = _read_cache(cache_path, CACHE_TTL_SEC)
@@ -188,117 +201,39 @@ def _get_market_chart(token_id, currency, days):
     return data
 
 
-def _get_hyperliquid_meta():
-    cache_path = _cache_path("hyperliquid_meta", "meta")
-    cached = _read_cache(cache_path, CACHE_TTL_SEC)
-    if cached is not None:
-        return cached
-    data = _post_json(HYPERLIQUID_INFO_URL, {"type": "metaAndAssetCtxs"})
-    _write_cache(cache_path, data)
-    return data
-
-
-def _hyperliquid_lookup(symbol):
-    try:
-        meta, ctxs = _get_hyperliquid_meta()
-    except RuntimeError:
-        return None, None
-    universe = meta.get("universe", [])
-    mapping = {}
+def _build_hyperliquid_index(universe):
+    """Upper-case coin name -> position in the universe (and in the asset contexts)"""
+    index = {}
     for idx, entry in enumerate(universe):
         name = str(entry.get("name", "")).upper()
         if name:
-            mapping[name] = idx
-    idx = mapping.get(symbol.upper())
-    if idx is None or idx >= len(ctxs):
-        return None, None
-    return universe[idx], ctxs[idx]
-
-
-def _pick_hyperliquid_interval_minutes(total_minutes):
-    if total_minutes <= 180:
-        return 1
-    if total_minutes <= 360:
-        return 3
-    if total_minutes <= 720:
-        return 5
-    if total_minutes <= 1440:
-        return 15
-    if total_minutes <= 4320:
-        return 30
-    if total_minutes <= 10080:
-        return 60
-    if total_minutes <= 20160:
-        return 120
-    if total_minutes <= 40320:
-        return 240
-    if total_minutes <= 80640:
-        return 480
-    return 1440
-
-
-def _interval_minutes_to_str(minutes):
-    if minutes < 60:
-        return f"{int(minutes)}m"
-    hours = int(minutes / 60)
-    if hours < 24:
-        return f"{hours}h"
-    days = int(hours / 24)
-    return f"{days}d"
-
-
-def _get_hyperliquid_candles(symbol, total_minutes, interval_minutes):
-    now_ms = int(time.time() * 1000)
-    start_ms = now_ms - int(total_minutes * 60 * 1000)
-    payload = {
-        "type": "candleSnapshot",
-        "req": {
-            "coin": symbol.upper(),
-            "interval": _interval_minutes_to_str(interval_minutes),
-            "startTime": start_ms,
-            "endTime": now_ms,
-        },
-    }
-    data = _post_json(HYPERLIQUID_INFO_URL, payload)
-    candles = []
-    for row in data:
-        try:
-            ts_ms = int(row["t"])
-            open_price = float(row["o"])
-            high_price = float(row["h"])
-            low_price = float(row["l"])
-            close_price = float(row["c"])
-        except (KeyError, TypeError, ValueError):
-            continue
-        candles.append((ts_ms, open_price, high_price, low_price, close_price))
-    return candles
+            index[name] = idx
+    return index
 
 
-def _get_hyperliquid_meta():
-    cache_path = _cache_path("hyperliquid_meta", "meta")
-    cached = _read_cache(cache_path, CACHE_TTL_SEC)
-    if cached is not None:
-        return cached
-    data = _post_json(HYPERLIQUID_INFO_URL, {"type": "metaAndAssetCtxs"})
-    _write_cache(cache_path, data)
-    return data
-
+def _get_hyperliquid_universe():
+    """(universe, ctxs, index) for the current metaAndAssetCtxs snapshot.
 
-def _hyperliquid_lookup(symbol):
-    try:
-        meta, ctxs = _get_hyperliquid_meta()
-    except RuntimeError:
-        return None, None
-    universe = meta.get("universe", [])
-    mapping = {}
-    for idx, entry in enumerate(universe):
-        name = str(entry.get("name", "")).upper()
-        if name:
-            mapping[name] = idx
-    idx = mapping.get(symbol.upper())
-    if idx is None or idx >= len(ctxs):
-        return None, None
-    return universe[idx], ctxs[idx]
+    The index is built once per meta refresh and cached with the payload;
+    inside a long-lived process (chart worker) the decoded snapshot is also
+    kept in memory, and concurrent callers share a single refresh.
+    """
+    global _HL_UNIVERSE
+    with _HL_LOCK:
+        if _HL_UNIVERSE is not None and time.time() - _HL_UNIVERSE[0] <= CACHE_TTL_SEC:
+            return _HL_UNIVERSE[1:]
+        cache_path = _cache_path("hyperliquid_universe", "meta")
+        cached = _read_cache(cache_path, CACHE_TTL_SEC)
+        if cached is not None:
+            loaded_at = os.path.getmtime(cache_path) if os.path.exists(cache_path) else time.time()
+        else:
+            meta, ctxs = _post_json(HYPERLIQUID_INFO_URL, {"type": "metaAndAssetCtxs"})
+            universe = meta.get("universe", [])
+            cached = {"universe": universe, "ctxs": ctxs, "index": _build_hyperliquid_index(universe)}
+            _write_cache(cache_path, cached)
+            loaded_at = time.time()
+        _HL_UNIVERSE = (loaded_at, cached["universe"], cached["ctxs"], cached["index"])
+        return _HL_UNIVERSE[1:]
 
 
 def _pick_hyperliquid_interval_minutes(total_minutes):
@@ -333,9 +268,28 @@ def _interval_minutes_to_str(minutes):
     return f"{days}d"
 
 
+def _read_feed_candles(symbol, interval, start_ms):
+    """Candles from a running hl_feed.py snapshot, or None when the feed is down or lacks the window"""
+    try:
+        with open(os.path.join(HL_FEED_DIR, "feed.json"), "r", encoding="utf-8") as handle:
+            heartbeat = json.load(handle)
+        if not heartbeat.get("connected") or time.time() * 1000 - heartbeat["updated"] > HL_FEED_STALE_SEC * 1000:
+            return None
+        with open(os.path.join(HL_FEED_DIR, f"{symbol.upper()}_{interval}.json"), "r", encoding="utf-8") as handle:
+            rows = json.load(handle)["candles"]
+    except (OSError, ValueError, KeyError):
+        return None
+    if not rows or rows[0][0] > start_ms:
+        return None
+    return [tuple(row) for row in rows if row[0] >= start_ms]
+
+
 def _get_hyperliquid_candles(symbol, total_minutes, interval_minutes):
     now_ms = int(time.time() * 1000)
     start_ms = now_ms - int(total_minutes * 60 * 1000)
+    streamed = _read_feed_candles(symbol, _interval_minutes_to_str(interval_minutes), start_ms)
+    if streamed:
+        return streamed
     payload = {
         "type": "candleSnapshot",
         "req": {
@@ -525,22 +479,51 @@ def _timestamp_to_datetime(ts_value):
     return datetime.fromtimestamp(ts, tz=timezone.utc)
 
 
-def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
-    try:
+def _rect_verts(left, bottom, width, height):
+    """(n, 4, 2) corner arrays for n axis-aligned rectangles, for PolyCollection"""
+    import numpy as np
+    left, bottom, width, height = np.broadcast_arrays(left, bottom, width, height)
+    right = left + width
+    top = bottom + height
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([right, bottom]),
+        np.column_stack([right, top]),
+        np.column_stack([left, top]),
+    ], axis=1)
+
+
+def _load_matplotlib():
+    """Import matplotlib and register the Tomorrow font once per process"""
+    global _PLOT_MODULES
+    if _PLOT_MODULES is None:
         import matplotlib
         matplotlib.use("Agg")
         import matplotlib.pyplot as plt
         import matplotlib.dates as mdates
-        from matplotlib.lines import Line2D
-        from matplotlib.patches import Rectangle
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.colors import to_rgba_array
         import matplotlib.font_manager as fm
-        
+        import numpy as np
+
         # Load custom font
-        font_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'fonts', 'Tomorrow.ttf')
+        font_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fonts', 'Tomorrow.ttf')
         if os.path.exists(font_path):
             fm.fontManager.addfont(font_path)
             custom_font = fm.FontProperties(fname=font_path).get_name()
             plt.rcParams['font.family'] = custom_font
+        _PLOT_MODULES = (plt, mdates, LineCollection, PolyCollection, to_rgba_array, np)
+    return _PLOT_MODULES
+
+
+def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
+    with _CHART_LOCK:
+        return _render_chart(symbol, ohlc_rows, currency, label, use_gradient)
+
+
+def _render_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
+    try:
+        plt, mdates, LineCollection, PolyCollection, to_rgba_array, np = _load_matplotlib()
     except Exception:
         return None
 
@@ -562,126 +545,70 @@ def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
 
     times = [_timestamp_to_datetime(row[0]) for row in ohlc_rows]
     x_vals = mdates.date2num(times)
-    widths = []
     if len(x_vals) > 1:
-        delta = min(x_vals[i + 1] - x_vals[i] for i in range(len(x_vals) - 1))
-        widths = [delta * 0.7] * len(x_vals)
+        delta = float(np.diff(x_vals).min())
+        width = delta * 0.7
     else:
-        widths = [0.02] * len(x_vals)
+        width = 0.02
         delta = 0.02
 
-    lows = []
-    highs = []
-    volumes = []
-    colors = []
-    
+    n_candles = len(ohlc_rows)
+    open_prices, highs, lows, close_prices = np.array([row[1:5] for row in ohlc_rows], dtype=float).T
+    volumes = np.array([row[5] for row in ohlc_rows], dtype=float) if has_volume else None
+    is_bullish = close_prices >= open_prices
+    lower = np.minimum(open_prices, close_prices)
+    height = np.maximum(np.abs(close_prices - open_prices), 1e-9)
+    left = x_vals - width / 2
+
     # Pre-calculate fractals
     fractals = _find_fractals(ohlc_rows)
-    
-    # Build sets of indices for swing coloring (only used in default mode)
-    bullish_reversal_indices = set()
-    bearish_reversal_indices = set()
 
     # Always include absolute high/low candles in coloring
-    abs_high_idx = None
-    abs_low_idx = None
-    if ohlc_rows:
-        abs_high_idx = max(range(len(ohlc_rows)), key=lambda i: ohlc_rows[i][2])
-        abs_low_idx = min(range(len(ohlc_rows)), key=lambda i: ohlc_rows[i][3])
-
-    if not use_gradient:
-        for frac_idx, frac_type, frac_price in fractals:
+    abs_high_idx = int(np.argmax(highs))
+    abs_low_idx = int(np.argmin(lows))
+
+    # Wicks: one LineCollection instead of a Line2D per candle
+    wick_color = "#888888" if use_gradient else "#808080"
+    border_color = "#000000"
+    wicks = np.stack([np.column_stack([x_vals, lows]), np.column_stack([x_vals, highs])], axis=1)
+    ax.add_collection(LineCollection(wicks, colors=wick_color, linewidths=1.0,
+                                     capstyle="projecting", zorder=3))
+
+    if use_gradient:
+        # Gradient mode: green gradient up, blue-purple gradient down
+        colors = np.where(is_bullish[:, None], to_rgba_array("#84dc58"), to_rgba_array("#6c7ce4"))
+        color_top = np.where(is_bullish[:, None], [0x84, 0xdc, 0x58], [0x6c, 0x7c, 0xe4])  # Bright green / blue
+        color_bottom = np.where(is_bullish[:, None], [0x33, 0x6d, 0x16], [0x54, 0x49, 0x96])  # Dark green / purple
+
+        # Draw gradient candle bodies: n_segments stacked bands per candle, all in one collection
+        n_segments = 10
+        t = np.arange(n_segments) / (n_segments - 1)
+        seg_rgb = np.trunc(color_bottom[:, None, :] + (color_top - color_bottom)[:, None, :] * t[None, :, None]) / 255.0
+        seg_colors = np.concatenate([seg_rgb, np.ones((n_candles, n_segments, 1))], axis=2).reshape(-1, 4)
+        segment_height = height / n_segments
+        seg_y = lower[:, None] + np.arange(n_segments)[None, :] * segment_height[:, None]
+        seg_verts = _rect_verts(np.repeat(left, n_segments), seg_y.ravel(), width, np.repeat(segment_height, n_segments))
+        ax.add_collection(PolyCollection(seg_verts, facecolors=seg_colors, edgecolors="none", zorder=4))
+        ax.add_collection(PolyCollection(_rect_verts(left, lower, width, height), facecolors="none",
+                                         edgecolors=border_color, linewidths=0.5, zorder=5))
+    else:
+        # Default mode: Grey + Cyan/Magenta for swings (3 candles from each swing and absolute extreme)
+        bullish_reversal = np.zeros(n_candles, dtype=bool)
+        bearish_reversal = np.zeros(n_candles, dtype=bool)
+        for frac_idx, frac_type, _frac_price in fractals + [(abs_low_idx, 'up', None), (abs_high_idx, 'down', None)]:
             if frac_type == 'up':  # swing low = bullish reversal
-                for off in range(0, 3):  # swing candle + 2 after = 3 total
-                    if frac_idx + off < len(ohlc_rows):
-                        bullish_reversal_indices.add(frac_idx + off)
+                bullish_reversal[frac_idx:frac_idx + 3] = True
             else:  # swing high = bearish reversal
-                for off in range(0, 3):  # swing candle + 2 after = 3 total
-                    if frac_idx + off < len(ohlc_rows):
-                        bearish_reversal_indices.add(frac_idx + off)
-
-        if abs_low_idx is not None:
-            for off in range(0, 3):
-                if abs_low_idx + off < len(ohlc_rows):
-                    bullish_reversal_indices.add(abs_low_idx + off)
-        if abs_high_idx is not None:
-            for off in range(0, 3):
-                if abs_high_idx + off < len(ohlc_rows):
-                    bearish_reversal_indices.add(abs_high_idx + off)
-    
-    for idx, row in enumerate(ohlc_rows):
-        if has_volume:
-            _ts, open_price, high_price, low_price, close_price, volume = row
-            volumes.append(volume)
-        else:
-            _ts, open_price, high_price, low_price, close_price = row[:5]
-        
-        is_bullish = close_price >= open_price
-        x = x_vals[idx]
-        width = widths[idx]
-        lower = min(open_price, close_price)
-        height = max(abs(close_price - open_price), 1e-9)
-        
-        if use_gradient:
-            # Gradient mode: green gradient up, blue-purple gradient down
-            wick_color = "#888888"
-            border_color = "#000000"
-            if is_bullish:
-                color_top = "#84dc58"  # Bright green
-                color_bottom = "#336d16"  # Dark green
-            else:
-                color_top = "#6c7ce4"  # Blue
-                color_bottom = "#544996"  # Purple
-            
-            colors.append(color_top)
-            wick = Line2D([x, x], [low_price, high_price], color=wick_color, linewidth=1.0, zorder=3)
-            ax.add_line(wick)
-            
-            # Draw gradient candle body
-            n_segments = 10
-            segment_height = height / n_segments
-            for seg in range(n_segments):
-                t = seg / (n_segments - 1) if n_segments > 1 else 0
-                r1, g1, b1 = int(color_bottom[1:3], 16), int(color_bottom[3:5], 16), int(color_bottom[5:7], 16)
-                r2, g2, b2 = int(color_top[1:3], 16), int(color_top[3:5], 16), int(color_top[5:7], 16)
-                r = int(r1 + (r2 - r1) * t)
-                g = int(g1 + (g2 - g1) * t)
-                b = int(b1 + (b2 - b1) * t)
-                seg_color = f'#{r:02x}{g:02x}{b:02x}'
-                seg_y = lower + seg * segment_height
-                rect = Rectangle((x - width / 2, seg_y), width, segment_height, 
-                                facecolor=seg_color, edgecolor='none', zorder=4)
-                ax.add_patch(rect)
-            border_rect = Rectangle((x - width / 2, lower), width, height, 
-                                    facecolor='none', edgecolor=border_color, linewidth=0.5, zorder=5)
-            ax.add_patch(border_rect)
-        else:
-            # Default mode: Grey + Cyan/Magenta for swings
-            wick_color = "#808080"
-            border_color = "#000000"
-            up_normal = "#B0B0B0"
-            down_normal = "#606060"
-            up_reversal = "#00FFFF"
-            down_reversal = "#FF00FF"
-            
-            if idx in bullish_reversal_indices:
-                color = up_reversal
-            elif idx in bearish_reversal_indices:
-                color = down_reversal
-            else:
-                color = up_normal if is_bullish else down_normal
-            
-            colors.append(color)
-            wick = Line2D([x, x], [low_price, high_price], color=wick_color, linewidth=1.0, zorder=3)
-            ax.add_line(wick)
-            rect = Rectangle((x - width / 2, lower), width, height, facecolor=color, edgecolor=border_color, linewidth=0.5, zorder=4)
-            ax.add_patch(rect)
-        
-        lows.append(low_price)
-        highs.append(high_price)
+                bearish_reversal[frac_idx:frac_idx + 3] = True
+
+        palette = to_rgba_array(["#B0B0B0", "#606060", "#00FFFF", "#FF00FF"])  # up, down, up reversal, down reversal
+        choice = np.where(bullish_reversal, 2, np.where(bearish_reversal, 3, np.where(is_bullish, 0, 1)))
+        colors = palette[choice]
+        ax.add_collection(PolyCollection(_rect_verts(left, lower, width, height), facecolors=colors,
+                                         edgecolors=border_color, linewidths=0.5, zorder=4))
 
     # Draw fractals (already calculated above)
-    price_range = max(highs) - min(lows) if highs and lows else 1
+    price_range = float(highs.max() - lows.min())
     offset = price_range * 0.02
     
     # Fractal colors based on mode
@@ -700,11 +627,9 @@ def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
                        fontsize=8, color='white', ha='center', va='top', zorder=6)
 
     # Always mark absolute high/low so at least one swing high/low is visible
-    if highs and lows:
-        abs_high_price = max(highs)
-        abs_low_price = min(lows)
-        abs_high_idx = highs.index(abs_high_price)
-        abs_low_idx = lows.index(abs_low_price)
+    if n_candles:
+        abs_high_price = float(highs[abs_high_idx])
+        abs_low_price = float(lows[abs_low_idx])
 
         abs_high_color = "#FFD54F"  # gold
         abs_low_color = "#90CAF9"   # light blue
@@ -721,16 +646,12 @@ def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
                    fontsize=8, color='white', ha='center', va='top', zorder=7)
 
     # Draw volume bars
-    if has_volume and ax_vol and volumes:
-        for idx, vol in enumerate(volumes):
-            x = x_vals[idx]
-            width = widths[idx]
-            rect = Rectangle((x - width / 2, 0), width, vol, 
-                            facecolor=colors[idx], edgecolor=colors[idx], alpha=0.7, zorder=3)
-            ax_vol.add_patch(rect)
-        
+    if has_volume and ax_vol and n_candles:
+        ax_vol.add_collection(PolyCollection(_rect_verts(left, np.zeros(n_candles), width, volumes),
+                                             facecolors=colors, edgecolors=colors, alpha=0.7, zorder=3))
+
         ax_vol.set_xlim(min(x_vals) - delta, max(x_vals) + delta)
-        ax_vol.set_ylim(0, max(volumes) * 1.1 if volumes else 1)
+        ax_vol.set_ylim(0, float(volumes.max()) * 1.1)
         ax_vol.set_ylabel("Volume", color="#8b949e", fontsize=9)
         ax_vol.tick_params(axis="x", colors="#8b949e")
         ax_vol.tick_params(axis="y", colors="#8b949e")
@@ -759,9 +680,9 @@ def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
 
     if len(x_vals) > 1:
         ax.set_xlim(min(x_vals) - delta, max(x_vals) + delta)
-    if lows and highs:
-        min_y = min(lows)
-        max_y = max(highs)
+    if n_candles:
+        min_y = float(lows.min())
+        max_y = float(highs.max())
         pad = (max_y - min_y) * 0.08 if max_y > min_y else max_y * 0.01  # More padding for fractals
         ax.set_ylim(min_y - pad, max_y + pad)
 
@@ -791,6 +712,69 @@ def _build_chart(symbol, ohlc_rows, currency, label, use_gradient=False):
     return chart_path
 
 
+def _build_grid_chart(panels, label, use_gradient=False):
+    """One figure with a small candlestick panel per (symbol, ohlc_rows, price)"""
+    with _CHART_LOCK:
+        return _render_grid_chart(panels, label, use_gradient)
+
+
+def _render_grid_chart(panels, label, use_gradient=False):
+    try:
+        plt, mdates, LineCollection, PolyCollection, to_rgba_array, np = _load_matplotlib()
+    except Exception:
+        return None
+    panels = [panel for panel in panels if panel[1]]
+    if not panels:
+        return None
+
+    cols = min(4, int(math.ceil(math.sqrt(len(panels)))))
+    rows = int(math.ceil(len(panels) / cols))
+    fig, axes = plt.subplots(rows, cols, figsize=(3.2 * cols, 2.6 * rows), facecolor="#121212", squeeze=False)
+    up_color, down_color = ("#84dc58", "#6c7ce4") if use_gradient else ("#B0B0B0", "#606060")
+    title_up, title_down = ("#84dc58", "#6c7ce4") if use_gradient else ("#00FFFF", "#FF00FF")
+
+    for ax, (symbol, ohlc_rows, price) in zip(axes.flat, panels):
+        ax.set_facecolor("#121212")
+        x_vals = mdates.date2num([_timestamp_to_datetime(row[0]) for row in ohlc_rows])
+        delta = float(np.diff(x_vals).min()) if len(x_vals) > 1 else 0.02
+        width = delta * 0.7
+        open_prices, highs, lows, close_prices = np.array([row[1:5] for row in ohlc_rows], dtype=float).T
+        is_bullish = close_prices >= open_prices
+        lower = np.minimum(open_prices, close_prices)
+        height = np.maximum(np.abs(close_prices - open_prices), 1e-9)
+
+        wicks = np.stack([np.column_stack([x_vals, lows]), np.column_stack([x_vals, highs])], axis=1)
+        ax.add_collection(LineCollection(wicks, colors="#808080", linewidths=0.6, zorder=3))
+        colors = np.where(is_bullish[:, None], to_rgba_array(up_color), to_rgba_array(down_color))
+        ax.add_collection(PolyCollection(_rect_verts(x_vals - width / 2, lower, width, height),
+                                         facecolors=colors, edgecolors="none", zorder=4))
+
+        pad = (highs.max() - lows.min()) * 0.05 or highs.max() * 0.01
+        ax.set_xlim(x_vals.min() - delta, x_vals.max() + delta)
+        ax.set_ylim(lows.min() - pad, highs.max() + pad)
+        _change, change_percent = _period_change(price, ohlc_rows)
+        change_text = f"{change_percent:+.2f}%" if change_percent is not None else "n/a"
+        title_color = title_up if (change_percent or 0) >= 0 else title_down
+        ax.set_title(f"{symbol} ${_format_price(price)}  {change_text}", fontsize=9, color=title_color)
+        ax.tick_params(axis="both", colors="#8b949e", labelsize=6)
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=2, maxticks=4))
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(ax.xaxis.get_major_locator()))
+        ax.xaxis.get_offset_text().set_fontsize(6)
+        for spine in ax.spines.values():
+            spine.set_color("#2a2f38")
+        ax.grid(True, linestyle="-", linewidth=0.4, color="#1f2630", alpha=0.8, zorder=1)
+    for ax in list(axes.flat)[len(panels):]:
+        ax.set_visible(False)
+
+    fig.suptitle(f"last {label}", color="white", fontsize=11, fontweight="bold")
+    ts = int(time.time())
+    chart_path = f"/tmp/crypto_chart_grid_{ts}.png"
+    fig.tight_layout()
+    fig.savefig(chart_path, dpi=120)
+    plt.close(fig)
+    return chart_path
+
+
 def _normalize_hl_symbol(symbol):
     sym = str(symbol or "").upper()
     # Strip common separators (e.g., BTC-USD, BTC/USDC)
@@ -807,41 +791,49 @@ def _normalize_hl_symbol(symbol):
     return sym
 
 
-def _hyperliquid_lookup(symbol):
+def _hyperliquid_lookup_many(symbols):
+    """{symbol: (meta entry, asset ctx)} for many symbols from one universe snapshot"""
     try:
-        meta, ctxs = _get_hyperliquid_meta()
+        universe, ctxs, index = _get_hyperliquid_universe()
     except RuntimeError:
-        return None, None
-    universe = meta.get("universe", [])
-    mapping = {}
-    for idx, entry in enumerate(universe):
-        name = str(entry.get("name", "")).upper()
-        if name:
-            mapping[name] = idx
-    norm = _normalize_hl_symbol(symbol)
-    idx = mapping.get(norm)
-    if idx is None or idx >= len(ctxs):
-        return None, None
-    return universe[idx], ctxs[idx]
+        return {symbol: (None, None) for symbol in symbols}
+    found = {}
+    for symbol in symbols:
+        idx = index.get(_normalize_hl_symbol(symbol))
+        if idx is None or idx >= len(ctxs):
+            found[symbol] = (None, None)
+        else:
+            found[symbol] = (universe[idx], ctxs[idx])
+    return found
 
 
-def main():
-    if len(sys.argv) < 2:
-        return _json_error("missing symbol", "Usage: get_price_chart.py <symbol>")
+def _hyperliquid_lookup(symbol):
+    return _hyperliquid_lookup_many([symbol])[symbol]
 
-    raw_symbol = sys.argv[1].strip()
+
+def run(argv):
+    """Price + chart for argv (symbol, duration and flags); returns the JSON payload as a dict.
+
+    A comma-separated symbol list (BTC,ETH,SOL) switches to batch mode, which
+    returns a list of payloads instead (see run_batch).
+    """
+    if not argv:
+        return _error_payload("missing symbol", "Usage: get_price_chart.py <symbol>")
+
+    raw_symbol = argv[0].strip()
     if not raw_symbol:
-        return _json_error("missing symbol", "Usage: get_price_chart.py <symbol>")
+        return _error_payload("missing symbol", "Usage: get_price_chart.py <symbol>")
+    if "," in raw_symbol:
+        return run_batch([sym.strip() for sym in raw_symbol.split(",") if sym.strip()], argv[1:])
 
     symbol_upper = raw_symbol.upper()
     token_id = TOKEN_ID_MAP.get(symbol_upper)
     if token_id is None:
         token_id = raw_symbol.lower()
 
-    total_minutes, label = _parse_duration(sys.argv[2:])
+    total_minutes, label = _parse_duration(argv[1:])
     # Check for gradient mode flag
-    use_gradient = any(arg.lower() in ('gradient', 'grad', '-g', '--gradient') for arg in sys.argv[2:])
-    hours = total_minutes / 60.0
+    use_gradient = any(arg.lower() in ('gradient', 'grad', '-g', '--gradient') for arg in argv[1:])
     source = "coingecko"
     currency = "usdt"
     price_usdt = None
@@ -858,7 +850,7 @@ def main():
         try:
             price_payload = _get_price(token_id, currency)
         except RuntimeError as exc:
-            return _json_error("price lookup failed", str(exc))
+            return _error_payload("price lookup failed", str(exc))
 
         price_entry = price_payload.get(token_id, {})
         price_usdt = price_entry.get(currency)
@@ -867,7 +859,7 @@ def main():
             try:
                 price_payload = _get_price(token_id, currency)
             except RuntimeError as exc:
-                return _json_error("price lookup failed", str(exc))
+                return _error_payload("price lookup failed", str(exc))
             price_entry = price_payload.get(token_id, {})
             price_usdt = price_entry.get(currency)
 
@@ -875,14 +867,14 @@ def main():
             try:
                 searched_id = _search_token_id(symbol_upper)
             except RuntimeError as exc:
-                return _json_error("token search failed", str(exc))
+                return _error_payload("token search failed", str(exc))
             if searched_id:
                 token_id = searched_id
                 currency = "usdt"
                 try:
                     price_payload = _get_price(token_id, currency)
                 except RuntimeError as exc:
-                    return _json_error("price lookup failed", str(exc))
+                    return _error_payload("price lookup failed", str(exc))
                 price_entry = price_payload.get(token_id, {})
                 price_usdt = price_entry.get(currency)
                 if price_usdt is None:
@@ -890,13 +882,22 @@ def main():
                     try:
                         price_payload = _get_price(token_id, currency)
                     except RuntimeError as exc:
-                        return _json_error("price lookup failed", str(exc))
+                        return _error_payload("price lookup failed", str(exc))
                     price_entry = price_payload.get(token_id, {})
                     price_usdt = price_entry.get(currency)
 
     if price_usdt is None:
-        return _json_error("token not found", f"CoinGecko id: {token_id}")
+        return _error_payload("token not found", f"CoinGecko id: {token_id}")
+
+    last_points, candle_minutes = _load_candles(source, hl_symbol, token_id, currency, total_minutes)
+    chart_path = _build_chart(symbol_upper, last_points, currency, label, use_gradient)
+    return _build_result(symbol_upper, token_id, source, currency, total_minutes, label,
+                         price_usdt, last_points, candle_minutes, chart_path)
 
+
+def _load_candles(source, hl_symbol, token_id, currency, total_minutes):
+    """(last candles to chart, candle minutes): Hyperliquid, then CoinGecko market chart, then OHLC"""
+    hours = total_minutes / 60.0
     candles = []
     candle_minutes = _pick_candle_minutes(total_minutes)
     if source == "hyperliquid":
@@ -937,7 +938,10 @@ def main():
         last_points = candles[-target:]
     else:
         last_points = []
+    return last_points, candle_minutes
 
+
+def _period_change(price_usdt, last_points):
     change_period = None
     change_period_percent = None
     price_period_ago = None
@@ -947,7 +951,13 @@ def main():
         if price_period_ago:
             change_period = price_usdt - price_period_ago
             change_period_percent = (change_period / price_period_ago) * 100
-    chart_path = _build_chart(symbol_upper, last_points, currency, label, use_gradient)
+    return change_period, change_period_percent
+
+
+def _build_result(symbol_upper, token_id, source, currency, total_minutes, label,
+                  price_usdt, last_points, candle_minutes, chart_path):
+    hours = total_minutes / 60.0
+    change_period, change_period_percent = _period_change(price_usdt, last_points)
 
     if change_period_percent is None:
         change_text = f"{label} n/a"
@@ -980,6 +990,117 @@ def main():
         "text": text,
         "text_plain": text,
     }
+    return result
+
+
+def _resolve_prices(symbols):
+    """{symbol: (token_id, currency, price)} for non-Hyperliquid symbols in as few requests as possible"""
+    token_ids = {sym: TOKEN_ID_MAP.get(sym, sym.lower()) for sym in symbols}
+    resolved = {}
+
+    def price_pass(pending):
+        # usdt first, then usd for whatever is still missing (same order as single mode)
+        for currency in ("usdt", "usd"):
+            if not pending:
+                return
+            prices = _get_prices([token_ids[sym] for sym in pending], currency)
+            for sym in list(pending):
+                price = prices.get(token_ids[sym], {}).get(currency)
+                if price is not None:
+                    resolved[sym] = (token_ids[sym], currency, price)
+                    pending.remove(sym)
+
+    pending = list(symbols)
+    price_pass(pending)
+
+    # One search pass for symbols whose guessed id had no price
+    searchable = [sym for sym in pending if token_ids[sym] == sym.lower()]
+    if searchable:
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            searched = dict(zip(searchable, pool.map(_search_or_none, searchable)))
+        retry = []
+        for sym, found_id in searched.items():
+            if found_id:
+                token_ids[sym] = found_id
+                retry.append(sym)
+        price_pass(retry)
+    for sym in symbols:
+        resolved.setdefault(sym, (token_ids[sym], None, None))
+    return resolved
+
+
+def _search_or_none(symbol):
+    try:
+        return _search_token_id(symbol)
+    except RuntimeError:
+        return None
+
+
+def run_batch(symbols, args):
+    """Payloads for many symbols: one Hyperliquid meta call, one simple/price request per
+    currency, candles fetched concurrently. Per-symbol charts are skipped unless the
+    `grid` flag asks for one figure with a small panel per symbol.
+    """
+    total_minutes, label = _parse_duration(args)
+    use_gradient = any(arg.lower() in ('gradient', 'grad', '-g', '--gradient') for arg in args)
+    use_grid = any(arg.lower() in ('grid', '--grid') for arg in args)
+    symbols = list(dict.fromkeys(sym.upper() for sym in symbols))
+
+    hl_symbols = {sym: _normalize_hl_symbol(sym) for sym in symbols}
+    hl_found = _hyperliquid_lookup_many(list(hl_symbols.values()))
+    entries = {}
+    for sym in symbols:
+        _meta, ctx = hl_found[hl_symbols[sym]]
+        try:
+            price = float(ctx.get("markPx") or ctx.get("midPx")) if ctx else None
+        except (TypeError, ValueError):
+            price = None
+        if price is not None:
+            entries[sym] = ("hyperliquid", TOKEN_ID_MAP.get(sym, sym.lower()), "usd", price)
+    try:
+        coingecko = _resolve_prices([sym for sym in symbols if sym not in entries])
+    except RuntimeError as exc:
+        return [dict(_error_payload("price lookup failed", str(exc)), symbol=sym) for sym in symbols]
+    for sym, (token_id, currency, price) in coingecko.items():
+        entries[sym] = ("coingecko", token_id, currency, price)
+
+    def load(sym):
+        source, token_id, currency, price = entries[sym]
+        if price is None:
+            return None
+        return _load_candles(source, hl_symbols[sym], token_id, currency, total_minutes)
+
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        loaded = dict(zip(symbols, pool.map(load, symbols)))
+
+    chart_path = None
+    if use_grid:
+        panels = [(sym, loaded[sym][0], entries[sym][3]) for sym in symbols if loaded[sym]]
+        chart_path = _build_grid_chart(panels, label, use_gradient)
+
+    results = []
+    for sym in symbols:
+        source, token_id, currency, price = entries[sym]
+        if price is None:
+            results.append(dict(_error_payload("token not found", f"CoinGecko id: {token_id}"), symbol=sym))
+            continue
+        last_points, candle_minutes = loaded[sym]
+        results.append(_build_result(sym, token_id, source, currency, total_minutes, label,
+                                     price, last_points, candle_minutes, chart_path))
+    return results
+
+
+def main():
+    # Hand the request to a running chart worker when there is one (see chart_worker.py)
+    result = None
+    if os.environ.get("CRYPTO_CHART_WORKER", "1") != "0":
+        try:
+            import chart_worker
+            result = chart_worker.request(sys.argv[1:])
+        except ImportError:
+            result = None
+    if result is None:
+        result = run(sys.argv[1:])
     print(json.dumps(result, ensure_ascii=True))
     return 0
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Ranked Hyperliquid perp scanner.
+
+One metaAndAssetCtxs call (cached, via the crypto-price helpers) gives every
+perp's price, 24h change and notional volume. Candles for the most liquid
+perps -- or the whole universe with --all -- are then read from the live
+hl_feed.py buffers or fetched concurrently with candleSnapshot through the
+shared data layer (hyperliquid_data / data_sources), which paces them inside
+Hyperliquid's per-IP weight limit, and aligned into one (coins x bars) matrix. Returns, the analyze-market.mjs volume ratio, RSI and
+ATR are computed for all coins at once with the NumPy kernels in
+indicators.py. Results are cached per interval for CACHE_TTL_SEC.
+
+Usage:
+  scan_market.py [interval] [--top N | --all] [--sort change|volume|rsi|atr|day] [--rows 25] [--json]
+"""
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "..", "crypto-price", "scripts"))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "..", ".."))  # indicators.py at the repository root
+
+import get_price_chart as hl
+from hyperliquid_data import fetch_candles
+from indicators import atr, rsi
+
+LOOKBACK_BARS = 100
+VOLUME_BARS = 10           # analyze-market.mjs: volume / average of the last 10 bars (closed bars only)
+DEFAULT_TOP = 40
+MAX_WORKERS = 8
+CACHE_TTL_SEC = 60
+INTERVAL_MINUTES = {"1m": 1, "3m": 3, "5m": 5, "15m": 15, "30m": 30, "1h": 60, "2h": 120, "4h": 240, "8h": 480, "1d": 1440}
+SORT_KEYS = {"change": "change_pct", "volume": "volume_ratio", "rsi": "rsi", "atr": "atr_pct", "day": "day_change_pct"}
+
+
+def _fetch_candles(coins, interval, bars):
+    """{coin: [[t, o, h, l, c, v], ...]}: feed buffers first, then one paced candleSnapshot sweep
+    through the shared data layer (hyperliquid_data), which keeps the per-IP weight budget"""
+    interval_ms = INTERVAL_MINUTES[interval] * 60_000
+    start_ms = (int(time.time() * 1000) // interval_ms - bars + 1) * interval_ms
+    return fetch_candles(coins, interval, bars, MAX_WORKERS), start_ms
+
+
+def _to_matrix(candles, coins, start_ms, interval, bars):
+    """(coins x bars) arrays of high, low, close, volume aligned on bar time; missing bars are NaN"""
+    interval_ms = INTERVAL_MINUTES[interval] * 60_000
+    out = np.full((4, len(coins), bars), np.nan)
+    for i, coin in enumerate(coins):
+        rows = np.array(candles.get(coin) or np.empty((0, 6)), dtype=float).reshape(-1, 6)
+        cols = ((rows[:, 0] - start_ms) // interval_ms).astype(int)
+        keep = (cols >= 0) & (cols < bars)
+        out[:, i, cols[keep]] = rows[keep][:, [2, 3, 4, 5]].T
+    return out
+
+
+def _last_valid(x):
+    """Last finite value per row"""
+    finite = np.isfinite(x)
+    idx = x.shape[1] - 1 - np.argmax(finite[:, ::-1], axis=1)
+    return np.where(finite.any(axis=1), x[np.arange(x.shape[0]), idx], np.nan)
+
+
+def _finite(value):
+    """float, or None for NaN/inf so --json output stays valid JSON"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def scan(interval="1h", top=DEFAULT_TOP, bars=LOOKBACK_BARS):
+    """One row per perp with price, returns, volume ratio, RSI, ATR and the momentum signal"""
+    universe, ctxs, _index = hl._get_hyperliquid_universe()
+    listed = [(entry["name"], ctx) for entry, ctx in zip(universe, ctxs) if not entry.get("isDelisted")]
+    listed.sort(key=lambda item: float(item[1].get("dayNtlVlm") or 0.0), reverse=True)
+    if top:
+        listed = listed[:top]
+    coins = [name for name, _ctx in listed]
+
+    candles, start_ms = _fetch_candles(coins, interval, bars)
+    high, low, close, volume = _to_matrix(candles, coins, start_ms, interval, bars)
+
+    last_close = _last_valid(close)
+    prev_close = _last_valid(close[:, :-1])
+    first_close = np.take_along_axis(close, np.isfinite(close).argmax(axis=1)[:, None], axis=1)[:, 0]
+    # The last column is the open bar; its volume is partial, so it is left out of the volume average
+    closed_volume = volume[:, -VOLUME_BARS - 1:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bar_change = (last_close / prev_close - 1) * 100
+        change = (last_close / first_close - 1) * 100
+        volume_mean = np.nansum(closed_volume, axis=1) / np.isfinite(closed_volume).sum(axis=1)
+        volume_ratio = closed_volume[:, -1] / volume_mean
+        atr_pct = _last_valid(atr(high, low, close)) / last_close * 100
+    rsi_last = _last_valid(rsi(close))
+
+    rows = []
+    for i, (coin, ctx) in enumerate(listed):
+        if not np.isfinite(last_close[i]):
+            continue
+        mark = float(ctx.get("markPx") or last_close[i])
+        prev_day = float(ctx.get("prevDayPx") or 0.0)
+        price_up = bar_change[i] > 0
+        volume_up = volume_ratio[i] > 1.2
+        signal = "bullish" if price_up and volume_up else "bearish" if not price_up and volume_up else "neutral"
+        rows.append({
+            "coin": coin,
+            "price": mark,
+            "bar_change_pct": _finite(bar_change[i]),
+            "change_pct": _finite(change[i]),
+            "day_change_pct": (mark / prev_day - 1) * 100 if prev_day else None,
+            "volume_ratio": _finite(volume_ratio[i]),
+            "rsi": _finite(rsi_last[i]),
+            "atr_pct": _finite(atr_pct[i]),
+            "day_volume": float(ctx.get("dayNtlVlm") or 0.0),
+            "signal": signal,
+        })
+    return rows
+
+
+def cached_scan(interval, top, bars=LOOKBACK_BARS):
+    cache_path = hl._cache_path("hl_scan", f"{interval}_{top or 'all'}_{bars}")
+    cached = hl._read_cache(cache_path, CACHE_TTL_SEC)
+    if cached is not None:
+        return cached
+    rows = scan(interval, top, bars)
+    hl._write_cache(cache_path, rows)
+    return rows
+
+
+def _fmt(value, spec):
+    return "n/a" if value is None else format(value, spec)
+
+
+def main():
+    args = sys.argv[1:]
+    interval = next((arg for arg in args if arg in INTERVAL_MINUTES), "1h")
+    top = 0 if "--all" in args else int(args[args.index("--top") + 1]) if "--top" in args else DEFAULT_TOP
+    sort_key = SORT_KEYS.get(args[args.index("--sort") + 1] if "--sort" in args else "change", "change_pct")
+    limit = int(args[args.index("--rows") + 1]) if "--rows" in args else 25
+
+    start = time.time()
+    try:
+        rows = cached_scan(interval, top)
+    except RuntimeError as exc:
+        print(json.dumps({"error": "scan failed", "details": str(exc)}))
+        return 1
+    rows.sort(key=lambda r: -np.inf if r[sort_key] is None else r[sort_key], reverse=True)
+
+    if "--json" in args:
+        print(json.dumps(rows[:limit]))
+        return 0
+    print(f"=== Hyperliquid perps ({len(rows)} scanned, {interval} x {LOOKBACK_BARS}, sorted by {sort_key}) "
+          f"in {time.time() - start:.1f}s ===\n")
+    print(f"{'Coin':<10} {'Price':>12} {'Bar %':>8} {'Range %':>8} {'24h %':>8} {'Vol x':>6} {'RSI':>6} {'ATR %':>6}  Signal")
+    print("─" * 84)
+    for r in rows[:limit]:
+        print(f"{r['coin']:<10} {hl._format_price(r['price']):>12} {_fmt(r['bar_change_pct'], '+.2f'):>8} "
+              f"{_fmt(r['change_pct'], '+.2f'):>8} {_fmt(r['day_change_pct'], '+.2f'):>8} "
+              f"{_fmt(r['volume_ratio'], '.2f'):>6} {_fmt(r['rsi'], '.1f'):>6} {_fmt(r['atr_pct'], '.2f'):>6}  {r['signal']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
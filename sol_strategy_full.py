@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import ccxt
 import pandas as pd
 import numpy as np
 import sys
@@ -12,6 +11,12 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib
 matplotlib.use('Agg')
+from signal_bus import publish
+from data_sources import fetch_ohlcv
+from sentiment_pipeline import get_shared_sentiment, score_adjustment
+from timeout_resistant_btc import TimeoutResistantAnalyzer
+import timing
+from timing import span, timed
 
 CSV_FILE = '/home/ironman/.openclaw/workspace/sol_strategy_history.csv'
 STATE_FILE = '/home/ironman/.openclaw/workspace/sol_strategy_state.json'
@@ -63,6 +68,7 @@ def calculate_atr(df, period=14):
     atr = true_range.rolling(window=period).mean()
     return atr
 
+@timed()
 def generate_price_chart(df, symbol="SOL/USDT"):
     try:
         plt.style.use('dark_background')
@@ -89,6 +95,7 @@ def generate_price_chart(df, symbol="SOL/USDT"):
         print(f"Chart error: {e}")
         return None
 
+@timed()
 def send_report_via_telegram(report_text, chart_path=None):
     try:
         cmd = ['openclaw', 'message', 'send', '--channel', 'telegram', '--target', GROUP_ID, '--message', report_text]
@@ -101,6 +108,7 @@ def send_report_via_telegram(report_text, chart_path=None):
         print(f"Send error: {e}")
         return False
 
+@timed()
 def analyze_strategy(df):
     df['RSI'] = calculate_rsi(df['close'])
     df['EMA_50'] = calculate_ema(df['close'], 50)
@@ -136,17 +144,35 @@ def analyze_strategy(df):
 
 def main():
     try:
-        exchange = ccxt.binance()
-        bars = exchange.fetch_ohlcv('SOL/USDT', timeframe='1h', limit=500)
-        df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        with span('fetch'):
+            bars = fetch_ohlcv('SOL/USDT', '1h', limit=500)
+            df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         result = analyze_strategy(df)
         
+        # Shared, time-decayed news pass (one fetch per TTL across the asset scripts)
+        with span('sentiment'):
+            sentiment_data = get_shared_sentiment('SOL', timed('news_fetch')(lambda: TimeoutResistantAnalyzer().get_crypto_news_fast(5)))
+        if sentiment_data:
+            print(f"📰 Sentiment from {sentiment_data['articles_count']} cached news articles (score {sentiment_data['score']:+.2f}, {sentiment_data['status']})")
+            score = result['score'] + score_adjustment(sentiment_data)
+            result['score'] = int(round(score))
+            result['signal'] = "LONG" if score >= 3 else "SHORT" if score <= -3 else "NEUTRAL"
+            result['confidence'] = "HIGH" if abs(score) >= 4 else "MEDIUM" if abs(score) >= 2 else "LOW"
+            result['sentiment_data'] = sentiment_data
+        
+        try:
+            publish('SOL', result)
+        except Exception as e:
+            print(f"Signal bus publish failed: {e}")
+        
         insights = [
             f"📊 {('BULLISH' if result['indicators']['EMA_50'] > result['indicators']['EMA_200'] else 'BEARISH')} trend established (EMA 50/200)",
             f"📊 RSI {'oversold' if result['indicators']['RSI'] < 30 else 'overbought' if result['indicators']['RSI'] > 70 else 'neutral'} at {result['indicators']['RSI']:.1f}",
             f"📈 SOL Volatility: {'HIGH' if result['indicators']['ATR'] > 2 else 'MODERATE'} (ATR: {result['indicators']['ATR']:.2f})"
         ]
+        if sentiment_data:
+            insights.append(f"📰 News sentiment: {sentiment_data['sentiment']} ({sentiment_data['strength']}, {sentiment_data['articles_count']} articles, {sentiment_data['status']})")
         
         chart_path = generate_price_chart(df, "SOL/USDT")
         
@@ -172,7 +198,7 @@ EMA 200: ${result['indicators']['EMA_200']:.2f}"""
         
         # Log to CSV
         file_exists = os.path.isfile(CSV_FILE)
-        with open(CSV_FILE, 'a', newline='') as f:
+        with span('log_to_csv'), open(CSV_FILE, 'a', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=['Date', 'SOL Price', 'Signal', 'Action'])
             if not file_exists: writer.writeheader()
             writer.writerow({'Date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'SOL Price': f"{result['price']:.2f}", 'Signal': result['signal'], 'Action': 'REPORT'})
@@ -181,4 +207,5 @@ EMA 200: ${result['indicators']['EMA_200']:.2f}"""
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    main()
+    with timing.run('sol'):
+        main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Crash-safe, lock-protected position state store.
+
+- Writes go to a temp file that is fsync'ed and renamed over STATE_FILE, so a
+  crash leaves either the old or the new state, never a truncated file.
+- Every transition is first appended to a small write-ahead journal
+  (<state>.journal, one JSON line per transition) so positions can be rebuilt
+  with replay_journal().
+- strategy_lock() takes an exclusive fcntl lock for the whole run, so cron, a
+  manual run and master-agent retries can no longer read the same state and
+  double-enter a position.
+"""
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+DEFAULT_STATE = {
+    "signal": "NEUTRAL",
+    "entry_price": 0.0,
+    "entry_atr": 0.0,
+    "pending_signal": None
+}
+JOURNAL_MAX_BYTES = 1_000_000  # Compact the journal once it grows past this size
+JOURNAL_KEEP_LINES = 5000      # Transitions kept after compaction
+
+def _journal_path(state_file):
+    return f"{state_file}.journal"
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# --- Locking ---
+class StateLocked(RuntimeError):
+    """Another run currently holds the strategy lock"""
+
+@contextmanager
+def strategy_lock(state_file, blocking=False):
+    """Exclusive lock for one strategy run; raises StateLocked if busy and not blocking"""
+    with open(f"{state_file}.lock", 'w') as lock:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock, flags)
+        except BlockingIOError:
+            raise StateLocked(f"{state_file} is locked by another run")
+        try:
+            lock.write(str(os.getpid()))
+            lock.flush()
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+# --- Load / Save ---
+def load_state(state_file):
+    """Load state; fall back to journal replay if the file is missing or corrupt"""
+    try:
+        with open(state_file, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"State file unreadable ({e}), rebuilding from journal")
+    state = replay_journal(state_file)
+    return state if state is not None else dict(DEFAULT_STATE)
+
+def save_state(state_file, state, reason=""):
+    """Journal the transition, then atomically replace the state file"""
+    entry = {"ts": time.time(), "reason": reason, "state": state}
+    _append_journal(state_file, (json.dumps(entry) + "\n").encode('utf-8'))
+
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, state_file)
+    _fsync_dir(state_file)
+
+# --- Journal ---
+def _append_journal(state_file, line, chunk=4096):
+    """Append one line under an exclusive lock, first cutting a torn last line back
+    to the previous newline so the new entry is not glued onto it"""
+    fd = os.open(_journal_path(state_file), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            end = size
+            while end > 0:
+                start = max(0, end - chunk)
+                newline = os.pread(fd, end - start, start).rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            os.ftruncate(fd, end)
+        os.write(fd, line)
+        os.fsync(fd)
+    finally:
+        os.close(fd)  # Releases the lock
+
+def read_journal(state_file):
+    """All intact journal entries in order (a torn last line is skipped)"""
+    entries = []
+    try:
+        with open(_journal_path(state_file), 'r') as journal:
+            for line in journal:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+def replay_journal(state_file, until_ts=None):
+    """Rebuild the state as of until_ts (default: latest) from the journal"""
+    state = None
+    for entry in read_journal(state_file):
+        if until_ts is not None and entry["ts"] > until_ts:
+            break
+        state = entry["state"]
+    return state
+
+def compact_journal(state_file, max_bytes=JOURNAL_MAX_BYTES, keep=JOURNAL_KEEP_LINES):
+    """Keep only the last `keep` transitions once the journal exceeds max_bytes.
+
+    Call while holding strategy_lock.
+    """
+    try:
+        if os.path.getsize(_journal_path(state_file)) <= max_bytes:
+            return
+    except OSError:
+        return
+    entries = read_journal(state_file)
+    tmp_path = f"{_journal_path(state_file)}.tmp"
+    with open(tmp_path, 'w') as f:
+        for entry in entries[-keep:]:
+            f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, _journal_path(state_file))
+
+if __name__ == "__main__":
+    # Usage: state_store.py <state_file> [--rebuild]
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: state_store.py <state_file> [--rebuild]")
+        sys.exit(1)
+    path = sys.argv[1]
+    for entry in read_journal(path)[-10:]:
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['ts']))} {entry['reason'] or '-':<24} {json.dumps(entry['state'])}")
+    if '--rebuild' in sys.argv:
+        with strategy_lock(path, blocking=True):
+            rebuilt = replay_journal(path)
+            if rebuilt is None:
+                print("Journal is empty, nothing to rebuild")
+            else:
+                save_state(path, rebuilt, "REBUILD")
+                print(f"Rebuilt {path}: {json.dumps(rebuilt)}")
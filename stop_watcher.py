@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Intrabar stop-loss watcher.
+
+The strategy scripts only compare the last close against the 2x ATR stop once
+per run, so a stop that is breached and recovered inside the bar is never
+seen. This watcher keeps every open position's stop in memory and evaluates
+each price update against it with O(1) work (one dict lookup and one
+comparison), using the same fill rule as run_backtest (stop_fill_price:
+fill at the stop, or at the open on a gap).
+
+Price sources:
+  ticker  - poll one fetch_tickers call for all watched symbols
+  1m      - poll 1m candles since the last check (sees wicks between polls)
+  replay  - replay 1m candles from a local CSV (timestamp,open,high,low,close)
+
+Fills close the position through state_store (under the strategy lock) and
+are logged to the signal journal and the *_history.csv view. A fill that
+finds a strategy run holding the lock is kept and retried on the next poll,
+so the watcher never stalls on one symbol.
+"""
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+import state_store
+from backtest_strategy import stop_fill_price
+from signal_journal import append_record, make_record
+
+WORKSPACE = '/home/ironman/.openclaw/workspace'
+WATCHED = {
+    'BTC/USDT': {'asset': 'BTC', 'state_file': f'{WORKSPACE}/btc_strategy_state.json',
+                 'csv_file': f'{WORKSPACE}/btc_strategy_history.csv', 'journal_file': f'{WORKSPACE}/btc_signal_journal.bin'},
+    'ETH/USDT': {'asset': 'ETH', 'state_file': f'{WORKSPACE}/eth_strategy_state.json',
+                 'csv_file': f'{WORKSPACE}/eth_strategy_history.csv', 'journal_file': f'{WORKSPACE}/eth_signal_journal.bin'},
+}
+ATR_MULTIPLIER = 2.0
+POLL_SEC = 5.0
+CANDLE_LIMIT = 1000  # One request catches up on everything since the entry or the last poll
+
+class StopWatcher:
+    def __init__(self, watched=WATCHED):
+        self.watched = watched
+        self.positions = {}   # symbol -> (side, entry_price, entry_atr, stop_price)
+        self.entry_times = {} # symbol -> entry time (ms) of the held position
+        self.deferred = {}    # symbol -> _record_fill args of a stop hit while the strategy lock was busy
+        self.mtimes = {}      # state file -> mtime of the copy we hold
+        self.refresh()
+
+    # --- Position Cache ---
+    def _load_position(self, symbol):
+        cfg = self.watched[symbol]
+        state = state_store.load_state(cfg['state_file'])
+        side = state.get("signal")
+        if side in ("LONG", "SHORT") and state.get("entry_price"):
+            entry, atr = state["entry_price"], state["entry_atr"]
+            stop = entry - ATR_MULTIPLIER * atr if side == "LONG" else entry + ATR_MULTIPLIER * atr
+            self.positions[symbol] = (side, entry, atr, stop)
+            self.entry_times[symbol] = _entry_time_ms(cfg['state_file'], side, entry)
+        else:
+            self.positions.pop(symbol, None)
+
+    def refresh(self):
+        """Reload positions whose state file changed since the last look"""
+        for symbol, cfg in self.watched.items():
+            try:
+                mtime = os.stat(cfg['state_file']).st_mtime
+            except OSError:
+                self.positions.pop(symbol, None)
+                continue
+            if self.mtimes.get(cfg['state_file']) != mtime:
+                self.mtimes[cfg['state_file']] = mtime
+                self._load_position(symbol)
+
+    # --- Evaluation ---
+    def on_bar(self, symbol, bar_open, bar_high, bar_low, ts=None):
+        """Evaluate one price update (a tick is a bar with open=high=low)"""
+        pos = self.positions.get(symbol)
+        if pos is None or symbol in self.deferred:  # A deferred fill already closes this position
+            return None
+        side, entry, atr, stop = pos
+        # Fast reject before the shared fill rule
+        if (side == "LONG" and bar_low > stop) or (side == "SHORT" and bar_high < stop):
+            return None
+        fill = stop_fill_price(side, entry, atr, bar_open, bar_high, bar_low, ATR_MULTIPLIER)
+        if fill is None:
+            return None
+        return self._record_fill(symbol, side, entry, stop, fill, ts)
+
+    def on_tick(self, symbol, price, ts=None):
+        return self.on_bar(symbol, price, price, price, ts)
+
+    def _record_fill(self, symbol, side, entry, stop, fill, ts):
+        cfg = self.watched[symbol]
+        try:
+            # Never wait here: a strategy run holds its lock through fetch, news, chart and
+            # Telegram, and the other symbols must keep being watched meanwhile
+            with state_store.strategy_lock(cfg['state_file']):
+                state = state_store.load_state(cfg['state_file'])
+                if state.get("signal") != side or state.get("entry_price") != entry:
+                    # Strategy run changed the position meanwhile, re-read it
+                    self._load_position(symbol)
+                    return None
+                if side == "LONG":
+                    profit_pct = (fill - entry) / entry
+                else:
+                    profit_pct = (entry - fill) / entry
+                action = f"EXIT_{side} (STOP)"
+                reason = f"STOP LOSS ({side.title()}, intrabar): {fill:.2f} vs stop {stop:.2f}"
+                state_store.save_state(cfg['state_file'], dict(state_store.DEFAULT_STATE), action)
+                _log_fill(cfg, fill, action, entry, 100 * profit_pct, reason, ts)
+        except state_store.StateLocked:
+            if symbol not in self.deferred:
+                print(f"{symbol}: stop hit @ {fill:.2f} while a strategy run holds the lock, retrying next poll")
+            self.deferred[symbol] = (side, entry, stop, fill, ts)
+            return None
+        self.positions.pop(symbol, None)
+        self.mtimes[cfg['state_file']] = os.stat(cfg['state_file']).st_mtime
+        print(f"{symbol}: {action} @ {fill:.2f} (entry {entry:.2f}, profit {100 * profit_pct:.2f} USDT)")
+        return {"symbol": symbol, "action": action, "exit_price": fill, "profit": 100 * profit_pct}
+
+    def retry_deferred(self):
+        """Record stop fills that found the strategy lock busy, at their original price and time"""
+        fills = []
+        for symbol, args in list(self.deferred.items()):
+            del self.deferred[symbol]
+            fill = self._record_fill(symbol, *args)
+            if fill:
+                fills.append(fill)
+        return fills
+
+def _entry_time_ms(state_file, side, entry):
+    """When the position was opened: the first journal transition of the trailing run holding it"""
+    entry_ts = None
+    for record in reversed(state_store.read_journal(state_file)):
+        state = record.get("state") or {}
+        if state.get("signal") != side or state.get("entry_price") != entry:
+            break
+        entry_ts = record["ts"]
+    if entry_ts is None:  # Journal compacted or missing: the state file is at least that old
+        try:
+            entry_ts = os.stat(state_file).st_mtime
+        except OSError:
+            entry_ts = time.time()
+    return int(entry_ts * 1000)
+
+def _log_fill(cfg, fill, action, entry, profit, reason, ts=None):
+    ts_ms = int(ts if ts is not None else time.time() * 1000)
+    append_record(cfg['journal_file'], make_record(fill, "NEUTRAL", action, entry, fill, profit,
+                                                   reasons=[reason], ts=ts_ms))
+    fieldnames = ['Date', f"{cfg['asset']} Price", 'Signal', 'Action', 'Entry Price',
+                  'Exit Price', 'Profit (USDT)', 'Stop Loss Level', 'Reasons',
+                  'RSI', 'MACD', 'ATR', 'BB_Lower', 'BB_Upper']
+    file_exists = os.path.isfile(cfg['csv_file'])
+    with open(cfg['csv_file'], 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        if not file_exists:
+            writer.writeheader()
+        writer.writerow({
+            'Date': datetime.fromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d %H:%M:%S"),
+            f"{cfg['asset']} Price": f"{fill:.2f}",
+            'Signal': "NEUTRAL",
+            'Action': action,
+            'Entry Price': f"{entry:.2f}",
+            'Exit Price': f"{fill:.2f}",
+            'Profit (USDT)': f"{profit:.2f}",
+            'Reasons': reason,
+        })
+
+# --- Price Sources ---
+def run_ticker(watcher, poll_sec=POLL_SEC):
+    from data_sources import fetch_tickers  # Pooled connection reused across polls
+    while True:
+        watcher.refresh()
+        watcher.retry_deferred()
+        if watcher.positions:
+            tickers = fetch_tickers(list(watcher.positions))
+            for symbol, ticker in tickers.items():
+                if ticker.get('last') is not None:
+                    watcher.on_tick(symbol, ticker['last'], ticker.get('timestamp'))
+        time.sleep(poll_sec)
+
+def run_candles(watcher, poll_sec=POLL_SEC):
+    from data_sources import fetch_ohlcv
+    since = {}  # symbol -> (position, open time of the last bar checked for it)
+    while True:
+        watcher.refresh()
+        watcher.retry_deferred()
+        for symbol in list(since):
+            if since[symbol][0] != watcher.positions.get(symbol):
+                del since[symbol]  # Position closed or replaced: never carry its cursor over
+        for symbol, pos in list(watcher.positions.items()):
+            # Bars that opened before the entry belong to the previous position (or none)
+            start = max(since.get(symbol, (pos, 0))[1], watcher.entry_times[symbol])
+            bars = fetch_ohlcv(symbol, timeframe='1m', since=start, limit=CANDLE_LIMIT)
+            for ts, o, h, l, c, _v in bars:
+                if watcher.on_bar(symbol, o, h, l, ts):
+                    break
+            if bars and symbol in watcher.positions:
+                since[symbol] = (pos, bars[-1][0])  # Re-read the forming minute next poll
+        time.sleep(poll_sec)
+
+def run_replay(watcher, symbol, csv_path):
+    """Replay local 1m candles (offline stand-in for the live feed)"""
+    fills = []
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            fill = watcher.on_bar(symbol, float(row['open']), float(row['high']), float(row['low']),
+                                  int(float(row['timestamp'])))
+            if fill:
+                fills.append(fill)
+    return fills
+
+if __name__ == "__main__":
+    # Usage: stop_watcher.py [ticker|1m] | stop_watcher.py replay <symbol> <candles.csv>
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'ticker'
+    watcher = StopWatcher()
+    if mode == 'replay':
+        print(run_replay(watcher, sys.argv[2], sys.argv[3]))
+    elif mode == '1m':
+        run_candles(watcher)
+    else:
+        run_ticker(watcher)
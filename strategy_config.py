@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Symbol universe and per-asset file layout shared by strategy_engine and market_director.
+
+strategy_config.json (next to this file) lists the symbols the engine runs
+and the assets the director summarizes; every per-asset path follows the
+naming the original *_strategy_full.py scripts use.
+"""
+import json
+import os
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategy_config.json')
+WORKSPACE = '/home/ironman/.openclaw/workspace'
+DEFAULT_CONFIG = {
+    "exchange": "binance",
+    "quote": "USDT",
+    "timeframe": "1h",
+    "limit": 500,
+    "symbols": ["BTC", "ETH", "SOL", "XRP"],
+    "top_n": 0,                 # > 0: run the top N quote pairs by 24h volume instead of `symbols`
+    "exclude": [],
+    "max_workers": 8,
+    "director_assets": ["BTC", "ETH", "SOL", "XRP"],
+    "workspace": f"{WORKSPACE}/engine",
+}
+
+def load_config(path=CONFIG_FILE):
+    """Config file values over DEFAULT_CONFIG (a missing file gives the defaults)"""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path, 'r') as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    return config
+
+def asset_files(asset, workspace=WORKSPACE):
+    """State, CSV history and signal journal paths for one asset"""
+    name = asset.lower()
+    return {
+        "state_file": f"{workspace}/{name}_strategy_state.json",
+        "csv_file": f"{workspace}/{name}_strategy_history.csv",
+        "journal_file": f"{workspace}/{name}_signal_journal.bin",
+    }
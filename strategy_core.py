@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""Event-driven strategy core shared by the live runners and the backtester.
+
+step() is the single position state machine: it takes the current state, the
+bar's signal/price/ATR and returns the new state plus the order events. It
+encodes the live flow of the strategy scripts:
+
+  stop hit          -> EXIT_<side> (STOP)
+  pending signal    -> ENTER_<pending> at this bar's price (confirmation run)
+  signal changed    -> EXIT_<side> if in a position, then SIGNAL_<new> (PENDING)
+
+The live scripts call step() once per run. replay() drives the same step()
+over historical candles; indicators and signals are computed for the whole
+series up front and bars where nothing can happen are skipped in batches (a
+flat, non-pending state waits for the next non-NEUTRAL bar; an open position
+jumps to the first bar where its stop is hit or its signal changes), so
+Python-level work scales with the number of events, not the number of bars.
+"""
+import numpy as np
+import pandas as pd
+
+from backtest_strategy import (calculate_atr, calculate_bollinger_bands, calculate_ema,
+                               calculate_macd, calculate_rsi, calculate_stochastic,
+                               stop_fill_price)
+
+ATR_MULTIPLIER = 2.0
+WARMUP_BARS = 200  # EMA 200
+FLAT_STATE = {"signal": "NEUTRAL", "entry_price": 0.0, "entry_atr": 0.0, "pending_signal": None}
+INDICATOR_COLUMNS = ['RSI', 'EMA_50', 'EMA_200', 'MACD', 'MACD_Signal',
+                     'BB_Upper', 'BB_Lower', 'Stoch_K', 'Stoch_D', 'ATR']
+
+# --- Indicators & Scoring ---
+def compute_indicators(df):
+    df['RSI'] = calculate_rsi(df['close'])
+    df['EMA_50'] = calculate_ema(df['close'], 50)
+    df['EMA_200'] = calculate_ema(df['close'], 200)
+    df['MACD'], df['MACD_Signal'] = calculate_macd(df['close'])
+    df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = calculate_bollinger_bands(df['close'])
+    df['Stoch_K'], df['Stoch_D'] = calculate_stochastic(df)
+    df['ATR'] = calculate_atr(df)
+    return df
+
+def score_arrays(close, rsi, ema_50, ema_200, macd, macd_signal, bb_upper, bb_lower, k, d, prev_k, prev_d):
+    """Elementwise strategy score; works on 1-D series or (bars, symbols) matrices alike"""
+    score = np.where(ema_50 > ema_200, 1, -1)
+    score += (macd > macd_signal).astype(int) - (macd < macd_signal).astype(int)
+    score += 2 * (rsi < 30) - 2 * (rsi > 70)
+    score += (close < bb_lower).astype(int) - (close > bb_upper).astype(int)
+    cross_up = (prev_k < prev_d) & (k > d)
+    cross_down = (prev_k > prev_d) & (k < d)
+    score += 2 * (cross_up & (k < 20)) - 2 * (cross_down & (k > 80))
+    return score
+
+def score_to_signal(score):
+    return np.where(score >= 3, 'LONG', np.where(score <= -3, 'SHORT', 'NEUTRAL'))
+
+def score_bars(df):
+    """Vectorized version of the per-bar scoring used by analyze_strategy.
+
+    Returns (score, signal, valid) arrays; signal is 'LONG'/'SHORT'/'NEUTRAL'
+    and is forced to NEUTRAL while any indicator is still warming up.
+    """
+    col = {c: df[c].to_numpy(dtype=float) for c in ['close'] + INDICATOR_COLUMNS}
+    prev_k = np.roll(col['Stoch_K'], 1)
+    prev_d = np.roll(col['Stoch_D'], 1)
+    prev_k[0] = prev_d[0] = np.nan
+    score = score_arrays(col['close'], col['RSI'], col['EMA_50'], col['EMA_200'], col['MACD'],
+                         col['MACD_Signal'], col['BB_Upper'], col['BB_Lower'],
+                         col['Stoch_K'], col['Stoch_D'], prev_k, prev_d)
+
+    valid = ~df[INDICATOR_COLUMNS].isna().any(axis=1).to_numpy()
+    valid[:WARMUP_BARS] = False
+    signal = score_to_signal(score)
+    signal[~valid] = 'NEUTRAL'
+    return score, signal, valid
+
+# --- Multi-Timeframe Confluence ---
+CONFLUENCE_TIMEFRAMES = {'1h': 1.0, '4h': 1.5, '1d': 2.0}  # Timeframe -> weight
+CONFLUENCE_THRESHOLD = 2.0
+CONFLUENCE_BASE_BARS = (WARMUP_BARS + 2) * 24  # 1h bars for the 1d frame to warm up (plus the forming day)
+
+def resample_ohlcv(df, rule):
+    """Aggregate candles to a coarser timeframe (the last bar may still be forming).
+
+    Buckets are contiguous in a sorted series, so each column is one
+    ufunc.reduceat over the bucket starts instead of a groupby.
+    """
+    keys = df['timestamp'].dt.floor(rule).to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return pd.DataFrame({
+        'timestamp': keys[starts],
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(), starts),
+    })
+
+def timeframe_scores(df, timeframes=CONFLUENCE_TIMEFRAMES):
+    """Last-bar score per timeframe, all derived from the base series in df.
+
+    Each coarser frame is resampled from the previous one (1h -> 4h -> 1d), so
+    the base series is aggregated once and every higher frame works on
+    arrays that are 4x/24x smaller; the base frame reuses df's indicator
+    columns if they are already there. Returns {tf: (score, bars, valid)};
+    valid is False while the frame is shorter than WARMUP_BARS or its last
+    bar still has an unsettled (NaN) indicator.
+    """
+    scores = {}
+    frame = df
+    base_tf = next(iter(timeframes))
+    for tf in timeframes:
+        if tf != base_tf:
+            frame = resample_ohlcv(frame, tf)
+        if len(frame) < 2:
+            continue
+        if 'ATR' not in frame:
+            frame = compute_indicators(frame)
+        score, _signal, _valid = score_bars(frame.iloc[-2:])  # Slice validity is meaningless; judged below
+        valid = len(frame) >= WARMUP_BARS and not frame[INDICATOR_COLUMNS].iloc[-1].isna().any()
+        scores[tf] = (int(score[-1]), len(frame), bool(valid))
+    return scores
+
+def apply_confluence(result, df, timeframes=CONFLUENCE_TIMEFRAMES, threshold=CONFLUENCE_THRESHOLD):
+    """Replace a single-timeframe result's signal with the weighted confluence.
+
+    LONG/SHORT needs the weighted mean score past +/-threshold and no
+    timeframe signalling the opposite side; confidence is HIGH when every
+    timeframe leans the same way. Frames that have not warmed up (fewer than
+    WARMUP_BARS candles, see CONFLUENCE_BASE_BARS) get no vote at all.
+    """
+    all_scores = timeframe_scores(df, timeframes)
+    scores = {tf: (s, bars) for tf, (s, bars, valid) in all_scores.items() if valid}
+    if not scores:
+        return result
+    weights = np.array([timeframes[tf] for tf in scores])
+    values = np.array([s for s, _bars in scores.values()])
+    confluence = float(weights @ values / weights.sum())
+
+    signal = "NEUTRAL"
+    confidence = "LOW"
+    if confluence >= threshold and not (values <= -3).any():
+        signal = "LONG"
+        confidence = "HIGH" if (values > 0).all() else "MEDIUM"
+    elif confluence <= -threshold and not (values >= 3).any():
+        signal = "SHORT"
+        confidence = "HIGH" if (values < 0).all() else "MEDIUM"
+
+    reasons = [r for r in result['reasons'] if not r.startswith("Bias:")]
+    reasons.append("Confluence: " + ", ".join(f"{tf} {s:+d}" for tf, (s, _b) in scores.items()) + f" -> {confluence:+.2f}")
+    unsettled = [f"{tf} ({bars} bars)" for tf, (_s, bars, valid) in all_scores.items() if not valid]
+    if unsettled:
+        reasons.append(f"Not voting, indicators not settled: {', '.join(unsettled)}")
+    return {**result, "signal": signal, "confidence": confidence, "score": round(confluence, 2),
+            "reasons": reasons, "timeframe_scores": {tf: s for tf, (s, _b) in scores.items()}}
+
+# --- State Machine ---
+def _profit_pct(side, entry_price, exit_price):
+    if side == "LONG":
+        return (exit_price - entry_price) / entry_price
+    return (entry_price - exit_price) / entry_price
+
+def _event(action, signal, price, entry_price=None, exit_price=None, profit_pct=None, reason=None):
+    return {"action": action, "signal": signal, "price": price, "entry_price": entry_price,
+            "exit_price": exit_price, "profit_pct": profit_pct, "reason": reason}
+
+def check_stop(state, price, bar=None, stop_mode='close'):
+    """Return (exit_price, reason) if the position's stop is hit, else (None, "").
+
+    stop_mode='close' compares the run's price like the cron scripts;
+    'intrabar' applies stop_fill_price to the bar's OHLC like stop_watcher.
+    """
+    side = state["signal"]
+    if side not in ("LONG", "SHORT") or state["entry_price"] == 0:
+        return None, ""
+    entry_price, entry_atr = state["entry_price"], state["entry_atr"]
+    if stop_mode == 'intrabar' and bar is not None:
+        fill = stop_fill_price(side, entry_price, entry_atr, bar['open'], bar['high'], bar['low'], ATR_MULTIPLIER)
+        if fill is None:
+            return None, ""
+        return fill, f"STOP LOSS ({side.title()}, intrabar): {fill:.2f}"
+    if side == "LONG":
+        stop_price = entry_price - (ATR_MULTIPLIER * entry_atr)
+        if price <= stop_price:
+            return price, f"STOP LOSS (Long): {price:.2f} <= {stop_price:.2f}"
+    else:
+        stop_price = entry_price + (ATR_MULTIPLIER * entry_atr)
+        if price >= stop_price:
+            return price, f"STOP LOSS (Short): {price:.2f} >= {stop_price:.2f}"
+    return None, ""
+
+def step(state, signal, price, atr, bar=None, stop_mode='close'):
+    """Advance the position state by one run/bar.
+
+    Returns (new_state, action, events, changed). Events are the rows the
+    live scripts log (exits and entries); action is the run's headline action.
+    """
+    exit_price, stop_reason = check_stop(state, price, bar, stop_mode)
+    if exit_price is not None:
+        side = state["signal"]
+        action = f"EXIT_{side} (STOP)"
+        events = [_event(action, "NEUTRAL", price, state["entry_price"], exit_price,
+                         _profit_pct(side, state["entry_price"], exit_price), stop_reason)]
+        return dict(FLAT_STATE), action, events, True
+
+    if state.get("pending_signal"):
+        pending = state["pending_signal"]
+        action = f"ENTER_{pending}"
+        new_state = {"signal": pending, "entry_price": price, "entry_atr": atr, "pending_signal": None}
+        return new_state, action, [_event(action, pending, price, entry_price=price)], True
+
+    if signal != state["signal"]:
+        old_signal = state["signal"]
+        events = []
+        action = "HOLD"
+        if old_signal in ("LONG", "SHORT"):
+            action = f"EXIT_{old_signal}"
+            events.append(_event(action, signal, price, state["entry_price"], price,
+                                 _profit_pct(old_signal, state["entry_price"], price)))
+        new_state = dict(FLAT_STATE)
+        if signal in ("LONG", "SHORT"):
+            new_state["pending_signal"] = signal
+            action = f"SIGNAL_{signal} (PENDING)"
+        return new_state, action, events, True
+
+    return state, "HOLD", [], False
+
+# --- Historical Replay ---
+def _next_index(sorted_idx, i):
+    """First element of sorted_idx that is >= i, or None"""
+    pos = np.searchsorted(sorted_idx, i)
+    return int(sorted_idx[pos]) if pos < len(sorted_idx) else None
+
+def _first_hit(mask_fn, i, n, chunk=256):
+    """First index >= i where mask_fn(lo, hi) is True, scanning in growing chunks"""
+    lo = i
+    while lo < n:
+        hi = min(n, lo + chunk)
+        hits = np.flatnonzero(mask_fn(lo, hi))
+        if len(hits):
+            return lo + int(hits[0])
+        lo = hi
+        chunk *= 4
+    return None
+
+def replay(df, stop_mode='close', start_idx=None):
+    """Run the live state machine over a candle DataFrame.
+
+    Returns (history, trades, events); trades use the run_backtest layout.
+    """
+    if 'ATR' not in df:
+        compute_indicators(df)
+    n = len(df)
+    score, signal, valid = score_bars(df)
+    opens = df['open'].to_numpy(dtype=float)
+    highs = df['high'].to_numpy(dtype=float)
+    lows = df['low'].to_numpy(dtype=float)
+    closes = df['close'].to_numpy(dtype=float)
+    atrs = df['ATR'].to_numpy(dtype=float)
+    times = list(df['timestamp'])
+
+    not_neutral = np.flatnonzero(signal != 'NEUTRAL')
+    not_long = np.flatnonzero(signal != 'LONG')
+    not_short = np.flatnonzero(signal != 'SHORT')
+
+    state = dict(FLAT_STATE)
+    actions = {}
+    events = []
+    i = WARMUP_BARS if start_idx is None else start_idx
+    while i < n:
+        side = state["signal"]
+        if state["pending_signal"]:
+            j = i
+        elif side == "NEUTRAL":
+            j = _next_index(not_neutral, i)
+        else:
+            entry, atr = state["entry_price"], state["entry_atr"]
+            j_sig = _next_index(not_long if side == "LONG" else not_short, i)
+            if side == "LONG":
+                stop = entry - ATR_MULTIPLIER * atr
+                src = lows if stop_mode == 'intrabar' else closes
+                j_stop = _first_hit(lambda lo, hi: src[lo:hi] <= stop, i, n)
+            else:
+                stop = entry + ATR_MULTIPLIER * atr
+                src = highs if stop_mode == 'intrabar' else closes
+                j_stop = _first_hit(lambda lo, hi: src[lo:hi] >= stop, i, n)
+            candidates = [x for x in (j_sig, j_stop) if x is not None]
+            j = min(candidates) if candidates else None
+        if j is None:
+            break
+        bar = {"open": opens[j], "high": highs[j], "low": lows[j]}
+        state, action, bar_events, _changed = step(state, signal[j], closes[j], atrs[j], bar, stop_mode)
+        actions[j] = action
+        for ev in bar_events:
+            ev["index"] = j
+            ev["time"] = times[j]
+        events.extend(bar_events)
+        i = j + 1
+
+    trades = []
+    entry_time = None
+    for ev in events:
+        if ev["exit_price"] is None:
+            entry_time = ev["time"]
+            continue
+        trades.append({
+            "type": ev["action"].split("_")[1].split(" ")[0],
+            "entry": ev["entry_price"],
+            "entry_time": entry_time,
+            "exit": ev["exit_price"],
+            "pnl": ev["profit_pct"],
+            "reason": "STOP_LOSS" if "(STOP)" in ev["action"] else "SIGNAL_CHANGE",
+            "time": ev["time"],
+        })
+
+    first = WARMUP_BARS if start_idx is None else start_idx
+    pnl = np.zeros(n)
+    for ev in events:
+        if ev["profit_pct"] is not None:
+            pnl[ev["index"]] = ev["profit_pct"]
+    history = [{
+        "timestamp": times[k],
+        "price": closes[k],
+        "signal": signal[k],
+        "score": int(score[k]),
+        "action": actions.get(k, "HOLD"),
+        "pnl": pnl[k],
+    } for k in range(first, n)]
+    return history, trades, events
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Config-driven strategy engine for an arbitrary symbol universe.
+
+One process replaces one-script-per-asset: candles for every symbol in
+strategy_config.json (or the top N pairs by volume) are fetched concurrently
+through data_sources, within the host-wide request weight budget, aligned on
+common timestamps, and the indicators and scores for all symbols are computed
+in one batch with the (symbols x bars) kernels in indicators.py. Each symbol then goes through the
+same strategy_core.step() state machine as the single-asset scripts, with its
+own state file, CSV history and journal. With "exchange": "hyperliquid" the
+candles are Hyperliquid perps (hyperliquid_data), so signals are computed on
+the market the hyperliquid-trading skill actually trades.
+"""
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import state_store
+import timing
+from data_sources import call, fetch_many
+from indicators import all_indicators
+from signal_bus import BUS_FILE, publish
+from signal_journal import append_record, make_record
+from strategy_config import CONFIG_FILE, asset_files, load_config
+from strategy_core import INDICATOR_COLUMNS, WARMUP_BARS, score_arrays, score_to_signal, step
+
+ENGINE_BUS_FILE = f"{BUS_FILE}_engine"  # Kept apart from the per-asset scripts' slots
+REPORT_KEYS = ['RSI', 'MACD', 'ATR', 'BB_Upper', 'BB_Lower', 'EMA_50', 'EMA_200']
+
+# --- Universe ---
+def top_symbols(quote, n, exclude=(), exchange_id='binance'):
+    """Top n active spot bases quoted in `quote`, by 24h quote volume (one tickers request)"""
+    async def load(hub):
+        source = hub.source(exchange_id)
+        return await source.markets(), await source.tickers()
+    markets, tickers = call(load)
+    ranked = []
+    for symbol, ticker in tickers.items():
+        market = markets.get(symbol, {})
+        base, _, rest = symbol.partition('/')
+        if rest != quote or not market.get('active', True) or base in exclude:
+            continue
+        ranked.append((ticker.get('quoteVolume') or 0.0, base))
+    ranked.sort(reverse=True)
+    return [base for _vol, base in ranked[:n]]
+
+def resolve_symbols(config):
+    if config.get('top_n', 0) > 0 and config['exchange'] == 'hyperliquid':
+        from hyperliquid_data import top_perps
+        return top_perps(config['top_n'], set(config.get('exclude', [])))
+    if config.get('top_n', 0) > 0:
+        return top_symbols(config['quote'], config['top_n'], set(config.get('exclude', [])), config['exchange'])
+    return list(config['symbols'])
+
+# --- Concurrent Fetch ---
+def fetch_candles(assets, quote, timeframe, limit, max_workers=8, exchange_id='binance'):
+    """{asset: bars} for all assets, fetched concurrently within the shared weight budget"""
+    if exchange_id == 'hyperliquid':  # Perp candles keyed by coin name, no quote
+        from hyperliquid_data import fetch_candles as fetch_hl_candles
+        return fetch_hl_candles(assets, timeframe, limit, max_workers)
+    by_symbol = fetch_many([f"{asset}/{quote}" for asset in assets], timeframe, limit, exchange_id, max_workers)
+    return {symbol.split('/')[0]: bars for symbol, bars in by_symbol.items()}
+
+def to_wide(candles, max_lag_bars=1):
+    """Align per-asset bars into {'open'|'high'|'low'|'close'|'volume': DataFrame(bars x assets)}.
+
+    The panel ends on the newest bar every asset has: a concurrent fetch that
+    straddles a bar boundary leaves some assets without the newest bar, which
+    would otherwise be a NaN last row and drop them as invalid. Assets more
+    than max_lag_bars behind (halted, delisted) are skipped with a message
+    instead of holding every other asset back.
+    """
+    frames = {
+        asset: pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']).set_index('timestamp')
+        for asset, bars in candles.items() if bars
+    }
+    for asset in candles.keys() - frames.keys():
+        print(f"{asset}: no candles, skipped")
+    last_ts = pd.Series({asset: frame.index[-1] for asset, frame in frames.items()})
+    bar_ms = min((np.diff(frame.index).min() for frame in frames.values() if len(frame) > 1), default=0)
+    newest = last_ts.max()
+    for asset in last_ts.index[last_ts < newest - max_lag_bars * bar_ms]:
+        lag = (newest - last_ts[asset]) // bar_ms
+        print(f"{asset}: last bar is {lag} bars behind the others, skipped")
+        del frames[asset]
+    common = min(last_ts[asset] for asset in frames)
+    if common < newest:
+        behind = [asset for asset in frames if last_ts[asset] < newest]
+        print(f"Newest bar not printed yet for {', '.join(behind)}; scoring every asset on the previous bar")
+    panel = pd.concat(frames, axis=1).sort_index().loc[:common]
+    panel.index = pd.to_datetime(panel.index, unit='ms')
+    return {field: panel.xs(field, axis=1, level=1) for field in ['open', 'high', 'low', 'close', 'volume']}
+
+# --- Batch Indicators & Scoring ---
+def batch_indicators(wide):
+    """All strategy indicators for every asset in one kernel call each: (assets, bars) arrays"""
+    return all_indicators(wide['high'].to_numpy().T, wide['low'].to_numpy().T, wide['close'].to_numpy().T)
+
+def score_latest(ind, bar_counts):
+    """Score, signal and validity of the latest bar for every asset"""
+    last = {k: v[:, -1] for k, v in ind.items()}
+    prev_k = ind['Stoch_K'][:, -2]
+    prev_d = ind['Stoch_D'][:, -2]
+    score = score_arrays(last['close'], last['RSI'], last['EMA_50'], last['EMA_200'], last['MACD'],
+                         last['MACD_Signal'], last['BB_Upper'], last['BB_Lower'],
+                         last['Stoch_K'], last['Stoch_D'], prev_k, prev_d)
+    valid = ~np.isnan(np.vstack([last[c] for c in ['close'] + INDICATOR_COLUMNS])).any(axis=0)
+    valid &= bar_counts >= WARMUP_BARS
+    signal = score_to_signal(score)
+    signal[~valid] = 'NEUTRAL'
+    return last, score, signal, valid
+
+def scan(assets, config):
+    """Fetch and score all assets; returns {asset: result} in the analyze_strategy layout"""
+    with timing.span('fetch'):
+        candles = fetch_candles(assets, config['quote'], config['timeframe'], config['limit'],
+                                config['max_workers'], config['exchange'])
+    if not any(candles.values()):
+        return {}
+    with timing.span('analyze_strategy'):
+        wide = to_wide(candles)
+        ind = batch_indicators(wide)
+        bar_counts = wide['close'].notna().sum().to_numpy()
+        last, score, signal, valid = score_latest(ind, bar_counts)
+    results = {}
+    for i, asset in enumerate(wide['close'].columns):
+        trend = "BULLISH" if last['EMA_50'][i] > last['EMA_200'][i] else "BEARISH"
+        results[asset] = {
+            "price": float(last['close'][i]),
+            "signal": str(signal[i]),
+            "score": int(score[i]),
+            "reasons": [f"Trend: {trend}", f"Score: {int(score[i]):+d}"] if valid[i] else
+                       ["Indicators warming up (insufficient data)"],
+            "indicators": {k: float(last[k][i]) for k in REPORT_KEYS},
+            "valid": bool(valid[i]),
+        }
+    return results
+
+# --- Per-Asset State ---
+def _num(value):
+    return "" if value is None else f"{value:.2f}"
+
+def _price(value):
+    """Prices below 1 (most of a top-200 universe) keep six decimals"""
+    if value is None:
+        return ""
+    return f"{value:.2f}" if value >= 1 else f"{value:.6f}"
+
+def _log_to_csv(files, asset, price, signal, action, entry_price, exit_price, profit, reasons, indicators):
+    fieldnames = ['Date', f'{asset} Price', 'Signal', 'Action', 'Entry Price',
+                  'Exit Price', 'Profit (USDT)', 'Stop Loss Level', 'Reasons',
+                  'RSI', 'MACD', 'ATR', 'BB_Lower', 'BB_Upper']
+    stop_level = None
+    if action.startswith("ENTER"):
+        stop_level = price - 2.0 * indicators['ATR'] if "LONG" in action else price + 2.0 * indicators['ATR']
+    file_exists = os.path.isfile(files['csv_file'])
+    with open(files['csv_file'], 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        if not file_exists:
+            writer.writeheader()
+        writer.writerow({
+            'Date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            f'{asset} Price': _price(price),
+            'Signal': signal,
+            'Action': action,
+            'Entry Price': _price(entry_price),
+            'Exit Price': _price(exit_price),
+            'Profit (USDT)': _num(profit),
+            'Stop Loss Level': _price(stop_level),
+            'Reasons': "; ".join(reasons),
+            'RSI': f"{indicators['RSI']:.2f}",
+            'MACD': f"{indicators['MACD']:.2f}",
+            'ATR': f"{indicators['ATR']:.2f}",
+            'BB_Lower': f"{indicators['BB_Lower']:.2f}",
+            'BB_Upper': f"{indicators['BB_Upper']:.2f}",
+        })
+    append_record(files['journal_file'], make_record(
+        price, signal, action, entry_price, exit_price, profit, stop_level, reasons, indicators
+    ))
+
+@timing.timed()
+def run_asset(asset, result, workspace, bus_file=ENGINE_BUS_FILE):
+    """Advance one asset's position with strategy_core.step(); returns the action"""
+    files = asset_files(asset, workspace)
+    with state_store.strategy_lock(files['state_file']):
+        state = state_store.load_state(files['state_file'])
+        state, action, events, changed = step(state, result['signal'], result['price'], result['indicators']['ATR'])
+        for event in events:
+            if event['reason']:
+                result['reasons'].append(event['reason'])
+            profit = 100 * event['profit_pct'] if event['profit_pct'] is not None else None
+            _log_to_csv(files, asset, result['price'], event['signal'], event['action'],
+                        event['entry_price'], event['exit_price'], profit, result['reasons'], result['indicators'])
+        if changed:
+            state_store.save_state(files['state_file'], state, action)
+    try:
+        publish(asset, result, bus_file)
+    except Exception as e:
+        print(f"{asset}: signal bus publish failed ({e})")
+    return action
+
+def main():
+    # Usage: strategy_engine.py [--config PATH] [--top N] [--scan-only]
+    #        strategy_engine.py --config strategy_config_hyperliquid.json   (Hyperliquid perps)
+    config = load_config(sys.argv[sys.argv.index('--config') + 1] if '--config' in sys.argv else CONFIG_FILE)
+    if '--top' in sys.argv:
+        config['top_n'] = int(sys.argv[sys.argv.index('--top') + 1])
+    os.makedirs(config['workspace'], exist_ok=True)
+    default_bus = ENGINE_BUS_FILE if config['exchange'] == 'binance' else f"{ENGINE_BUS_FILE}_{config['exchange']}"
+
+    with timing.run(f"engine_{config['exchange']}"):
+        start = time.time()
+        with timing.span('resolve_symbols'):
+            assets = resolve_symbols(config)
+        results = scan(assets, config)
+        print(f"Scanned {len(results)}/{len(assets)} symbols ({config['timeframe']}) in {time.time() - start:.1f}s")
+
+        for asset, result in results.items():
+            if not result['valid']:
+                continue
+            action = ""
+            if '--scan-only' not in sys.argv:
+                try:
+                    action = run_asset(asset, result, config['workspace'], config.get('bus_file', default_bus))
+                except state_store.StateLocked as e:
+                    print(f"{asset}: skipping ({e})")
+                    continue
+            if result['signal'] != "NEUTRAL" or action not in ("", "HOLD"):
+                print(f"{asset:<10} {result['signal']:<8} score {result['score']:+d}  {action}")
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,21 @@
 #!/usr/bin/env python3
 
-import requests
 import json
 import datetime
-import time
 from typing import List, Dict, Any, Optional
 
+from data_sources import fetch_json
+
 class TimeoutResistantAnalyzer:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        self.max_retries = 2
         self.timeout = 8  # Reduced timeout to avoid 524 errors
         self.circuit_breaker_timeout = 30  # 30 seconds circuit breaker
         
-    def fetch_with_timeout(self, url: str, params: Dict = None, retry_count: int = 0) -> Optional[Dict]:
-        """Fetch data with timeout and retry logic"""
+    def fetch_with_timeout(self, url: str, params: Dict = None) -> Optional[Dict]:
+        """Fetch data with timeout; retries and backoff come from the shared data layer"""
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.Timeout:
-            print(f"⚠️ Timeout fetching {url}")
-            if retry_count < self.max_retries:
-                print(f"🔄 Retrying ({retry_count + 1}/{self.max_retries})...")
-                time.sleep(2)  # Short delay before retry
-                return self.fetch_with_timeout(url, params, retry_count + 1)
-            return None
-        except requests.exceptions.RequestException as e:
+            return fetch_json(url, params, timeout=self.timeout)
+        except RuntimeError as e:
             print(f"⚠️ Request failed: {e}")
             return None
     
@@ -192,6 +178,11 @@ class TimeoutResistantAnalyzer:
                 'note': 'Error - using technical analysis only'
             }
 
+    def get_shared_sentiment(self, asset: str = 'ALL') -> Optional[Dict[str, Any]]:
+        """Time-decayed sentiment from the shared per-article cache"""
+        from sentiment_pipeline import get_shared_sentiment
+        return get_shared_sentiment(asset, lambda: self.get_crypto_news_fast(5))
+
 # Test the timeout-resistant analyzer
 if __name__ == "__main__":
     analyzer = TimeoutResistantAnalyzer()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Per-stage timing for strategy runs.
+
+The strategy scripts mark their hot path with spans:
+
+    @timed()                        # on analyze_strategy, log_to_csv, ...
+    with span('fetch'): ...         # around inline stages
+    with timing.run('btc'): main()  # one run: total time, report, optional profile
+
+Timing is off unless OPENCLAW_TIMING=1 (or a profiler is requested), and
+then timed() returns the function itself and span() a shared no-op context,
+so instrumented code pays nothing. When on, every run appends its stage
+durations to METRICS_DIR/stage_timings.jsonl and rewrites a Prometheus
+textfile (openclaw_<job>.prom, picked up by node_exporter's textfile
+collector) with last-run and cumulative stage seconds; the data_sources
+per-source latency histograms are exported alongside.
+
+OPENCLAW_PROFILE=cprofile (or pyinstrument, when installed) additionally
+profiles the whole run and dumps it to METRICS_DIR/profiles/.
+"""
+import contextlib
+import functools
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+WORKSPACE = '/home/ironman/.openclaw/workspace'
+METRICS_DIR = os.environ.get('OPENCLAW_METRICS_DIR', os.path.join(WORKSPACE, 'metrics'))
+TIMINGS_FILE = os.path.join(METRICS_DIR, 'stage_timings.jsonl')
+PROFILE_DIR = os.path.join(METRICS_DIR, 'profiles')
+NODE_EXPORTER_DIR = '/var/lib/node_exporter/textfile_collector'
+TEXTFILE_DIR = os.environ.get('OPENCLAW_TEXTFILE_DIR', NODE_EXPORTER_DIR if os.path.isdir(NODE_EXPORTER_DIR) else METRICS_DIR)
+PROFILE_MODE = os.environ.get('OPENCLAW_PROFILE', '').lower()  # '', 'cprofile' or 'pyinstrument'
+ENABLED = os.environ.get('OPENCLAW_TIMING', '0') != '0' or bool(PROFILE_MODE)
+PROFILE_TOP = 15
+
+_STAGES = {}  # stage -> [calls, seconds] for the current run
+_NOOP = contextlib.nullcontext()
+
+# --- Spans ---
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage = _STAGES.setdefault(self.name, [0, 0.0])
+        stage[0] += 1
+        stage[1] += time.perf_counter() - self.start
+        return False
+
+def span(name):
+    """Context manager timing one stage; repeated stages (log_to_csv per event) add up"""
+    return _Span(name) if ENABLED else _NOOP
+
+def timed(name=None):
+    """Decorator timing every call of a function as stage `name` (default: the function name)"""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        stage = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def stages():
+    """{stage: (calls, seconds)} recorded so far in this run"""
+    return {name: (calls, seconds) for name, (calls, seconds) in _STAGES.items()}
+
+# --- Reports ---
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)  # node_exporter must never read a half-written file
+
+def _read_counters(path):
+    """Sample lines of a previous textfile, {'name{labels}': value}"""
+    counters = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if line and not line.startswith('#'):
+                    key, _, value = line.rstrip().rpartition(' ')
+                    counters[key] = float(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+def _label(value):
+    return re.sub(r'["\\\n]', '_', str(value))
+
+def write_textfile(job, total, ok, timings, directory=TEXTFILE_DIR):
+    """openclaw_<job>.prom: last-run gauges plus counters carried over from the previous file"""
+    path = os.path.join(directory, f"openclaw_{_label(job)}.prom")
+    previous = _read_counters(path)
+    job_label = f'job="{_label(job)}"'
+    lines = [
+        '# HELP openclaw_stage_last_seconds Stage duration in the last run',
+        '# TYPE openclaw_stage_last_seconds gauge',
+    ]
+    lines += [f'openclaw_stage_last_seconds{{{job_label},stage="{_label(s)}"}} {sec:.6f}' for s, (_n, sec) in timings.items()]
+    # Counters carry every stage seen so far, not just this run's: conditional stages (chart,
+    # Telegram, news_fetch on a sentiment cache hit) must not vanish and read as a counter reset
+    seconds_total, calls_total = {}, {}
+    for key, value in previous.items():
+        name, _, labels = key.partition('{')
+        if name == 'openclaw_stage_seconds_total':
+            seconds_total['{' + labels] = value
+        elif name == 'openclaw_stage_calls_total':
+            calls_total['{' + labels] = value
+    for s, (calls, sec) in timings.items():
+        labels = f'{{{job_label},stage="{_label(s)}"}}'
+        seconds_total[labels] = seconds_total.get(labels, 0.0) + sec
+        calls_total[labels] = calls_total.get(labels, 0.0) + calls
+    lines += ['# HELP openclaw_stage_seconds_total Stage duration summed over all runs',
+              '# TYPE openclaw_stage_seconds_total counter']
+    lines += [f'openclaw_stage_seconds_total{labels} {value:.6f}' for labels, value in sorted(seconds_total.items())]
+    lines += ['# HELP openclaw_stage_calls_total Stage calls summed over all runs', '# TYPE openclaw_stage_calls_total counter']
+    lines += [f'openclaw_stage_calls_total{labels} {value:.0f}' for labels, value in sorted(calls_total.items())]
+    runs_key = f'openclaw_runs_total{{{job_label},ok="{str(ok).lower()}"}}'
+    lines += [
+        '# HELP openclaw_run_last_seconds Wall time of the last run', '# TYPE openclaw_run_last_seconds gauge',
+        f'openclaw_run_last_seconds{{{job_label}}} {total:.6f}',
+        '# HELP openclaw_run_last_timestamp_seconds End of the last run', '# TYPE openclaw_run_last_timestamp_seconds gauge',
+        f'openclaw_run_last_timestamp_seconds{{{job_label}}} {time.time():.0f}',
+        '# HELP openclaw_runs_total Runs by outcome', '# TYPE openclaw_runs_total counter',
+    ]
+    for outcome in ('true', 'false'):
+        key = f'openclaw_runs_total{{{job_label},ok="{outcome}"}}'
+        lines.append(f'{key} {previous.get(key, 0.0) + (key == runs_key):.0f}')
+    _write_atomic(path, '\n'.join(lines) + '\n')
+    return path
+
+def write_source_textfile(directory=TEXTFILE_DIR):
+    """data_sources latency histograms as Prometheus histograms (openclaw_data_sources.prom)"""
+    from data_sources import read_metrics
+    metrics = read_metrics()
+    if not metrics:
+        return None
+    lines = ['# HELP openclaw_source_request_ms Market-data request latency per source',
+             '# TYPE openclaw_source_request_ms histogram']
+    for source, h in sorted(metrics.items()):
+        label = f'source="{_label(source)}"'
+        running = 0
+        for bound, count in zip(list(h.buckets) + ['+Inf'], h.counts):
+            running += count
+            lines.append(f'openclaw_source_request_ms_bucket{{{label},le="{bound}"}} {running}')
+        lines.append(f'openclaw_source_request_ms_sum{{{label}}} {h.total_ms:.3f}')
+        lines.append(f'openclaw_source_request_ms_count{{{label}}} {h.count}')
+    lines += ['# HELP openclaw_source_errors_total Failed request attempts per source', '# TYPE openclaw_source_errors_total counter']
+    lines += [f'openclaw_source_errors_total{{source="{_label(s)}"}} {h.errors}' for s, h in sorted(metrics.items())]
+    path = os.path.join(directory, 'openclaw_data_sources.prom')
+    _write_atomic(path, '\n'.join(lines) + '\n')
+    return path
+
+def report(job, total, ok=True):
+    """Append the run to TIMINGS_FILE, refresh the textfiles and print a one-line summary"""
+    timings = stages()
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with open(TIMINGS_FILE, 'a') as f:
+        f.write(json.dumps({
+            'ts': datetime.now().isoformat(timespec='seconds'), 'job': job, 'ok': ok, 'total': round(total, 6),
+            'stages': {s: {'calls': calls, 'seconds': round(sec, 6)} for s, (calls, sec) in timings.items()},
+        }) + '\n')
+    write_textfile(job, total, ok, timings)
+    try:
+        write_source_textfile()
+    except ImportError:
+        pass
+    parts = ', '.join(f"{s} {sec:.2f}s" + (f" x{calls}" if calls > 1 else '') for s, (calls, sec) in timings.items())
+    print(f"⏱ {job} run {total:.2f}s: {parts}")
+
+# --- Profiling ---
+def _start_profiler():
+    if PROFILE_MODE == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        except ImportError:
+            print("pyinstrument is not installed; profiling with cProfile")
+    if PROFILE_MODE:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    return None
+
+def _dump_profile(profiler, job):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if hasattr(profiler, 'output_html'):  # pyinstrument
+        profiler.stop()
+        path = os.path.join(PROFILE_DIR, f"{job}_{stamp}.html")
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        import pstats
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, f"{job}_{stamp}.prof")
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP)
+    print(f"Profile: {path}")
+
+@contextlib.contextmanager
+def run(job):
+    """Time one strategy run as a whole; reports (and dumps the profile) even when the run fails"""
+    if not ENABLED:
+        yield
+        return
+    _STAGES.clear()
+    profiler = _start_profiler()
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        total = time.perf_counter() - start
+        if profiler is not None:
+            _dump_profile(profiler, job)
+        try:
+            report(job, total, ok)
+        except OSError as e:
+            print(f"Timing report failed: {e}")
+
+if __name__ == "__main__":
+    # Usage: timing.py [job] [runs]  -- per-stage mean/max over the last runs in TIMINGS_FILE
+    import sys
+    job = sys.argv[1] if len(sys.argv) > 1 else None
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    try:
+        with open(TIMINGS_FILE, 'r') as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        runs = []
+    runs = [r for r in runs if job is None or r['job'] == job][-count:]
+    if not runs:
+        print(f"No timed runs yet ({TIMINGS_FILE}); run a strategy with OPENCLAW_TIMING=1")
+        sys.exit(0)
+    print(f"{'stage':<28} {'runs':>5} {'mean s':>9} {'max s':>9}")
+    names = sorted({s for r in runs for s in r['stages']}, key=lambda s: -sum(r['stages'].get(s, {}).get('seconds', 0) for r in runs))
+    for name in ['total'] + names:
+        values = [r['total'] if name == 'total' else r['stages'][name]['seconds'] for r in runs if name == 'total' or name in r['stages']]
+        print(f"{name:<28} {len(values):>5} {sum(values) / len(values):>9.3f} {max(values):>9.3f}")
@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import ccxt
 import pandas as pd
 import numpy as np
 import sys
@@ -12,6 +11,12 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib
 matplotlib.use('Agg')
+from signal_bus import publish
+from data_sources import fetch_ohlcv
+from sentiment_pipeline import get_shared_sentiment, score_adjustment
+from timeout_resistant_btc import TimeoutResistantAnalyzer
+import timing
+from timing import span, timed
 
 CSV_FILE = '/home/ironman/.openclaw/workspace/xrp_strategy_history.csv'
 STATE_FILE = '/home/ironman/.openclaw/workspace/xrp_strategy_state.json'
@@ -51,6 +56,7 @@ def calculate_atr(df, period=14):
     atr = true_range.rolling(window=period).mean()
     return atr
 
+@timed()
 def generate_price_chart(df, symbol="XRP/USDT"):
     try:
         plt.style.use('dark_background')
@@ -72,6 +78,7 @@ def generate_price_chart(df, symbol="XRP/USDT"):
         print(f"Chart error: {e}")
         return None
 
+@timed()
 def send_report_via_telegram(report_text, chart_path=None):
     try:
         subprocess.run(['openclaw', 'message', 'send', '--channel', 'telegram', '--target', GROUP_ID, '--message', report_text], capture_output=True)
@@ -84,17 +91,18 @@ def send_report_via_telegram(report_text, chart_path=None):
 
 def main():
     try:
-        exchange = ccxt.binance()
-        bars = exchange.fetch_ohlcv('XRP/USDT', timeframe='1h', limit=500)
-        df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        with span('fetch'):
+            bars = fetch_ohlcv('XRP/USDT', '1h', limit=500)
+            df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         
-        rsi = calculate_rsi(df['close'])
-        ema50 = calculate_ema(df['close'], 50)
-        ema200 = calculate_ema(df['close'], 200)
-        macd, macd_sig = calculate_macd(df['close'])
-        upper, _, lower = calculate_bollinger_bands(df['close'])
-        atr = calculate_atr(df)
+        with span('analyze_strategy'):
+            rsi = calculate_rsi(df['close'])
+            ema50 = calculate_ema(df['close'], 50)
+            ema200 = calculate_ema(df['close'], 200)
+            macd, macd_sig = calculate_macd(df['close'])
+            upper, _, lower = calculate_bollinger_bands(df['close'])
+            atr = calculate_atr(df)
         
         last_rsi = rsi.iloc[-1]
         last_ema50 = ema50.iloc[-1]
@@ -107,17 +115,40 @@ def main():
         if last_rsi < 30: score += 2
         elif last_rsi > 70: score -= 2
         
+        # Shared, time-decayed news pass (one fetch per TTL across the asset scripts)
+        with span('sentiment'):
+            sentiment_data = get_shared_sentiment('XRP', timed('news_fetch')(lambda: TimeoutResistantAnalyzer().get_crypto_news_fast(5)))
+        if sentiment_data:
+            print(f"📰 Sentiment from {sentiment_data['articles_count']} cached news articles (score {sentiment_data['score']:+.2f}, {sentiment_data['status']})")
+            score += score_adjustment(sentiment_data)
+        signal = 'LONG' if score >= 2 else 'SHORT' if score <= -2 else 'NEUTRAL'
+        score = int(round(score))
+        
+        try:
+            publish('XRP', {
+                "signal": signal, "score": score, "price": last_price,
+                "indicators": {
+                    "RSI": last_rsi, "MACD": macd.iloc[-1], "ATR": atr.iloc[-1],
+                    "BB_Upper": upper.iloc[-1], "BB_Lower": lower.iloc[-1],
+                    "EMA_50": last_ema50, "EMA_200": last_ema200
+                }
+            })
+        except Exception as e:
+            print(f"Signal bus publish failed: {e}")
+        
         insights = [
             f"📊 {('BULLISH' if last_ema50 > last_ema200 else 'BEARISH')} trend established (EMA 50/200)",
             f"📊 RSI status: {'Oversold' if last_rsi < 30 else 'Overbought' if last_rsi > 70 else 'Neutral'} ({last_rsi:.1f})",
             f"📈 XRP Volatility (ATR): {atr.iloc[-1]:.4f}"
         ]
+        if sentiment_data:
+            insights.append(f"📰 News sentiment: {sentiment_data['sentiment']} ({sentiment_data['strength']}, {sentiment_data['articles_count']} articles, {sentiment_data['status']})")
         
         chart_path = generate_price_chart(df, "XRP/USDT")
         
         report_text = f"""XRP/USDT Strategy Report (1H)
 Price: ${last_price:.4f}
-Signal: {'LONG' if score >= 2 else 'SHORT' if score <= -2 else 'NEUTRAL'}
+Signal: {signal}
 Confidence: {'HIGH' if abs(score) >= 3 else 'MEDIUM'}
 Score: {score}/5
 
@@ -136,7 +167,7 @@ EMA 200: ${last_ema200:.4f}"""
         send_report_via_telegram(report_text, chart_path)
         
         file_exists = os.path.isfile(CSV_FILE)
-        with open(CSV_FILE, 'a', newline='') as f:
+        with span('log_to_csv'), open(CSV_FILE, 'a', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=['Date', 'XRP Price', 'Signal', 'Action'])
             if not file_exists: writer.writeheader()
             writer.writerow({'Date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'XRP Price': f"{last_price:.4f}", 'Signal': 'NEUTRAL', 'Action': 'REPORT'})
@@ -145,4 +176,5 @@ EMA 200: ${last_ema200:.4f}"""
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    main()
+    with timing.run('xrp'):
+        main()